@@ -1,91 +1,128 @@
+from array import array
+from collections import OrderedDict
 import heapq
+import math
+import re
+import threading
+import time
 
-class Node:
-    """Data used by a Pathfinder to represent a single walkable cell."""
+# matches any terrain cost different from 0 and 1
+NOT_UNIFORM_PATTERN = re.compile(b'[^\x00\x01]')
 
-    def __init__(self, r, c, g = 0, h = 0, parent = None):
+class Grid:
+    """Compact map stored in a flat bytearray, with a border of unwalkable cells.
+
+    The value of a cell is 0 for an unwalkable cell and the terrain cost of the cell for a walkable one.
+    A move between two adjacent cells costs the base cost of the move (straight or diagonal)
+    multiplied by the average terrain cost of the two cells, so all the cells with cost 1
+    give the same costs of a map without terrain.
+    The border makes every neighbor of a cell of the map a valid index of the array,
+    so no bounds check is needed when exploring adjacent cells.
+
+    Every row is preceded by one border cell, which is also the border after the previous row.
+    This is the same layout of a map file with a '\n' at the end of every line, which allows
+    to load a file with a single copy.
+    """
+
+    # True when the cells are loaded on demand, so nothing should read the whole map
+    lazy = False
+
+    def __init__(self, rows, cols, cells = None):
         """
         Parameters
         ----------
-        r : int
-            row of the cell
-        c : int
-            col of the cell
-        g : int
-            cost of path to this node
-        h : int
-            estimated cost from this node to goal
-        parent : Node
-            previous Node in the path
+        rows : int
+            number of rows of the map
+        cols : int
+            number of cols of the map
+        cells : bytearray
+            optional buffer of Grid.buffer_size(rows, cols) values, border included.
+            Any writable buffer of bytes works, like a memoryview of a memory-mapped file.
+            When not set all the cells of the map are walkable.
         """
-        self.r = r
-        self.c = c
+        self.rows = rows
+        self.cols = cols
+        self.stride = cols + 1
+        # incremented every time a cell is changed with set_walkable or set_cost
+        self.version = 0
+        # incremented only when a cell becomes walkable or unwalkable
+        self.wallVersion = 0
+
+        # cached result of is_uniform and the version it was computed for
+        self.uniform = True
+        self.uniformVersion = -1
+
+        if cells != None:
+            self.cells = cells
+        else:
+            self.cells = bytearray(Grid.buffer_size(rows, cols))
+            rowData = b'\x01' * cols
 
-        self.f = g + h
-        self.g = g
-        self.h = h
+            for r in range(rows):
+                i = self.cell_index(r, 0)
+                self.cells[i:i + cols] = rowData
 
-        self.parent = parent
+    def __getstate__(self):
+        """Get the state used by pickle, the cells are copied when they are not a bytearray."""
+        state = self.__dict__.copy()
 
-    def set_costs(self, g, h):
-        """Set G and H costs and compute F from them.
+        if not isinstance(self.cells, bytearray):
+            state["cells"] = bytearray(self.cells)
+
+        return state
+
+    @staticmethod
+    def buffer_size(rows, cols):
+        """Get the size of the buffer needed to store a map, border included.
 
         Parameters
         ----------
-        g : int
-            cost of path to this node
-        h : int
-            estimated cost from this node to goal
-        """
-        self.f = g + h
-        self.g = g
-        self.h = h
+        rows : int
+            number of rows of the map
+        cols : int
+            number of cols of the map
 
-    def __lt__(self, other):
-        """Operator < required by heapq."""
-        return self.f < other.f
+        Returns
+        -------
+        int
+            number of cells of the buffer
+        """
+        return (rows + 2) * (cols + 1) + 1
 
-class Pathfinder:
-    """Pathfinder that implements the A* search in a map."""
+    @classmethod
+    def from_list(cls, map):
+        """Create a Grid from a list of rows.
 
-    def __init__(self, map = None):
-        """
         Parameters
         ----------
         map : list
-            list containing sub-lists reprenting the rows of the map
-        """
-        self.set_map(map)
+            list containing sub-lists reprenting the rows of the map, 0 is an unwalkable cell
+            and any other value up to 255 is the terrain cost of a walkable cell
 
-        self.openList = []
-        self.openMap = dict()
-        self.closedMap = dict()
-        self.goal = ()
-        self.costHor = 10
-        self.costDia = 14
+        Returns
+        -------
+        Grid
+            a new Grid with the same cells
 
-    def set_map(self, map):
-        self.map = map
+        Raises
+        ------
+        ValueError
+            if the rows have different lengths
+        """
+        rows = len(map)
+        cols = len(map[0])
 
-        if map != None:
-            self.mapRows = len(map)
-            self.mapCols = len(map[0])
-        else:
-            self.mapRows = 0
-            self.mapCols = 0
+        grid = cls(rows, cols)
 
-    def add_to_open(self, node, idx):
-        """Add a node to the open list.
+        for r in range(rows):
+            # a row of a different length would shift all the following ones
+            if len(map[r]) != cols:
+                raise ValueError("Row {} has {} cells instead of {}".format(r, len(map[r]), cols))
 
-        Parameters
-        ----------
-        node : Node
-            node to add to the open list
-        idx : int
-            unique index of the node in the map
-        """
-        heapq.heappush(self.openList, node)
-        self.openMap[idx] = node
+            i = grid.cell_index(r, 0)
+            grid.cells[i:i + cols] = bytes(map[r])
+
+        return grid
 
     def cell_index(self, r, c):
         """Get the index of a cell from its row and col.
@@ -102,177 +139,3325 @@ class Pathfinder:
         int
             an unique index identifying one cell of the map
         """
-        return r * self.mapCols + c
+        return (r + 1) * self.stride + c + 1
 
-    def cost_to_adj(self, dr, dc):
-        """Compute the cost of moving to an adjacent cell.
+    def cell_from_index(self, idx):
+        """Get the row and col of a cell from its index.
 
         Parameters
         ----------
-        dr : int
-            row delta, it can be -1, 0, 1
-        dc : int
-            col delta, it can be -1, 0, 1
+        idx : int
+            unique index of the cell
 
         Returns
         -------
-        int
-            cost of movement to the next cell
+        tuple
+            row,col of the cell
         """
-        # if both deltas are 1 it's a diagonal cell
-        if dr != 0 and dc != 0:
-            return self.costDia
-        else:
-            return self.costHor
+        r, c = divmod(idx - 1, self.stride)
+        return (r - 1, c)
 
-    def cost_to_goal(self, src):
-        """Compute the approximated cost of moving from src cell to the goal using the Manhattan distance heuristic.
+    def is_inside(self, r, c):
+        """Check if a cell is inside the map.
 
         Parameters
         ----------
-        src : tuple
-            row,col of the current cell
+        r : int
+            row of the cell
+        c : int
+            col of the cell
 
         Returns
         -------
-        int
-            approximated cost of movement to the goal cell
+        bool
+            True if the cell is inside the map, False otherwise
         """
-        r0, c0 = src
-        r1, c1 = self.goal
-        return (abs(r0 - r1) + abs(c0 - c1)) * self.costHor
+        return r >= 0 and r < self.rows and c >= 0 and c < self.cols
 
-    def handle_node(self, prev, dr, dc):
-        """Generate and process a neighbor node.
+    def is_walkable(self, r, c):
+        """Check if a cell is walkable. Cells outside the map are not walkable.
 
         Parameters
         ----------
-        prev : Node
-            predecessor node in the path, potentially its parent
-        dr : int
-            row delta, used to define the row of the new node. It can be -1, 0, 1
-        dc : int
-            col delta, used to define the col of the new node. It can be -1, 0, 1
+        r : int
+            row of the cell
+        c : int
+            col of the cell
+
+        Returns
+        -------
+        bool
+            True if the cell is walkable, False otherwise
         """
-        r = prev.r + dr
-        c = prev.c + dc
+        return self.is_inside(r, c) and self.cells[self.cell_index(r, c)] != 0
 
-        # out of bounds
-        if(r < 0 or r >= self.mapRows or c < 0 or c >= self.mapCols):
-            return
+    def set_walkable(self, r, c, walkable):
+        """Set a cell of the map as walkable or unwalkable.
 
-        # not walkable
-        if(self.map[r][c] == 0):
-            return
+        Parameters
+        ----------
+        r : int
+            row of the cell
+        c : int
+            col of the cell
+        walkable : bool
+            new state of the cell
+        """
+        if not self.is_inside(r, c):
+            raise OutOfBoundsError((r, c))
 
-        adjIdx = self.cell_index(r, c)
+        idx = self.cell_index(r, c)
 
-        # in closed list
-        if(adjIdx in self.closedMap):
-            return
+        if (self.cells[idx] != 0) != bool(walkable):
+            self.wallVersion += 1
 
-        adjG = self.cost_to_adj(dr, dc) + prev.g
-        adjH = self.cost_to_goal((r, c))
+        self.cells[idx] = 1 if walkable else 0
+        self.version += 1
 
-        # in open list
-        if(adjIdx in self.openMap):
-            old = self.openMap[adjIdx]
+    def get_cost(self, r, c):
+        """Get the terrain cost of a cell.
 
-            # new path has a better cost
-            if(old.g > adjG):
-                old.set_costs(adjG, adjH)
-                old.parent = prev
-                heapq.heapify(self.openList)
+        Parameters
+        ----------
+        r : int
+            row of the cell
+        c : int
+            col of the cell
 
-        # new node
-        else:
-            adj =  Node(r, c, adjG, adjH, prev)
-            self.add_to_open(adj, adjIdx)
+        Returns
+        -------
+        int
+            terrain cost of the cell, 0 for unwalkable cells and cells outside the map
+        """
+        if not self.is_inside(r, c):
+            return 0
 
-    def make_path(self, start, goal):
-        """Implementation of the A* search.
+        return self.cells[self.cell_index(r, c)]
+
+    def set_cost(self, r, c, cost):
+        """Set the terrain cost of a cell.
 
         Parameters
         ----------
-        start : tuple
-            row,col of the start cell
-        goal : tuple
-            row,col of the destination cell
+        r : int
+            row of the cell
+        c : int
+            col of the cell
+        cost : int
+            new terrain cost of the cell in the range [0, 255], 0 makes the cell unwalkable
+        """
+        if not self.is_inside(r, c):
+            raise OutOfBoundsError((r, c))
+
+        idx = self.cell_index(r, c)
+
+        if (self.cells[idx] != 0) != (cost != 0):
+            self.wallVersion += 1
+
+        self.cells[idx] = cost
+        self.version += 1
+
+    def is_uniform(self):
+        """Check if all the walkable cells have terrain cost 1.
+
+        Returns
+        -------
+        bool
+            True if the map has no terrain costs, False otherwise
+        """
+        if(self.uniformVersion != self.version):
+            # a regular expression works on any buffer, including memory-mapped files
+            self.uniform = NOT_UNIFORM_PATTERN.search(self.cells) == None
+            self.uniformVersion = self.version
+
+        return self.uniform
+
+    def sub_grid(self, r0, c0, rows, cols):
+        """Create a new Grid with a copy of a rectangular area of this one.
+
+        Parameters
+        ----------
+        r0 : int
+            first row of the area
+        c0 : int
+            first col of the area
+        rows : int
+            number of rows of the area
+        cols : int
+            number of cols of the area
+
+        Returns
+        -------
+        Grid
+            a Grid of rows x cols cells, cell (0, 0) is cell (r0, c0) of this Grid
+        """
+        grid = Grid(rows, cols, bytearray(Grid.buffer_size(rows, cols)))
+
+        for r in range(rows):
+            src = self.cell_index(r0 + r, c0)
+            dst = grid.cell_index(r, 0)
+            grid.cells[dst:dst + cols] = self.cells[src:src + cols]
+
+        return grid
+
+    def to_list(self):
+        """Convert the grid to a list of rows made of 0 for unwalkable cells and the terrain costs of walkable cells.
 
         Returns
         -------
         list
-            all the (row, col) tuples making the path. First tuple is start and last one is goal.
+            list containing sub-lists reprenting the rows of the map
         """
-        r0, c0 = start
-        r1, c1 = goal
+        map = []
 
-        # start out of bounds
-        if(r0 < 0 or r0 >= self.mapRows or c0 < 0 or c0 >= self.mapCols):
-            raise OutOfBoundsError(start)
+        for r in range(self.rows):
+            i = self.cell_index(r, 0)
+            map.append(list(self.cells[i:i + self.cols]))
 
-        # goal out of bounds
-        if(r1 < 0 or r1 >= self.mapRows or c1 < 0 or c1 >= self.mapCols):
-            raise OutOfBoundsError(goal)
+        return map
 
-        # start is unwalkable
-        if(self.map[r0][c0] == 0):
-            raise UnwalkableError(start)
+class Components:
+    """Labels of the connected components of the walkable cells of a Grid.
 
-        # goal is unwalkable
-        if(self.map[r1][c1] == 0):
-            raise UnwalkableError(goal)
+    Two cells have the same label if and only if a path exists between them.
+    Labels are computed joining the runs of walkable cells of each row with the runs
+    of the previous row they touch, so the work done in Python is proportional to the
+    number of runs and not to the number of cells.
 
-        # start == goal
-        if(start == goal):
-            raise SameStartGoalError(start)
+    The cells of a lazy Grid are not labelled, because that would load the whole map,
+    and any two cells are considered connected.
 
-        self.goal = goal
+    The labels are not updated when the map changes, see Pathfinder.connected.
+    """
 
-        self.openList = []
-        self.openMap.clear()
-        self.closedMap.clear()
+    def __init__(self, grid):
+        """
+        Parameters
+        ----------
+        grid : Grid
+            the map to label
+        """
+        # changes of the terrain costs don't change the components
+        self.version = grid.wallVersion
 
-        path = []
+        if grid.lazy:
+            self.labels = None
+            self.count = 0
+            return
 
-        # add start node to the open list
-        s = Node(r0, c0, 0, self.cost_to_goal(start))
-        self.add_to_open(s, self.cell_index(r0, c0))
+        # one label per cell of the grid, 0 = unwalkable
+        self.labels = array('I', bytes(4 * len(grid.cells)))
 
-        # process nodes in the open list
-        while(len(self.openList) > 0):
-            curr = heapq.heappop(self.openList)
-            currIdx = self.cell_index(curr.r, curr.c)
-            del self.openMap[currIdx]
+        cells = grid.cells
+        runPattern = re.compile(b'[^\x00]+')
 
-            self.closedMap[currIdx] = curr
+        # runs of walkable cells as (index of first cell, index after last cell)
+        runs = []
+        # union-find forest of the runs
+        parent = []
 
-            # goal found -> generate path and return
-            if(curr.r == r1 and curr.c == c1):
-                while(curr.parent != None):
-                    path.append((curr.r, curr.c))
-                    curr = curr.parent
+        def find(i):
+            while(parent[i] != i):
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
 
-                # add start node
-                path.append((curr.r, curr.c))
+        prevFirst = 0
+        prevLast = 0
 
-                path.reverse()
+        for r in range(grid.rows):
+            rowStart = grid.cell_index(r, 0)
+            first = len(runs)
 
-                return path
+            for m in runPattern.finditer(cells, rowStart, rowStart + grid.cols):
+                s = m.start() - rowStart
+                e = m.end() - rowStart
+                i = len(runs)
+                runs.append((m.start(), m.end()))
+                parent.append(i)
 
-            # process neighbor nodes
-            self.handle_node(curr, -1, -1)
-            self.handle_node(curr, -1, 0)
-            self.handle_node(curr, -1, 1)
+                # join with the runs of the previous row touching this one, diagonals included
+                for j in range(prevFirst, prevLast):
+                    ps = runs[j][0] - rowStart + grid.stride
+                    pe = runs[j][1] - rowStart + grid.stride
 
-            self.handle_node(curr, 0, -1)
-            self.handle_node(curr, 0, 1)
+                    if(pe < s):
+                        prevFirst = j + 1
+                        continue
 
-            self.handle_node(curr, 1, -1)
-            self.handle_node(curr, 1, 0)
-            self.handle_node(curr, 1, 1)
+                    if(ps > e):
+                        break
 
-        return path
+                    parent[find(j)] = find(i)
+
+            prevFirst = first
+            prevLast = len(runs)
+
+        # assign consecutive labels to the roots
+        rootLabels = dict()
+        self.count = 0
+
+        for i in range(len(runs)):
+            root = find(i)
+            label = rootLabels.get(root)
+
+            if label == None:
+                self.count += 1
+                label = self.count
+                rootLabels[root] = label
+
+            s, e = runs[i]
+            self.labels[s:e] = array('I', [label]) * (e - s)
+
+    def connected(self, idx0, idx1):
+        """Check if a path exists between two walkable cells.
+
+        Parameters
+        ----------
+        idx0 : int
+            unique index of the first cell
+        idx1 : int
+            unique index of the second cell
+
+        Returns
+        -------
+        bool
+            True if the cells are in the same component, False otherwise.
+            Cells made walkable after the labelling have no component.
+        """
+        if self.labels == None:
+            return True
+
+        label = self.labels[idx0]
+
+        return label != 0 and label == self.labels[idx1]
+
+class Node:
+    """Data used by a Pathfinder to represent a single walkable cell."""
+
+    def __init__(self, r, c, g = 0, h = 0, parent = None):
+        """
+        Parameters
+        ----------
+        r : int
+            row of the cell
+        c : int
+            col of the cell
+        g : int
+            cost of path to this node
+        h : int
+            estimated cost from this node to goal
+        parent : Node
+            previous Node in the path
+        """
+        self.r = r
+        self.c = c
+
+        self.f = g + h
+        self.g = g
+        self.h = h
+
+        self.parent = parent
+
+    def set_costs(self, g, h):
+        """Set G and H costs and compute F from them.
+
+        Parameters
+        ----------
+        g : int
+            cost of path to this node
+        h : int
+            estimated cost from this node to goal
+        """
+        self.f = g + h
+        self.g = g
+        self.h = h
+
+    def __lt__(self, other):
+        """Operator < required by heapq."""
+        return self.f < other.f
+
+class HeapifyOpenList:
+    """Open list implemented as a heap which is rebuilt every time a key is decreased.
+
+    Decreasing a key costs O(n), this is the original implementation of the open list.
+    """
+
+    def __init__(self, size):
+        """
+        Parameters
+        ----------
+        size : int
+            number of cells of the map, including the border of the grid
+        """
+        self.heap = []
+        self.entries = dict()
+
+    def __len__(self):
+        return len(self.heap)
+
+    def clear(self):
+        """Remove all the cells from the open list."""
+        self.heap.clear()
+        self.entries.clear()
+
+    def push(self, idx, f):
+        """Add a cell to the open list.
+
+        Parameters
+        ----------
+        idx : int
+            unique index of the cell in the map
+        f : int
+            key of the cell, the F cost of its node
+        """
+        entry = [f, idx]
+        heapq.heappush(self.heap, entry)
+        self.entries[idx] = entry
+
+    def pop(self):
+        """Remove the cell with the lowest key from the open list.
+
+        Returns
+        -------
+        int
+            unique index of the cell in the map
+        """
+        f, idx = heapq.heappop(self.heap)
+        del self.entries[idx]
+        return idx
+
+    def decrease_key(self, idx, f):
+        """Lower the key of a cell which is already in the open list.
+
+        Parameters
+        ----------
+        idx : int
+            unique index of the cell in the map
+        f : int
+            new key of the cell
+        """
+        self.entries[idx][0] = f
+        heapq.heapify(self.heap)
+
+    def min_key(self):
+        """Get the lowest key in the open list, which must not be empty.
+
+        Returns
+        -------
+        int
+            key of the cell that pop would return
+        """
+        return self.heap[0][0]
+
+class LazyOpenList:
+    """Open list implemented as a heap with lazy deletion.
+
+    Decreasing a key pushes a new entry, the old one becomes stale and it is skipped when popped.
+    """
+
+    def __init__(self, size):
+        """
+        Parameters
+        ----------
+        size : int
+            number of cells of the map, including the border of the grid
+        """
+        self.heap = []
+        self.keys = dict()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def clear(self):
+        """Remove all the cells from the open list."""
+        self.heap.clear()
+        self.keys.clear()
+
+    def push(self, idx, f):
+        """Add a cell to the open list.
+
+        Parameters
+        ----------
+        idx : int
+            unique index of the cell in the map
+        f : int
+            key of the cell, the F cost of its node
+        """
+        heapq.heappush(self.heap, (f, idx))
+        self.keys[idx] = f
+
+    def pop(self):
+        """Remove the cell with the lowest key from the open list.
+
+        Returns
+        -------
+        int
+            unique index of the cell in the map
+        """
+        while True:
+            f, idx = heapq.heappop(self.heap)
+
+            # skip stale entries
+            if self.keys.get(idx) == f:
+                del self.keys[idx]
+                return idx
+
+    def decrease_key(self, idx, f):
+        """Lower the key of a cell which is already in the open list.
+
+        Parameters
+        ----------
+        idx : int
+            unique index of the cell in the map
+        f : int
+            new key of the cell
+        """
+        self.push(idx, f)
+
+    def min_key(self):
+        """Get the lowest key in the open list, which must not be empty.
+
+        Returns
+        -------
+        int
+            key of the cell that pop would return
+        """
+        heap = self.heap
+
+        # drop stale entries from the top of the heap
+        while(self.keys.get(heap[0][1]) != heap[0][0]):
+            heapq.heappop(heap)
+
+        return heap[0][0]
+
+class IndexedOpenList:
+    """Open list implemented as a binary heap which knows the position of every cell.
+
+    Decreasing a key moves the cell up in the heap, which costs O(log n).
+    """
+
+    def __init__(self, size):
+        """
+        Parameters
+        ----------
+        size : int
+            number of cells of the map, including the border of the grid
+        """
+        self.keys = []
+        self.items = []
+        # position of every cell in the heap, -1 when not in the open list
+        self.pos = array('l', [-1]) * size
+
+    def __len__(self):
+        return len(self.items)
+
+    def clear(self):
+        """Remove all the cells from the open list."""
+        for idx in self.items:
+            self.pos[idx] = -1
+
+        self.keys.clear()
+        self.items.clear()
+
+    def push(self, idx, f):
+        """Add a cell to the open list.
+
+        Parameters
+        ----------
+        idx : int
+            unique index of the cell in the map
+        f : int
+            key of the cell, the F cost of its node
+        """
+        self.keys.append(f)
+        self.items.append(idx)
+        self.sift_up(len(self.items) - 1)
+
+    def pop(self):
+        """Remove the cell with the lowest key from the open list.
+
+        Returns
+        -------
+        int
+            unique index of the cell in the map
+        """
+        items = self.items
+        keys = self.keys
+
+        top = items[0]
+        self.pos[top] = -1
+
+        lastIdx = items.pop()
+        lastF = keys.pop()
+
+        if(len(items) > 0):
+            items[0] = lastIdx
+            keys[0] = lastF
+            self.sift_down(0)
+
+        return top
+
+    def decrease_key(self, idx, f):
+        """Lower the key of a cell which is already in the open list.
+
+        Parameters
+        ----------
+        idx : int
+            unique index of the cell in the map
+        f : int
+            new key of the cell
+        """
+        i = self.pos[idx]
+        self.keys[i] = f
+        self.sift_up(i)
+
+    def min_key(self):
+        """Get the lowest key in the open list, which must not be empty.
+
+        Returns
+        -------
+        int
+            key of the cell that pop would return
+        """
+        return self.keys[0]
+
+    def sift_up(self, i):
+        """Move the entry at position i up until its parent has a lower or equal key.
+
+        Parameters
+        ----------
+        i : int
+            position in the heap
+        """
+        keys = self.keys
+        items = self.items
+        pos = self.pos
+
+        f = keys[i]
+        idx = items[i]
+
+        while(i > 0):
+            parent = (i - 1) >> 1
+
+            if(keys[parent] <= f):
+                break
+
+            keys[i] = keys[parent]
+            items[i] = items[parent]
+            pos[items[i]] = i
+            i = parent
+
+        keys[i] = f
+        items[i] = idx
+        pos[idx] = i
+
+    def sift_down(self, i):
+        """Move the entry at position i down until its children have a greater or equal key.
+
+        Parameters
+        ----------
+        i : int
+            position in the heap
+        """
+        keys = self.keys
+        items = self.items
+        pos = self.pos
+        n = len(items)
+
+        f = keys[i]
+        idx = items[i]
+
+        while True:
+            child = 2 * i + 1
+
+            if(child >= n):
+                break
+
+            if(child + 1 < n and keys[child + 1] < keys[child]):
+                child += 1
+
+            if(keys[child] >= f):
+                break
+
+            keys[i] = keys[child]
+            items[i] = items[child]
+            pos[items[i]] = i
+            i = child
+
+        keys[i] = f
+        items[i] = idx
+        pos[idx] = i
+
+class BucketOpenList:
+    """Open list implemented as a bucket queue (Dial's algorithm), for integer keys.
+
+    There is one bucket for every key and a cursor on the lowest key that can be in the list.
+    With a consistent heuristic keys never go below the cursor, so both push and pop are O(1)
+    plus the scan of the empty keys between two pops. Decreasing a key appends the cell to
+    a new bucket and the old entry becomes stale, like in LazyOpenList.
+    Keys are rounded down to integers, so the order is exact only with integer keys.
+    """
+
+    def __init__(self, size):
+        """
+        Parameters
+        ----------
+        size : int
+            number of cells of the map, including the border of the grid
+        """
+        self.buckets = dict()
+        self.keys = dict()
+        self.cursor = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def clear(self):
+        """Remove all the cells from the open list."""
+        self.buckets.clear()
+        self.keys.clear()
+        self.cursor = 0
+
+    def push(self, idx, f):
+        """Add a cell to the open list.
+
+        Parameters
+        ----------
+        idx : int
+            unique index of the cell in the map
+        f : int
+            key of the cell, the F cost of its node
+        """
+        f = int(f)
+        bucket = self.buckets.get(f)
+
+        if bucket == None:
+            self.buckets[f] = [idx]
+        else:
+            bucket.append(idx)
+
+        self.keys[idx] = f
+
+        # first cell or key lower than the cursor, possible with inconsistent heuristics
+        if(f < self.cursor or len(self.keys) == 1):
+            self.cursor = f
+
+    def pop(self):
+        """Remove the cell with the lowest key from the open list.
+
+        Returns
+        -------
+        int
+            unique index of the cell in the map
+        """
+        buckets = self.buckets
+        keys = self.keys
+        f = self.cursor
+
+        while True:
+            bucket = buckets.get(f)
+
+            if bucket:
+                idx = bucket.pop()
+
+                # skip stale entries
+                if keys.get(idx) == f:
+                    del keys[idx]
+                    self.cursor = f
+                    return idx
+
+            else:
+                if bucket != None:
+                    del buckets[f]
+
+                f += 1
+
+    def decrease_key(self, idx, f):
+        """Lower the key of a cell which is already in the open list.
+
+        Parameters
+        ----------
+        idx : int
+            unique index of the cell in the map
+        f : int
+            new key of the cell
+        """
+        self.push(idx, f)
+
+    def min_key(self):
+        """Get the lowest key in the open list, which must not be empty.
+
+        Returns
+        -------
+        int
+            key of the cell that pop would return
+        """
+        buckets = self.buckets
+        keys = self.keys
+        f = self.cursor
+
+        while True:
+            bucket = buckets.get(f)
+
+            # drop stale entries from the end of the bucket
+            while(bucket and keys.get(bucket[-1]) != f):
+                bucket.pop()
+
+            if bucket:
+                self.cursor = f
+                return f
+
+            f += 1
+
+class SearchState:
+    """Search data of all the cells of a map stored in preallocated arrays.
+
+    The arrays are reset in O(1) at the beginning of every search by moving to a new generation:
+    a cell is open when its stamp is equal to the generation and closed when it's equal to the generation + 1,
+    any other value means the cell has not been reached by the current search yet.
+    """
+
+    def __init__(self, size):
+        """
+        Parameters
+        ----------
+        size : int
+            number of cells of the map, including the border of the grid
+        """
+        self.g = array('d', bytes(8 * size))
+        self.parent = array('l', [-1]) * size
+        self.stamp = array('L', [0]) * size
+        self.gen = 0
+        self.maxGen = (1 << (self.stamp.itemsize * 8)) - 2
+
+    def begin(self):
+        """Start a new search, invalidating the data of the previous one.
+
+        Returns
+        -------
+        int
+            the generation of the new search
+        """
+        self.gen += 2
+
+        # counter overflow -> actually clear the stamps
+        if(self.gen > self.maxGen):
+            self.stamp = array('L', [0]) * len(self.stamp)
+            self.gen = 2
+
+        return self.gen
+
+def manhattan(src, goal, costHor, costDia):
+    """Manhattan distance heuristic. It overestimates the cost when diagonal moves are allowed.
+
+    Parameters
+    ----------
+    src : tuple
+        row,col of the current cell
+    goal : tuple
+        row,col of the goal cell
+    costHor : int
+        cost of a horizontal or vertical move
+    costDia : int
+        cost of a diagonal move
+
+    Returns
+    -------
+    int
+        approximated cost of movement to the goal cell
+    """
+    return (abs(src[0] - goal[0]) + abs(src[1] - goal[1])) * costHor
+
+def octile(src, goal, costHor, costDia):
+    """Octile distance heuristic, the exact cost of the path when there are no obstacles.
+
+    Parameters
+    ----------
+    src : tuple
+        row,col of the current cell
+    goal : tuple
+        row,col of the goal cell
+    costHor : int
+        cost of a horizontal or vertical move
+    costDia : int
+        cost of a diagonal move
+
+    Returns
+    -------
+    int
+        approximated cost of movement to the goal cell
+    """
+    dr = abs(src[0] - goal[0])
+    dc = abs(src[1] - goal[1])
+
+    if(dr < dc):
+        return dr * costDia + (dc - dr) * costHor
+    else:
+        return dc * costDia + (dr - dc) * costHor
+
+def chebyshev(src, goal, costHor, costDia):
+    """Chebyshev distance heuristic, every move costs costHor.
+
+    Parameters
+    ----------
+    src : tuple
+        row,col of the current cell
+    goal : tuple
+        row,col of the goal cell
+    costHor : int
+        cost of a horizontal or vertical move
+    costDia : int
+        cost of a diagonal move
+
+    Returns
+    -------
+    int
+        approximated cost of movement to the goal cell
+    """
+    return max(abs(src[0] - goal[0]), abs(src[1] - goal[1])) * costHor
+
+def euclidean(src, goal, costHor, costDia):
+    """Euclidean distance heuristic. It overestimates the cost when costDia is lower than costHor * sqrt(2).
+
+    Parameters
+    ----------
+    src : tuple
+        row,col of the current cell
+    goal : tuple
+        row,col of the goal cell
+    costHor : int
+        cost of a horizontal or vertical move
+    costDia : int
+        cost of a diagonal move
+
+    Returns
+    -------
+    float
+        approximated cost of movement to the goal cell
+    """
+    return math.hypot(src[0] - goal[0], src[1] - goal[1]) * costHor
+
+def zero(src, goal, costHor, costDia):
+    """Null heuristic, which turns the A* search into Dijkstra's algorithm.
+
+    Parameters
+    ----------
+    src : tuple
+        row,col of the current cell
+    goal : tuple
+        row,col of the goal cell
+    costHor : int
+        cost of a horizontal or vertical move
+    costDia : int
+        cost of a diagonal move
+
+    Returns
+    -------
+    int
+        always 0
+    """
+    return 0
+
+# available heuristics
+# heuristics which always return integers when costs are integers
+INTEGER_HEURISTICS = (manhattan, octile, chebyshev, zero)
+
+HEURISTICS = { "manhattan" : manhattan,
+               "octile" : octile,
+               "chebyshev" : chebyshev,
+               "euclidean" : euclidean,
+               "zero" : zero }
+
+class PathCache:
+    """Bounded cache of paths with LRU eviction.
+
+    Paths are stored for a specific version of the map and the whole cache is cleared
+    when a different version is used. A path from A to B is also used, reversed,
+    for the query from B to A. The cache can be used by many threads at the same time.
+    """
+
+    def __init__(self, maxEntries = 1024, maxCells = 0):
+        """
+        Parameters
+        ----------
+        maxEntries : int
+            maximum number of paths stored
+        maxCells : int
+            maximum number of cells stored in all the paths, which bounds the memory used.
+            0 means no limit.
+        """
+        self.maxEntries = maxEntries
+        self.maxCells = maxCells
+
+        self.entries = OrderedDict()
+        self.numCells = 0
+        self.version = None
+
+        self.hits = 0
+        self.misses = 0
+
+        # reentrant because get and put call clear
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        """Remove all the paths from the cache."""
+        with self.lock:
+            self.entries.clear()
+            self.numCells = 0
+
+    def get(self, start, goal, version):
+        """Get the path between two cells.
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the start cell
+        goal : tuple
+            row,col of the destination cell
+        version : int
+            version of the map
+
+        Returns
+        -------
+        list
+            a copy of the path, or None if the cache doesn't contain it
+        """
+        with self.lock:
+            if(version != self.version):
+                self.clear()
+                self.version = version
+
+            path = self.entries.get((start, goal))
+
+            if path != None:
+                self.entries.move_to_end((start, goal))
+                self.hits += 1
+                return list(path)
+
+            # same path in the other direction
+            path = self.entries.get((goal, start))
+
+            if path != None:
+                self.entries.move_to_end((goal, start))
+                self.hits += 1
+                return list(reversed(path))
+
+            self.misses += 1
+            return None
+
+    def put(self, start, goal, version, path):
+        """Store the path between two cells, evicting the least recently used paths when full.
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the start cell
+        goal : tuple
+            row,col of the destination cell
+        version : int
+            version of the map
+        path : list
+            the (row, col) tuples making the path
+        """
+        with self.lock:
+            if(version != self.version):
+                self.clear()
+                self.version = version
+
+            # path too big for the cache
+            if(self.maxEntries == 0 or (self.maxCells > 0 and len(path) > self.maxCells)):
+                return
+
+            key = (start, goal)
+
+            if key in self.entries:
+                self.numCells -= len(self.entries.pop(key))
+
+            self.entries[key] = tuple(path)
+            self.numCells += len(path)
+
+            while(len(self.entries) > self.maxEntries or (self.maxCells > 0 and self.numCells > self.maxCells)):
+                key, old = self.entries.popitem(last = False)
+                self.numCells -= len(old)
+
+# available search engines
+ENGINES = ("astar", "jps", "bidirectional", "sma")
+
+# default number of cells kept in memory by the "sma" engine
+DEFAULT_MEMORY_LIMIT = 1 << 20
+# default maximum number of expansions of the "sma" engine for every cell of its memory limit
+DEFAULT_EXPANSION_FACTOR = 1024
+
+# available implementations of the open list
+OPEN_LISTS = { "heapify" : HeapifyOpenList,
+               "lazy" : LazyOpenList,
+               "indexed" : IndexedOpenList,
+               "bucket" : BucketOpenList }
+
+class SearchStats:
+    """Counters of the work done by the searches of a thread, collected when enabled with Pathfinder.set_stats.
+
+    The counters add up the searches until reset is called.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Set all the counters to zero."""
+        # cells taken from the open list
+        self.expansions = 0
+        # cells added to the open list
+        self.pushes = 0
+        # keys lowered, every one is a heapify with the "heapify" open list
+        self.decreaseKeys = 0
+        # cells added to the open list again after they were expanded
+        self.reopenings = 0
+        # highest number of cells in an open list
+        self.maxOpen = 0
+        # cells forgotten by the "sma" engine to stay within its memory limit
+        self.pruned = 0
+        # number of queries made with make_path
+        self.queries = 0
+        # seconds spent in every phase of make_path: "check", "cache" and "search"
+        self.times = { "check" : 0.0, "cache" : 0.0, "search" : 0.0 }
+
+    def as_dict(self):
+        """Get all the counters.
+
+        Returns
+        -------
+        dict
+            the counters indexed by name, times included
+        """
+        data = { "queries" : self.queries,
+                 "expansions" : self.expansions,
+                 "pushes" : self.pushes,
+                 "decreaseKeys" : self.decreaseKeys,
+                 "reopenings" : self.reopenings,
+                 "maxOpen" : self.maxOpen,
+                 "pruned" : self.pruned }
+
+        for phase, seconds in self.times.items():
+            data["time" + phase.capitalize()] = seconds
+
+        return data
+
+    def __str__(self):
+        times = " - ".join("{} {:.3f} ms".format(phase, seconds * 1000) for phase, seconds in self.times.items())
+
+        return ("expanded {} - pushed {} - decreased keys {} - reopened {} - max open {} - pruned {}\ntime: {}"
+                .format(self.expansions, self.pushes, self.decreaseKeys, self.reopenings, self.maxOpen, self.pruned, times))
+
+class CountingOpenList:
+    """Open list which counts the operations done on another open list in a SearchStats.
+
+    Searches use it in place of the open list only when the statistics are enabled,
+    so they cost nothing when disabled.
+    """
+
+    def __init__(self, openList, stats):
+        """
+        Parameters
+        ----------
+        openList : object
+            the open list, an instance of one of the values of OPEN_LISTS
+        stats : SearchStats
+            the counters to update
+        """
+        self.openList = openList
+        self.stats = stats
+        # cells expanded since the last clear
+        self.expanded = set()
+
+    def __len__(self):
+        return len(self.openList)
+
+    def clear(self):
+        """Remove all the cells from the open list."""
+        self.openList.clear()
+        self.expanded.clear()
+
+    def push(self, idx, f):
+        """Add a cell to the open list.
+
+        Parameters
+        ----------
+        idx : int
+            unique index of the cell in the map
+        f : int
+            key of the cell, the F cost of its node
+        """
+        stats = self.stats
+        stats.pushes += 1
+
+        if idx in self.expanded:
+            stats.reopenings += 1
+
+        self.openList.push(idx, f)
+
+        if len(self.openList) > stats.maxOpen:
+            stats.maxOpen = len(self.openList)
+
+    def pop(self):
+        """Remove the cell with the lowest key from the open list.
+
+        Returns
+        -------
+        int
+            unique index of the cell in the map
+        """
+        idx = self.openList.pop()
+        self.expanded.add(idx)
+        return idx
+
+    def decrease_key(self, idx, f):
+        """Lower the key of a cell which is already in the open list.
+
+        Parameters
+        ----------
+        idx : int
+            unique index of the cell in the map
+        f : int
+            new key of the cell
+        """
+        self.stats.decreaseKeys += 1
+        self.openList.decrease_key(idx, f)
+
+    def min_key(self):
+        """Get the lowest key in the open list, which must not be empty.
+
+        Returns
+        -------
+        int
+            key of the cell that pop would return
+        """
+        return self.openList.min_key()
+
+class SearchContext:
+    """Data used by the searches of one thread.
+
+    A Pathfinder creates a SearchContext for every thread that calls it, so many threads
+    can search the same map at the same time without copying it.
+    """
+
+    def __init__(self, size, openListClass, searchStateType, stats = False):
+        """
+        Parameters
+        ----------
+        size : int
+            number of cells of the map, including the border of the grid
+        openListClass : class
+            one of the values of OPEN_LISTS
+        searchStateType : str
+            "nodes" or "arrays", as in Pathfinder.set_search_state
+        stats : bool
+            when True the work of the searches is counted in a SearchStats
+        """
+        # counters of the searches, None when disabled
+        self.stats = SearchStats() if stats else None
+
+        self.openList = self.new_open_list(openListClass, size)
+        # open list of the backward search, created by the first bidirectional search
+        self.openListBack = None
+        self.openMap = dict()
+        self.closedMap = dict()
+        self.goal = ()
+        # True when the map of the current search has no terrain costs
+        self.uniform = True
+        # number of cells expanded by the last search
+        self.expansions = 0
+        # cells forgotten by the last search of the "sma" engine
+        self.pruned = 0
+        # True when the last search of the "sma" engine stopped because of its expansion limit
+        self.exhausted = False
+
+        if searchStateType == "arrays" and size > 0:
+            self.searchState = SearchState(size)
+        else:
+            self.searchState = None
+
+    def new_open_list(self, openListClass, size):
+        """Create an open list, which counts its operations when the statistics are enabled.
+
+        Parameters
+        ----------
+        openListClass : class
+            one of the values of OPEN_LISTS
+        size : int
+            number of cells of the map, including the border of the grid
+
+        Returns
+        -------
+        object
+            the new open list
+        """
+        if self.stats != None:
+            return CountingOpenList(openListClass(size), self.stats)
+
+        return openListClass(size)
+
+class Pathfinder:
+    """Pathfinder that implements the A* search in a map.
+
+    The map and the settings are shared, while the data of a search is kept in a SearchContext
+    for every thread. Many threads can call make_path and make_paths at the same time,
+    but the settings and the cells of the map must not be changed while they do.
+    """
+
+    def __init__(self, map = None):
+        """
+        Parameters
+        ----------
+        map : Grid or list
+            the map, or a list containing sub-lists reprenting the rows of the map
+        """
+        self.engine = "astar"
+        self.openListType = "auto"
+        self.searchStateType = "nodes"
+        self.cache = None
+        self.costHor = 10
+        self.costDia = 14
+        self.statsEnabled = False
+        self.queryHook = None
+        self.memoryLimit = DEFAULT_MEMORY_LIMIT
+        self.expansionLimit = DEFAULT_EXPANSION_FACTOR * DEFAULT_MEMORY_LIMIT
+
+        # search contexts of the threads, recreated when the version changes
+        self.contexts = threading.local()
+        self.contextVersion = 0
+
+        self.set_heuristic("octile")
+        self.set_map(map)
+
+    def set_map(self, map):
+        """Set the map to search.
+
+        Parameters
+        ----------
+        map : Grid or list
+            the map, or a list containing sub-lists reprenting the rows of the map.
+            A list is converted to a Grid and not kept.
+        """
+        if map != None and not isinstance(map, Grid):
+            map = Grid.from_list(map)
+
+        self.map = map
+
+        if self.cache != None:
+            self.cache.clear()
+
+        if map != None:
+            self.mapRows = map.rows
+            self.mapCols = map.cols
+            self.mapStride = map.stride
+            self.components = Components(map)
+        else:
+            self.mapRows = 0
+            self.mapCols = 0
+            self.mapStride = 0
+            self.components = None
+
+        self.set_open_list(self.openListType)
+        self.set_search_state(self.searchStateType)
+
+    def set_open_list(self, openListType):
+        """Set the implementation of the open list used by the search.
+
+        Parameters
+        ----------
+        openListType : str
+            one of the keys of OPEN_LISTS: "heapify", "lazy", "indexed" or "bucket",
+            or "auto" to use "bucket" when all the keys are integers and "lazy" otherwise
+        """
+        if openListType != "auto" and openListType not in OPEN_LISTS:
+            raise ValueError("Unknown open list: {}".format(openListType))
+
+        self.openListType = openListType
+        self.contextVersion += 1
+
+    def set_engine(self, engine):
+        """Set the search engine used by make_path.
+
+        Parameters
+        ----------
+        engine : str
+            one of ENGINES: "astar" for the A* search,
+            "jps" for the Jump Point Search, which works only on maps without terrain costs
+            and falls back to A* on the others,
+            "bidirectional" for an A* search from both start and goal,
+            "sma" for a memory-bounded A* search (SMA*) which keeps at most the cells
+            set with set_memory_limit
+        """
+        if engine not in ENGINES:
+            raise ValueError("Unknown engine: {}".format(engine))
+
+        self.engine = engine
+
+        if self.cache != None:
+            self.cache.clear()
+
+    def set_memory_limit(self, maxNodes, maxExpansions = 0):
+        """Set the maximum number of cells kept in memory by the "sma" engine.
+
+        The search behaves like A* until the limit is reached, then it forgets the cells less
+        likely to lead to the goal and searches them again when needed, see search_sma.
+        With a limit close to the length of the path the same cells can be expanded millions
+        of times, so the search also stops after maxExpansions expansions, see last_exhausted.
+
+        Parameters
+        ----------
+        maxNodes : int
+            maximum number of cells, at least 2. A search uses at most 8 cells more than this,
+            the ones generated by the last expansion.
+        maxExpansions : int
+            maximum number of cells expanded by a search, 0 means DEFAULT_EXPANSION_FACTOR * maxNodes
+        """
+        if maxNodes < 2:
+            raise ValueError("Memory limit too low: {}".format(maxNodes))
+
+        if maxExpansions < 0:
+            raise ValueError("Negative expansion limit: {}".format(maxExpansions))
+
+        self.memoryLimit = maxNodes
+        self.expansionLimit = maxExpansions if maxExpansions > 0 else DEFAULT_EXPANSION_FACTOR * maxNodes
+
+        if self.cache != None:
+            self.cache.clear()
+
+    def set_heuristic(self, heuristic, weight = 1):
+        """Set the heuristic used to estimate the cost to the goal.
+
+        With the default weight of 1 and an admissible heuristic ("octile", "chebyshev", "zero")
+        the search finds optimal paths. With a weight w greater than 1 the search is a weighted A*,
+        which expands fewer nodes and finds paths that cost at most w times the optimal one.
+
+        Parameters
+        ----------
+        heuristic : str or callable
+            one of the keys of HEURISTICS or a function with the same parameters of octile
+        weight : float
+            factor multiplied by the heuristic
+        """
+        if isinstance(heuristic, str):
+            if heuristic not in HEURISTICS:
+                raise ValueError("Unknown heuristic: {}".format(heuristic))
+
+            heuristic = HEURISTICS[heuristic]
+
+        if weight < 0:
+            raise ValueError("Negative heuristic weight: {}".format(weight))
+
+        self.heuristic = heuristic
+        self.weight = weight
+
+        # the automatic open list depends on the heuristic
+        self.contextVersion += 1
+
+        # cached paths could be not optimal for the new heuristic
+        if self.cache != None:
+            self.cache.clear()
+
+    def set_cache(self, maxEntries, maxCells = 0):
+        """Enable a cache of the paths returned by make_path.
+
+        The cache is cleared when the map, the engine, the heuristic or the memory limit are changed
+        and when the cells of the map are changed with Grid.set_walkable or Grid.set_cost,
+        because any change of Grid.version invalidates the cached paths.
+
+        Parameters
+        ----------
+        maxEntries : int
+            maximum number of paths stored, 0 disables the cache
+        maxCells : int
+            maximum number of cells stored in all the paths, 0 means no limit
+        """
+        if maxEntries > 0:
+            self.cache = PathCache(maxEntries, maxCells)
+        else:
+            self.cache = None
+
+    def set_search_state(self, searchStateType):
+        """Set how the data of the search is stored.
+
+        Parameters
+        ----------
+        searchStateType : str
+            "nodes" to create a Node for every cell reached by a search,
+            "arrays" to use a SearchState allocated once for the map and reused by all searches
+        """
+        if searchStateType not in ("nodes", "arrays"):
+            raise ValueError("Unknown search state: {}".format(searchStateType))
+
+        self.searchStateType = searchStateType
+        self.contextVersion += 1
+
+    def set_stats(self, enabled):
+        """Enable or disable the statistics of the searches, see stats.
+
+        Parameters
+        ----------
+        enabled : bool
+            True to count the work done by the searches, False to search at full speed
+        """
+        self.statsEnabled = enabled
+        self.contextVersion += 1
+
+    def stats(self):
+        """Get the statistics of the searches of the calling thread.
+
+        The counters are kept until SearchStats.reset is called, or until the settings
+        of the Pathfinder are changed.
+
+        Returns
+        -------
+        SearchStats
+            the counters of the searches of the calling thread, None when the statistics are disabled
+        """
+        return self.context().stats
+
+    def set_query_hook(self, hook):
+        """Set a function wrapping every call to make_path, like the profilers of profiling.py.
+
+        Parameters
+        ----------
+        hook : callable
+            called with start and goal of every query, it returns a context manager entered
+            while the path is searched. None removes the hook.
+        """
+        self.queryHook = hook
+
+    def context(self):
+        """Get the SearchContext of the calling thread, creating it when needed.
+
+        Returns
+        -------
+        SearchContext
+            the data of the searches of the thread, valid for the current map and settings
+        """
+        contexts = self.contexts
+
+        # first search of the thread or map changed
+        if(getattr(contexts, "version", -1) != self.contextVersion):
+            size = len(self.map.cells) if self.map != None else 0
+            contexts.ctx = SearchContext(size, self.open_list_class(), self.searchStateType, self.statsEnabled)
+            contexts.version = self.contextVersion
+
+        return contexts.ctx
+
+    def open_list_class(self):
+        """Get the implementation of the open list, choosing it when the type is "auto".
+
+        Returns
+        -------
+        class
+            one of the values of OPEN_LISTS
+        """
+        if self.openListType != "auto":
+            return OPEN_LISTS[self.openListType]
+
+        # F costs are integers -> bucket queue
+        if(isinstance(self.costHor, int) and isinstance(self.costDia, int) and float(self.weight).is_integer() and
+           (self.heuristic in INTEGER_HEURISTICS or getattr(self.heuristic, "integer", False))):
+            return BucketOpenList
+
+        return LazyOpenList
+
+    def add_to_open(self, ctx, node, idx):
+        """Add a node to the open list.
+
+        Parameters
+        ----------
+        ctx : SearchContext
+            data of the current search
+        node : Node
+            node to add to the open list
+        idx : int
+            unique index of the node in the map
+        """
+        ctx.openList.push(idx, node.f)
+        ctx.openMap[idx] = node
+
+    def cell_index(self, r, c):
+        """Get the index of a cell from its row and col.
+
+        Parameters
+        ----------
+        r : int
+            row of the cell
+        c : int
+            col of the cell
+
+        Returns
+        -------
+        int
+            an unique index identifying one cell of the map
+        """
+        return (r + 1) * self.mapStride + c + 1
+
+    def cost_to_adj(self, dr, dc):
+        """Compute the cost of moving to an adjacent cell.
+
+        Parameters
+        ----------
+        dr : int
+            row delta, it can be -1, 0, 1
+        dc : int
+            col delta, it can be -1, 0, 1
+
+        Returns
+        -------
+        int
+            cost of movement to the next cell
+        """
+        # if both deltas are 1 it's a diagonal cell
+        if dr != 0 and dc != 0:
+            return self.costDia
+        else:
+            return self.costHor
+
+    def cost_to_goal(self, src):
+        """Compute the approximated cost of moving from src cell to the goal using the heuristic of the Pathfinder.
+
+        Parameters
+        ----------
+        src : tuple
+            row,col of the current cell
+
+        Returns
+        -------
+        int
+            approximated cost of movement to the goal cell, multiplied by the weight
+        """
+        return self.cost_estimate(src, self.context().goal)
+
+    def cost_estimate(self, src, dst):
+        """Compute the approximated cost of moving from src cell to dst cell using the heuristic of the Pathfinder.
+
+        Parameters
+        ----------
+        src : tuple
+            row,col of the current cell
+        dst : tuple
+            row,col of the destination cell
+
+        Returns
+        -------
+        int
+            approximated cost of movement to dst, multiplied by the weight
+        """
+        h = self.heuristic(src, dst, self.costHor, self.costDia)
+
+        if(self.weight != 1):
+            return h * self.weight
+
+        return h
+
+    def path_cost(self, path):
+        """Compute the cost of a path.
+
+        Parameters
+        ----------
+        path : list
+            the (row, col) tuples making the path, every cell adjacent to the previous one
+
+        Returns
+        -------
+        int
+            sum of the costs of all the moves of the path
+        """
+        cells = self.map.cells
+        cost = 0
+
+        for i in range(1, len(path)):
+            r0, c0 = path[i - 1]
+            r1, c1 = path[i]
+            terrain = cells[self.cell_index(r0, c0)] + cells[self.cell_index(r1, c1)]
+            cost += self.cost_to_adj(r1 - r0, c1 - c0) * terrain // 2
+
+        return cost
+
+    def adj_offsets(self):
+        """Get the index offsets and costs of the 8 adjacent cells.
+
+        Returns
+        -------
+        list
+            (offset, cost) tuples, the index of an adjacent cell is the index of the cell + offset
+        """
+        adjs = []
+
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                if dr != 0 or dc != 0:
+                    adjs.append((dr * self.mapStride + dc, self.cost_to_adj(dr, dc)))
+
+        return adjs
+
+    def handle_node(self, ctx, prev, dr, dc):
+        """Generate and process a neighbor node.
+
+        Parameters
+        ----------
+        ctx : SearchContext
+            data of the current search
+        prev : Node
+            predecessor node in the path, potentially its parent
+        dr : int
+            row delta, used to define the row of the new node. It can be -1, 0, 1
+        dc : int
+            col delta, used to define the col of the new node. It can be -1, 0, 1
+        """
+        r = prev.r + dr
+        c = prev.c + dc
+
+        cells = self.map.cells
+        adjIdx = (r + 1) * self.mapStride + c + 1
+        adjCell = cells[adjIdx]
+
+        # not walkable, the border of the grid makes bounds checks unnecessary
+        if(adjCell == 0):
+            return
+
+        # in closed list
+        if(adjIdx in ctx.closedMap):
+            return
+
+        cost = self.cost_to_adj(dr, dc)
+
+        # average terrain cost of the two cells, skipped when all costs are 1
+        if not ctx.uniform:
+            cost = cost * (cells[adjIdx - dr * self.mapStride - dc] + adjCell) // 2
+
+        adjG = cost + prev.g
+        adjH = self.cost_estimate((r, c), ctx.goal)
+
+        # in open list
+        if(adjIdx in ctx.openMap):
+            old = ctx.openMap[adjIdx]
+
+            # new path has a better cost
+            if(old.g > adjG):
+                old.set_costs(adjG, adjH)
+                old.parent = prev
+                ctx.openList.decrease_key(adjIdx, old.f)
+
+        # new node
+        else:
+            adj =  Node(r, c, adjG, adjH, prev)
+            self.add_to_open(ctx, adj, adjIdx)
+
+    def check_cell(self, cell):
+        """Check that a cell can be used as start or goal of a search.
+
+        Parameters
+        ----------
+        cell : tuple
+            row,col of the cell
+
+        Raises
+        ------
+        OutOfBoundsError
+            if the cell is outside the map
+        UnwalkableError
+            if the cell is unwalkable
+        """
+        r, c = cell
+
+        # out of bounds
+        if(r < 0 or r >= self.mapRows or c < 0 or c >= self.mapCols):
+            raise OutOfBoundsError(cell)
+
+        # unwalkable
+        if(self.map.cells[self.cell_index(r, c)] == 0):
+            raise UnwalkableError(cell)
+
+    def connected(self, idx0, idx1):
+        """Check if a path can exist between two walkable cells using the connected components.
+
+        The components are labelled again only when they say the cells are not connected
+        and some cells became walkable or unwalkable since the last labelling, so changing
+        the map doesn't cost a labelling of the whole map every time. A cell made unwalkable
+        can split a component, then the cells look connected and the search finds there's no path.
+
+        Parameters
+        ----------
+        idx0 : int
+            unique index of the first cell
+        idx1 : int
+            unique index of the second cell
+
+        Returns
+        -------
+        bool
+            False if there's no path between the cells, True if there could be one
+        """
+        if(self.components.connected(idx0, idx1)):
+            return True
+
+        # cells made walkable could join the components
+        if(self.components.version != self.map.wallVersion):
+            self.components = Components(self.map)
+
+            return self.components.connected(idx0, idx1)
+
+        return False
+
+    def make_path(self, start, goal):
+        """Implementation of the A* search.
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the start cell
+        goal : tuple
+            row,col of the destination cell
+
+        Returns
+        -------
+        list
+            all the (row, col) tuples making the path. First tuple is start and last one is goal.
+        """
+        if self.queryHook != None:
+            with self.queryHook(start, goal):
+                return self.query(start, goal)
+
+        return self.query(start, goal)
+
+    def query(self, start, goal):
+        """Same as make_path, without the query hook.
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the start cell
+        goal : tuple
+            row,col of the destination cell
+
+        Returns
+        -------
+        list
+            all the (row, col) tuples making the path. First tuple is start and last one is goal.
+        """
+        r0, c0 = start
+        r1, c1 = goal
+
+        ctx = self.context()
+        stats = ctx.stats
+
+        if stats != None:
+            stats.queries += 1
+            t0 = time.perf_counter()
+
+        self.check_cell(start)
+        self.check_cell(goal)
+
+        # start == goal
+        if(start == goal):
+            raise SameStartGoalError(start)
+
+        # no search when there's no path or the path is cached
+        ctx.expansions = 0
+        ctx.pruned = 0
+        ctx.exhausted = False
+
+        # start and goal in different components -> no path
+        if(not self.connected(self.cell_index(r0, c0), self.cell_index(r1, c1))):
+            if stats != None:
+                stats.times["check"] += time.perf_counter() - t0
+
+            return []
+
+        if stats != None:
+            t1 = time.perf_counter()
+            stats.times["check"] += t1 - t0
+
+        if self.cache != None:
+            path = self.cache.get(start, goal, self.map.version)
+
+            if path != None:
+                if stats != None:
+                    stats.times["cache"] += time.perf_counter() - t1
+
+                return path
+
+        if stats != None:
+            t2 = time.perf_counter()
+            stats.times["cache"] += t2 - t1
+
+        path = self.search(start, goal)
+
+        if stats != None:
+            t3 = time.perf_counter()
+            stats.times["search"] += t3 - t2
+            stats.expansions += ctx.expansions
+            stats.pruned += ctx.pruned
+
+        # a search stopped by its expansion limit could find the path with another limit
+        if self.cache != None and not ctx.exhausted:
+            self.cache.put(start, goal, self.map.version, path)
+
+            if stats != None:
+                stats.times["cache"] += time.perf_counter() - t3
+
+        return path
+
+    def last_expansions(self):
+        """Get the number of cells expanded by the last search of the calling thread.
+
+        Returns
+        -------
+        int
+            cells taken from the open list by the last call to make_path, search or make_paths,
+            jump points for the "jps" engine and 0 when make_path didn't need to search
+        """
+        return self.context().expansions
+
+    def last_pruned(self):
+        """Get the number of cells forgotten by the last search of the calling thread.
+
+        Only the "sma" engine forgets cells, when it reaches its memory limit. When it's 0 the search
+        was the same of A*, otherwise it expanded some cells again and, if the path is empty
+        but start and goal are connected, the limit was too low to reach the goal.
+
+        Returns
+        -------
+        int
+            cells removed from memory by the last call to make_path or search
+        """
+        return self.context().pruned
+
+    def last_exhausted(self):
+        """Tell if the last search of the calling thread stopped because of its expansion limit.
+
+        Only the "sma" engine has an expansion limit, set with set_memory_limit. When it's True
+        the path is empty, but a path could exist with more expansions or a higher memory limit.
+
+        Returns
+        -------
+        bool
+            True if the last call to make_path or search ran out of expansions
+        """
+        return self.context().exhausted
+
+    def search(self, start, goal):
+        """Run the search engine of the Pathfinder.
+
+        Same as make_path, but start and goal are not validated and the cache is not used.
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the start cell
+        goal : tuple
+            row,col of the destination cell
+
+        Returns
+        -------
+        list
+            all the (row, col) tuples making the path. First tuple is start and last one is goal.
+        """
+        ctx = self.context()
+        ctx.goal = goal
+        ctx.pruned = 0
+        ctx.exhausted = False
+
+        if self.engine == "sma":
+            return self.search_sma(start, goal)
+
+        # jump points are valid only when all the cells have the same cost
+        if self.engine == "jps" and self.map.is_uniform():
+            return self.search_jps(start, goal)
+
+        if self.engine == "bidirectional":
+            return self.search_bidirectional(start, goal)
+
+        if self.searchStateType == "arrays":
+            return self.search_arrays(start, goal)
+
+        return self.search_nodes(start, goal)
+
+    def search_nodes(self, start, goal):
+        """A* search creating a Node for every cell reached.
+
+        Same as make_path, but start and goal are not validated.
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the start cell
+        goal : tuple
+            row,col of the destination cell
+
+        Returns
+        -------
+        list
+            all the (row, col) tuples making the path. First tuple is start and last one is goal.
+        """
+        r0, c0 = start
+        r1, c1 = goal
+
+        ctx = self.context()
+        ctx.goal = goal
+        ctx.uniform = self.map.is_uniform()
+        ctx.openList.clear()
+        ctx.openMap.clear()
+        ctx.closedMap.clear()
+
+        path = []
+
+        # add start node to the open list
+        s = Node(r0, c0, 0, self.cost_estimate(start, goal))
+        self.add_to_open(ctx, s, self.cell_index(r0, c0))
+
+        # process nodes in the open list
+        while(len(ctx.openList) > 0):
+            currIdx = ctx.openList.pop()
+            curr = ctx.openMap.pop(currIdx)
+
+            ctx.closedMap[currIdx] = curr
+
+            # goal found -> generate path and return
+            if(curr.r == r1 and curr.c == c1):
+                while(curr.parent != None):
+                    path.append((curr.r, curr.c))
+                    curr = curr.parent
+
+                # add start node
+                path.append((curr.r, curr.c))
+
+                path.reverse()
+
+                ctx.expansions = len(ctx.closedMap)
+
+                return path
+
+            # process neighbor nodes
+            self.handle_node(ctx, curr, -1, -1)
+            self.handle_node(ctx, curr, -1, 0)
+            self.handle_node(ctx, curr, -1, 1)
+
+            self.handle_node(ctx, curr, 0, -1)
+            self.handle_node(ctx, curr, 0, 1)
+
+            self.handle_node(ctx, curr, 1, -1)
+            self.handle_node(ctx, curr, 1, 0)
+            self.handle_node(ctx, curr, 1, 1)
+
+        ctx.expansions = len(ctx.closedMap)
+
+        return path
+
+    def search_sma(self, start, goal):
+        """Simplified Memory-bounded A* search (SMA*), which keeps at most memoryLimit cells in memory.
+
+        The cells in memory form a tree rooted in start. An expansion generates the adjacent cells while
+        they fit in memory, when the memory is full it generates one cell only and the cell stays open.
+        When all the adjacent cells of a cell are generated its F cost is backed up: it becomes the lowest
+        F cost of its children, so it grows while the search learns that its subtree is more expensive.
+        Until the limit is reached the search expands the cells of A*, then before adding a cell it forgets
+        the leaf with the highest F cost, which is remembered by its parent and generated again when it's
+        the best child left. So memory is traded for time.
+        The path is optimal when an optimal path fits in memory, a path longer than the limit is never found.
+        With a limit much lower than the cells expanded by A* the same cells can be expanded
+        a very large number of times, so the search stops after the expansion limit set with
+        set_memory_limit. The number of cells forgotten is returned by last_pruned and
+        last_exhausted tells if the expansion limit was reached.
+
+        Same as make_path, but start and goal are not validated.
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the start cell
+        goal : tuple
+            row,col of the destination cell
+
+        Returns
+        -------
+        list
+            all the (row, col) tuples making the path. First tuple is start and last one is goal.
+            Empty when there's no path, when the memory limit is too low to reach the goal
+            or when the expansion limit is reached.
+        """
+        ctx = self.context()
+        cells = self.map.cells
+        stride = self.mapStride
+        maxNodes = self.memoryLimit
+        maxExpansions = self.expansionLimit
+        inf = math.inf
+
+        ctx.expansions = 0
+
+        # a path has at least one cell more than the moves between start and goal
+        if(max(abs(goal[0] - start[0]), abs(goal[1] - start[1])) >= maxNodes):
+            return []
+
+        # neighbors in the same order used by make_path
+        adjs = self.adj_offsets()
+        adjCosts = dict(adjs)
+        numAdjs = len(adjs)
+
+        startIdx = self.cell_index(start[0], start[1])
+        goalIdx = self.cell_index(goal[0], goal[1])
+
+        # cells in memory: [G cost, F cost, parent, children in memory, F costs of the forgotten children
+        # by index (None when there are none), depth, index in adjs of the next adjacent cell to generate]
+        h = self.cost_estimate(start, goal)
+        nodes = { startIdx : [0, h, -1, 0, None, 0, 0] }
+
+        # keys of the cells in the open list: the cells which can generate children and the leaves.
+        # The cells are in both heaps, entries with a different key are stale.
+        # best pops the lowest F cost and the highest G cost, worst the highest F cost and the lowest G cost.
+        openKeys = { startIdx : h }
+        best = [(h, 0, startIdx)]
+        worst = [(-h, 0, startIdx)]
+
+        expansions = 0
+        pruned = 0
+        pushes = 0
+        regenerated = 0
+        moved = 0
+        maxOpen = 1
+        fullBackup = False
+        exhausted = False
+
+        def add_to_open(idx, node):
+            nonlocal pushes
+            openKeys[idx] = node[1]
+            heapq.heappush(best, (node[1], -node[0], idx))
+            heapq.heappush(worst, (-node[1], node[0], idx))
+            pushes += 1
+
+        def backup(idx, ancestors = True):
+            # a cell with all the adjacent cells generated gets the lowest F cost of its children,
+            # the forgotten ones included, then its ancestors are updated
+            while(idx != -1):
+                node = nodes[idx]
+
+                if(node[6] < numAdjs):
+                    return
+
+                f = min(node[4].values()) if node[4] else inf
+
+                for offset, cost in adjs:
+                    child = nodes.get(idx + offset)
+
+                    if(child != None and child[2] == idx and child[1] < f):
+                        f = child[1]
+
+                if(f == node[1]):
+                    return
+
+                node[1] = f
+
+                if(idx in openKeys):
+                    add_to_open(idx, node)
+
+                if(not ancestors):
+                    return
+
+                idx = node[2]
+
+        def backup_all():
+            # children are deeper than their parent -> visiting the deepest cells first updates all the F costs
+            for idx in sorted(nodes, key = lambda i: nodes[i][5], reverse = True):
+                backup(idx, False)
+
+        def remove_child(parentIdx):
+            parent = nodes[parentIdx]
+            parent[3] -= 1
+            backup(parentIdx)
+
+            # a new leaf is added again because its entry in worst may have been dropped while it had children,
+            # a cell with forgotten children must be in the open list
+            if(parent[3] == 0 or (parent[4] and openKeys.get(parentIdx) != parent[1])):
+                add_to_open(parentIdx, parent)
+
+        # process cells in the open list
+        path = []
+
+        while(len(best) > 0):
+            f, negG, currIdx = heapq.heappop(best)
+
+            if(openKeys.get(currIdx) != f):
+                continue
+
+            # all the cells left can't reach the goal
+            if(f == inf):
+                break
+
+            # the search is thrashing, stop it
+            if(expansions >= maxExpansions):
+                exhausted = True
+                break
+
+            del openKeys[currIdx]
+            expansions += 1
+
+            # goal found -> generate path and return
+            if(currIdx == goalIdx):
+                while(currIdx != -1):
+                    r, c = divmod(currIdx - 1, stride)
+                    path.append((r - 1, c))
+                    currIdx = nodes[currIdx][2]
+
+                path.reverse()
+
+                break
+
+            curr = nodes[currIdx]
+            currG = curr[0]
+            currCell = cells[currIdx]
+            depth = curr[5] + 1
+
+            # generate the children, only one when the memory is full like SMA*
+            while(True):
+                adjIdx = -1
+
+                # next adjacent cell not generated yet, then the forgotten children from the best one
+                while(adjIdx == -1):
+                    if(curr[6] < numAdjs):
+                        offset, cost = adjs[curr[6]]
+                        curr[6] += 1
+                        idx = currIdx + offset
+                        knownF = 0
+                    elif(curr[4]):
+                        forgotten = curr[4]
+                        idx = min(forgotten, key = forgotten.get)
+                        knownF = forgotten.pop(idx)
+                        cost = adjCosts[idx - currIdx]
+                        regenerated += 1
+                    else:
+                        break
+
+                    if(cells[idx] == 0 or idx == curr[2]):
+                        continue
+
+                    adjG = currG + cost * (currCell + cells[idx]) // 2
+                    adj = nodes.get(idx)
+
+                    # in memory with a better or equal cost
+                    if(adj != None and adj[0] <= adjG):
+                        continue
+
+                    # the cells of a path through this cell can't be more than the limit
+                    r, c = divmod(idx - 1, stride)
+
+                    if(depth + max(abs(goal[0] - r + 1), abs(goal[1] - c)) >= maxNodes):
+                        continue
+
+                    # F cost never lower than the one of the parent or than the one learned before forgetting the cell
+                    adjF = max(f, knownF, adjG + self.cost_estimate((r - 1, c), goal))
+                    adjIdx = idx
+
+                if(adjIdx == -1):
+                    break
+
+                adj = nodes.get(adjIdx)
+
+                # better path to a cell in memory -> move it under the current cell
+                if(adj != None):
+                    oldParentIdx = adj[2]
+                    delta = adj[0] - adjG
+                    adj[0] = adjG
+                    adj[2] = currIdx
+                    adj[5] = depth
+                    curr[3] += 1
+                    moved += 1
+                    self.lower_subtree(nodes, adjs, adjIdx, delta, goal, add_to_open)
+
+                    if(adj[1] < f):
+                        adj[1] = f
+                        add_to_open(adjIdx, adj)
+
+                    remove_child(oldParentIdx)
+
+                # new cell
+                else:
+                    # memory full for the first time -> update the F costs not backed up yet
+                    if(not fullBackup and len(nodes) >= maxNodes):
+                        backup_all()
+                        fullBackup = True
+
+                    # memory full -> forget the leaf with the highest F cost and the lowest G cost
+                    while(len(nodes) >= maxNodes and len(worst) > 0):
+                        negF, leafG, leafIdx = heapq.heappop(worst)
+                        leaf = nodes.get(leafIdx)
+
+                        if(openKeys.get(leafIdx) != -negF or leaf[3] > 0 or leafIdx == startIdx):
+                            continue
+
+                        del nodes[leafIdx]
+                        del openKeys[leafIdx]
+                        pruned += 1
+
+                        parent = nodes[leaf[2]]
+
+                        if(leaf[1] < inf):
+                            if(parent[4] == None):
+                                parent[4] = dict()
+
+                            parent[4][leafIdx] = leaf[1]
+
+                        if(leaf[2] == currIdx):
+                            curr[3] -= 1
+                        else:
+                            remove_child(leaf[2])
+
+                    # no leaf to forget, the cell doesn't fit
+                    if(len(nodes) < maxNodes):
+                        adj = [adjG, adjF, currIdx, 0, None, depth, 0]
+                        nodes[adjIdx] = adj
+                        curr[3] += 1
+                        add_to_open(adjIdx, adj)
+
+                if(len(nodes) >= maxNodes):
+                    break
+
+            # all the adjacent cells generated -> back up the F cost. Until a cell is forgotten
+            # the F costs of the ancestors are not used, lower values are still valid bounds.
+            backup(currIdx, fullBackup)
+
+            # more children to generate, or a leaf which can be forgotten
+            if(curr[6] < numAdjs or curr[4] or curr[3] == 0):
+                add_to_open(currIdx, curr)
+
+            if(len(openKeys) > maxOpen):
+                maxOpen = len(openKeys)
+
+            # drop the stale entries, which otherwise make the heaps grow with every expansion
+            if(len(best) > 4 * maxNodes):
+                best[:] = [(key, -nodes[idx][0], idx) for idx, key in openKeys.items()]
+                worst[:] = [(-key, nodes[idx][0], idx) for idx, key in openKeys.items()]
+                heapq.heapify(best)
+                heapq.heapify(worst)
+
+        ctx.expansions = expansions
+        ctx.pruned = pruned
+        ctx.exhausted = exhausted
+
+        if(ctx.stats != None):
+            ctx.stats.pushes += pushes
+            ctx.stats.reopenings += regenerated
+            ctx.stats.decreaseKeys += moved
+            ctx.stats.maxOpen = max(ctx.stats.maxOpen, maxOpen)
+
+        return path
+
+    def lower_subtree(self, nodes, adjs, rootIdx, delta, goal, add_to_open):
+        """Update a cell of search_sma and its descendants after a better path to the cell was found.
+
+        The costs are lowered and the cells go back to the open list as if they were never expanded,
+        because their adjacent cells skipped or forgotten before may be useful with the new costs and depths.
+        The children of a cell are among its adjacent cells, so the tree is visited without storing
+        the children of every cell.
+
+        Parameters
+        ----------
+        nodes : dict
+            the cells in memory of search_sma
+        adjs : list
+            (offset, cost) tuples of the adjacent cells, as returned by adj_offsets
+        rootIdx : int
+            index of the cell, with its new G cost, parent and depth already set
+        delta : int
+            decrease of the G cost of the cell
+        goal : tuple
+            row,col of the destination cell
+        add_to_open : callable
+            function of search_sma updating the key of a cell in the open list
+        """
+        stride = self.mapStride
+        stack = [rootIdx]
+
+        while(len(stack) > 0):
+            idx = stack.pop()
+            node = nodes[idx]
+
+            if(idx != rootIdx):
+                node[0] -= delta
+                node[5] = nodes[node[2]][5] + 1
+
+            r, c = divmod(idx - 1, stride)
+            node[1] = node[0] + self.cost_estimate((r - 1, c), goal)
+            node[4] = None
+            node[6] = 0
+            add_to_open(idx, node)
+
+            for offset, cost in adjs:
+                child = nodes.get(idx + offset)
+
+                if(child != None and child[2] == idx):
+                    stack.append(idx + offset)
+
+    def make_path_budget(self, start, goal, maxExpansions = 0, deadline = None):
+        """A* search limited by a number of expansions and by a deadline, which can be resumed later.
+
+        The search always uses A* with the heuristic of the Pathfinder, the engine is ignored.
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the start cell
+        goal : tuple
+            row,col of the destination cell
+        maxExpansions : int
+            maximum number of cells expanded, 0 means no limit
+        deadline : float
+            value of time.perf_counter() at which the search stops, None means no limit
+
+        Returns
+        -------
+        BudgetedSearch
+            the state of the search, with the path to the goal when it's found or the path to the
+            reached cell closest to the goal when the budget runs out
+        """
+        return self.budget_search(start, goal).resume(maxExpansions, deadline)
+
+    def budget_search(self, start, goal):
+        """Create a BudgetedSearch, which has not expanded any cell yet.
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the start cell
+        goal : tuple
+            row,col of the destination cell
+
+        Returns
+        -------
+        BudgetedSearch
+            the new search, already finished if the path is in the cache or if no path exists
+        """
+        self.check_cell(start)
+        self.check_cell(goal)
+
+        # start == goal
+        if(start == goal):
+            raise SameStartGoalError(start)
+
+        search = BudgetedSearch(self, start, goal)
+
+        if self.cache != None:
+            path = self.cache.get(start, goal, self.map.version)
+
+            if path != None:
+                search.finish(path)
+
+        return search
+
+    def iter_search(self, start, goal, stepSize = 1):
+        """A* search which yields after every group of expansions, so it can be drawn while it runs.
+
+        The search always uses A* with the heuristic of the Pathfinder, the engine is ignored.
+        Start and goal are validated when iter_search is called, like in make_path.
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the start cell
+        goal : tuple
+            row,col of the destination cell
+        stepSize : int
+            number of cells expanded between two yields
+
+        Returns
+        -------
+        generator
+            it yields (opened, closed, path) tuples. opened and closed are the lists of (row, col)
+            tuples added to the open and closed lists since the previous yield. path is None until
+            the search is finished, then it's the path to the goal, empty if no path exists.
+        """
+        return self.search_steps(self.budget_search(start, goal), stepSize)
+
+    def search_steps(self, search, stepSize):
+        """Generator used by iter_search.
+
+        Parameters
+        ----------
+        search : BudgetedSearch
+            search which has not expanded any cell yet
+        stepSize : int
+            number of cells expanded between two yields
+
+        Yields
+        ------
+        tuple
+            (opened, closed, path) as described in iter_search
+        """
+        # cache hit or unreachable goal
+        if search.done:
+            yield ([], [], search.path)
+            return
+
+        search.set_trace(True)
+
+        while not search.done:
+            search.resume(stepSize)
+            opened, closed = search.take_trace()
+
+            yield (opened, closed, search.path if search.done else None)
+
+    def make_paths(self, start, goals):
+        """Find the paths from one start cell to many goals with a single search.
+
+        The search is a Dijkstra search from start which stops when all the reachable goals are closed,
+        so every cell is explored once no matter how many goals there are.
+        The engine and the heuristic of the Pathfinder are not used.
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the start cell
+        goals : list
+            row,col tuples of the destination cells
+
+        Returns
+        -------
+        list
+            one path for every goal, in the same order. A path is a list of all the (row, col) tuples
+            making it, first tuple is start and last one is goal. The path is empty when the goal
+            can't be reached or when it's the start cell.
+        """
+        self.check_cell(start)
+
+        for goal in goals:
+            self.check_cell(goal)
+
+        stride = self.mapStride
+        cells = self.map.cells
+        adjs = self.adj_offsets()
+        openList = self.context().openList
+
+        startIdx = self.cell_index(start[0], start[1])
+
+        # goals still to reach, skipping the ones in other components
+        pending = set()
+
+        for goal in goals:
+            goalIdx = self.cell_index(goal[0], goal[1])
+
+            if(goalIdx != startIdx and self.connected(startIdx, goalIdx)):
+                pending.add(goalIdx)
+
+        g = { startIdx : 0 }
+        parent = { startIdx : -1 }
+        closed = set()
+
+        openList.clear()
+        openList.push(startIdx, 0)
+
+        while(len(pending) > 0 and len(openList) > 0):
+            currIdx = openList.pop()
+            closed.add(currIdx)
+            pending.discard(currIdx)
+
+            currG = g[currIdx]
+            currCell = cells[currIdx]
+
+            # process neighbor cells
+            for offset, cost in adjs:
+                adjIdx = currIdx + offset
+                adjCell = cells[adjIdx]
+
+                # not walkable or in closed list
+                if(adjCell == 0 or adjIdx in closed):
+                    continue
+
+                adjG = currG + cost * (currCell + adjCell) // 2
+
+                # in open list
+                if(adjIdx in g):
+                    # new path has a better cost
+                    if(g[adjIdx] > adjG):
+                        g[adjIdx] = adjG
+                        parent[adjIdx] = currIdx
+                        openList.decrease_key(adjIdx, adjG)
+
+                # new cell
+                else:
+                    g[adjIdx] = adjG
+                    parent[adjIdx] = currIdx
+                    openList.push(adjIdx, adjG)
+
+        # generate the paths walking the tree of parents from every goal
+        paths = []
+
+        for goal in goals:
+            path = []
+            idx = self.cell_index(goal[0], goal[1])
+
+            if(idx != startIdx and idx in closed):
+                while(idx != -1):
+                    r, c = divmod(idx - 1, stride)
+                    path.append((r - 1, c))
+                    idx = parent[idx]
+
+                path.reverse()
+
+            paths.append(path)
+
+        ctx = self.context()
+        ctx.expansions = len(closed)
+
+        if ctx.stats != None:
+            ctx.stats.expansions += len(closed)
+
+        return paths
+
+    def many_to_many(self, starts, goals):
+        """Find the paths from many start cells to many goals, with one search per start cell.
+
+        Parameters
+        ----------
+        starts : list
+            row,col tuples of the start cells
+        goals : list
+            row,col tuples of the destination cells
+
+        Returns
+        -------
+        list
+            one list for every start cell, in the same order, containing the paths returned by make_paths
+        """
+        return [self.make_paths(start, goals) for start in starts]
+
+    def search_arrays(self, start, goal):
+        """A* search storing its data in the SearchState of the Pathfinder.
+
+        Same as make_path, but start and goal are not validated.
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the start cell
+        goal : tuple
+            row,col of the destination cell
+
+        Returns
+        -------
+        list
+            all the (row, col) tuples making the path. First tuple is start and last one is goal.
+        """
+        ctx = self.context()
+        state = ctx.searchState
+        gen = state.begin()
+        closedGen = gen + 1
+
+        g = state.g
+        parent = state.parent
+        stamp = state.stamp
+        cells = self.map.cells
+        stride = self.mapStride
+        openList = ctx.openList
+
+        # neighbors in the same order used by make_path
+        adjs = self.adj_offsets()
+
+        startIdx = self.cell_index(start[0], start[1])
+        goalIdx = self.cell_index(goal[0], goal[1])
+
+        openList.clear()
+
+        g[startIdx] = 0
+        parent[startIdx] = -1
+        stamp[startIdx] = gen
+        openList.push(startIdx, self.cost_estimate(start, goal))
+
+        expansions = 0
+
+        # process cells in the open list
+        while(len(openList) > 0):
+            currIdx = openList.pop()
+            stamp[currIdx] = closedGen
+            expansions += 1
+
+            # goal found -> generate path and return
+            if(currIdx == goalIdx):
+                path = []
+
+                while(currIdx != -1):
+                    r, c = divmod(currIdx - 1, stride)
+                    path.append((r - 1, c))
+                    currIdx = parent[currIdx]
+
+                path.reverse()
+
+                ctx.expansions = expansions
+
+                return path
+
+            currG = g[currIdx]
+            currCell = cells[currIdx]
+
+            # process neighbor cells
+            for offset, cost in adjs:
+                adjIdx = currIdx + offset
+                adjCell = cells[adjIdx]
+
+                # not walkable or in closed list
+                if(adjCell == 0 or stamp[adjIdx] == closedGen):
+                    continue
+
+                adjG = currG + cost * (currCell + adjCell) // 2
+
+                # in open list
+                if(stamp[adjIdx] == gen):
+                    # new path has a better cost
+                    if(g[adjIdx] > adjG):
+                        g[adjIdx] = adjG
+                        parent[adjIdx] = currIdx
+
+                        r, c = divmod(adjIdx - 1, stride)
+                        openList.decrease_key(adjIdx, adjG + self.cost_estimate((r - 1, c), goal))
+
+                # new cell
+                else:
+                    g[adjIdx] = adjG
+                    parent[adjIdx] = currIdx
+                    stamp[adjIdx] = gen
+
+                    r, c = divmod(adjIdx - 1, stride)
+                    openList.push(adjIdx, adjG + self.cost_estimate((r - 1, c), goal))
+
+        ctx.expansions = expansions
+
+        return []
+
+    def search_bidirectional(self, start, goal):
+        """Bidirectional A* search, a forward search from start and a backward search from goal.
+
+        Every iteration expands the side with the smaller open list. A cell reached by both
+        searches is a meeting point and it gives a path. The search stops when the lowest key
+        of one of the open lists is not lower than the cost of the best path found, because
+        with a consistent heuristic no unexplored path can be cheaper than that key.
+
+        Same as make_path, but start and goal are not validated.
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the start cell
+        goal : tuple
+            row,col of the destination cell
+
+        Returns
+        -------
+        list
+            all the (row, col) tuples making the path. First tuple is start and last one is goal.
+        """
+        stride = self.mapStride
+        cells = self.map.cells
+        adjs = self.adj_offsets()
+        ctx = self.context()
+
+        if ctx.openListBack == None:
+            ctx.openListBack = ctx.new_open_list(self.open_list_class(), len(cells))
+
+        startIdx = self.cell_index(start[0], start[1])
+        goalIdx = self.cell_index(goal[0], goal[1])
+
+        # data of the two searches: open list, G costs, parents, closed cells, target cell
+        fwd = (ctx.openList, { startIdx : 0 }, { startIdx : -1 }, set(), goal)
+        bwd = (ctx.openListBack, { goalIdx : 0 }, { goalIdx : -1 }, set(), start)
+
+        fwd[0].clear()
+        bwd[0].clear()
+        fwd[0].push(startIdx, self.cost_estimate(start, goal))
+        bwd[0].push(goalIdx, self.cost_estimate(goal, start))
+
+        # best path found so far
+        bestCost = math.inf
+        meetIdx = -1
+
+        while(len(fwd[0]) > 0 and len(bwd[0]) > 0):
+            # no cheaper path can be found
+            if(fwd[0].min_key() >= bestCost or bwd[0].min_key() >= bestCost):
+                break
+
+            if(len(fwd[0]) <= len(bwd[0])):
+                side, other = fwd, bwd
+            else:
+                side, other = bwd, fwd
+
+            openList, g, parent, closed, target = side
+            otherG = other[1]
+
+            currIdx = openList.pop()
+            closed.add(currIdx)
+            currG = g[currIdx]
+            currCell = cells[currIdx]
+
+            # process neighbor cells
+            for offset, cost in adjs:
+                adjIdx = currIdx + offset
+                adjCell = cells[adjIdx]
+
+                # not walkable or in closed list
+                if(adjCell == 0 or adjIdx in closed):
+                    continue
+
+                adjG = currG + cost * (currCell + adjCell) // 2
+
+                # in open list
+                if(adjIdx in g):
+                    # new path has a better cost
+                    if(g[adjIdx] > adjG):
+                        g[adjIdx] = adjG
+                        parent[adjIdx] = currIdx
+
+                        r, c = divmod(adjIdx - 1, stride)
+                        openList.decrease_key(adjIdx, adjG + self.cost_estimate((r - 1, c), target))
+                    else:
+                        continue
+
+                # new cell
+                else:
+                    g[adjIdx] = adjG
+                    parent[adjIdx] = currIdx
+
+                    r, c = divmod(adjIdx - 1, stride)
+                    openList.push(adjIdx, adjG + self.cost_estimate((r - 1, c), target))
+
+                # cell reached by the other search too -> new path
+                if(adjIdx in otherG and adjG + otherG[adjIdx] < bestCost):
+                    bestCost = adjG + otherG[adjIdx]
+                    meetIdx = adjIdx
+
+        ctx.expansions = len(fwd[3]) + len(bwd[3])
+
+        if(meetIdx == -1):
+            return []
+
+        # forward half, from start to the meeting cell
+        path = []
+        idx = meetIdx
+
+        while(idx != -1):
+            r, c = divmod(idx - 1, stride)
+            path.append((r - 1, c))
+            idx = fwd[2][idx]
+
+        path.reverse()
+
+        # backward half, from the meeting cell to goal
+        idx = bwd[2][meetIdx]
+
+        while(idx != -1):
+            r, c = divmod(idx - 1, stride)
+            path.append((r - 1, c))
+            idx = bwd[2][idx]
+
+        return path
+
+    def jump(self, idx, dr, dc, goalIdx):
+        """Move from a cell in one direction until a jump point is found.
+
+        A jump point is the goal or a cell with a forced neighbor, which is a neighbor
+        that can't be reached with an optimal path that doesn't pass through the cell.
+        Diagonal moves also stop at cells from which a straight move finds a jump point.
+
+        Parameters
+        ----------
+        idx : int
+            unique index of the cell to start from
+        dr : int
+            row delta of the direction. It can be -1, 0, 1
+        dc : int
+            col delta of the direction. It can be -1, 0, 1
+        goalIdx : int
+            unique index of the goal cell
+
+        Returns
+        -------
+        int
+            unique index of the jump point or -1 if an unwalkable cell is found first
+        """
+        cells = self.map.cells
+        stride = self.mapStride
+        dStride = dr * stride
+        step = dStride + dc
+
+        while True:
+            idx += step
+
+            if(cells[idx] == 0):
+                return -1
+
+            if(idx == goalIdx):
+                return idx
+
+            # diagonal move
+            if(dr != 0 and dc != 0):
+                if((cells[idx - dc] == 0 and cells[idx - dc + dStride] != 0) or
+                   (cells[idx - dStride] == 0 and cells[idx - dStride + dc] != 0)):
+                    return idx
+
+                if(self.jump(idx, dr, 0, goalIdx) != -1 or self.jump(idx, 0, dc, goalIdx) != -1):
+                    return idx
+
+            # horizontal move
+            elif(dc != 0):
+                if((cells[idx - stride] == 0 and cells[idx - stride + dc] != 0) or
+                   (cells[idx + stride] == 0 and cells[idx + stride + dc] != 0)):
+                    return idx
+
+            # vertical move
+            else:
+                if((cells[idx - 1] == 0 and cells[idx - 1 + dStride] != 0) or
+                   (cells[idx + 1] == 0 and cells[idx + 1 + dStride] != 0)):
+                    return idx
+
+    def jump_directions(self, idx, dr, dc):
+        """Get the directions to explore from a jump point, pruning the neighbors
+        which can be reached optimally without passing through it.
+
+        Parameters
+        ----------
+        idx : int
+            unique index of the jump point
+        dr : int
+            row delta of the direction used to reach the jump point. It can be -1, 0, 1
+        dc : int
+            col delta of the direction used to reach the jump point. It can be -1, 0, 1
+
+        Returns
+        -------
+        list
+            the (dr, dc) tuples of the natural and forced neighbors
+        """
+        cells = self.map.cells
+        stride = self.mapStride
+
+        # start cell -> all directions
+        if(dr == 0 and dc == 0):
+            return [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+        # diagonal move
+        if(dr != 0 and dc != 0):
+            dirs = [(dr, 0), (0, dc), (dr, dc)]
+
+            if(cells[idx - dc] == 0):
+                dirs.append((dr, -dc))
+
+            if(cells[idx - dr * stride] == 0):
+                dirs.append((-dr, dc))
+
+        # horizontal move
+        elif(dc != 0):
+            dirs = [(0, dc)]
+
+            if(cells[idx - stride] == 0):
+                dirs.append((-1, dc))
+
+            if(cells[idx + stride] == 0):
+                dirs.append((1, dc))
+
+        # vertical move
+        else:
+            dirs = [(dr, 0)]
+
+            if(cells[idx - 1] == 0):
+                dirs.append((dr, -1))
+
+            if(cells[idx + 1] == 0):
+                dirs.append((dr, 1))
+
+        return dirs
+
+    def search_jps(self, start, goal):
+        """Implementation of the Jump Point Search, an A* search which expands only jump points.
+
+        Same as make_path, but start and goal are not validated.
+        All moves must have the same cost (costHor straight, costDia diagonal).
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the start cell
+        goal : tuple
+            row,col of the destination cell
+
+        Returns
+        -------
+        list
+            all the (row, col) tuples making the path. First tuple is start and last one is goal.
+        """
+        stride = self.mapStride
+        ctx = self.context()
+        openList = ctx.openList
+
+        startIdx = self.cell_index(start[0], start[1])
+        goalIdx = self.cell_index(goal[0], goal[1])
+
+        openList.clear()
+
+        g = { startIdx : 0 }
+        parent = { startIdx : -1 }
+        closed = set()
+
+        openList.push(startIdx, self.cost_estimate(start, goal))
+
+        # process jump points in the open list
+        while(len(openList) > 0):
+            currIdx = openList.pop()
+            closed.add(currIdx)
+
+            # goal found -> generate path and return
+            if(currIdx == goalIdx):
+                jumpPoints = []
+
+                while(currIdx != -1):
+                    r, c = divmod(currIdx - 1, stride)
+                    jumpPoints.append((r - 1, c))
+                    currIdx = parent[currIdx]
+
+                jumpPoints.reverse()
+
+                ctx.expansions = len(closed)
+
+                return self.expand_jump_points(jumpPoints)
+
+            r, c = divmod(currIdx - 1, stride)
+            r -= 1
+
+            # direction used to reach the jump point
+            dr = 0
+            dc = 0
+
+            if(parent[currIdx] != -1):
+                pr, pc = divmod(parent[currIdx] - 1, stride)
+                pr -= 1
+                dr = (r > pr) - (r < pr)
+                dc = (c > pc) - (c < pc)
+
+            currG = g[currIdx]
+
+            # process successor jump points
+            for dr, dc in self.jump_directions(currIdx, dr, dc):
+                jumpIdx = self.jump(currIdx, dr, dc, goalIdx)
+
+                if(jumpIdx == -1 or jumpIdx in closed):
+                    continue
+
+                jr, jc = divmod(jumpIdx - 1, stride)
+                jr -= 1
+                steps = max(abs(jr - r), abs(jc - c))
+                jumpG = currG + steps * self.cost_to_adj(dr, dc)
+
+                # in open list
+                if(jumpIdx in g):
+                    # new path has a better cost
+                    if(g[jumpIdx] > jumpG):
+                        g[jumpIdx] = jumpG
+                        parent[jumpIdx] = currIdx
+                        openList.decrease_key(jumpIdx, jumpG + self.cost_estimate((jr, jc), goal))
+
+                # new jump point
+                else:
+                    g[jumpIdx] = jumpG
+                    parent[jumpIdx] = currIdx
+                    openList.push(jumpIdx, jumpG + self.cost_estimate((jr, jc), goal))
+
+        ctx.expansions = len(closed)
+
+        return []
+
+    def expand_jump_points(self, jumpPoints):
+        """Generate a path of adjacent cells from a list of jump points.
+
+        Parameters
+        ----------
+        jumpPoints : list
+            the (row, col) tuples of the jump points, two consecutive jump points are
+            always on the same row, col or diagonal
+
+        Returns
+        -------
+        list
+            all the (row, col) tuples making the path
+        """
+        path = [jumpPoints[0]]
+
+        for i in range(1, len(jumpPoints)):
+            r, c = jumpPoints[i - 1]
+            r1, c1 = jumpPoints[i]
+            dr = (r1 > r) - (r1 < r)
+            dc = (c1 > c) - (c1 < c)
+
+            while((r, c) != (r1, c1)):
+                r += dr
+                c += dc
+                path.append((r, c))
+
+        return path
+
+class BudgetedSearch:
+    """A* search which runs for a limited budget at a time, created by Pathfinder.make_path_budget.
+
+    Every call to resume continues the search from where the previous one stopped.
+    When the budget runs out path leads to the reached cell with the lowest estimated cost
+    to the goal, so a unit can start moving before the search is finished.
+    If the cells of the map change between two calls the search restarts from scratch.
+    """
+
+    # number of expansions between two checks of the deadline
+    DEADLINE_CHECK = 16
+
+    def __init__(self, pf, start, goal):
+        """
+        Parameters
+        ----------
+        pf : Pathfinder
+            the pathfinder providing map, heuristic and open list
+        start : tuple
+            row,col of the start cell
+        goal : tuple
+            row,col of the destination cell
+        """
+        self.pf = pf
+        self.start = start
+        self.goal = goal
+
+        # True when the search is finished, complete tells if the goal was reached
+        self.done = False
+        self.complete = False
+        self.path = [start]
+
+        # number of cells expanded by all the calls to resume
+        self.expansions = 0
+
+        # indices of the cells opened and closed since the last take_trace, None when not traced
+        self.traceOpened = None
+        self.traceClosed = None
+
+        self.openList = pf.open_list_class()(len(pf.map.cells))
+        self.restart()
+
+    def restart(self):
+        """Discard the data of the search and start it again from the start cell."""
+        pf = self.pf
+
+        self.version = pf.map.version
+        self.startIdx = pf.cell_index(self.start[0], self.start[1])
+        self.goalIdx = pf.cell_index(self.goal[0], self.goal[1])
+
+        self.g = { self.startIdx : 0 }
+        self.parent = { self.startIdx : -1 }
+        self.closed = set()
+
+        self.openList.clear()
+        h = pf.cost_estimate(self.start, self.goal)
+        self.openList.push(self.startIdx, h)
+
+        # reached cell with the lowest estimated cost to the goal
+        self.bestIdx = self.startIdx
+        self.bestH = h
+
+        # start and goal in different components -> no path
+        if(not pf.connected(self.startIdx, self.goalIdx)):
+            self.finish([])
+
+    def set_trace(self, trace):
+        """Enable or disable the recording of the cells opened and closed.
+
+        Parameters
+        ----------
+        trace : bool
+            True to record the cells, which are returned by take_trace
+        """
+        if trace:
+            self.traceOpened = []
+            self.traceClosed = []
+        else:
+            self.traceOpened = None
+            self.traceClosed = None
+
+    def take_trace(self):
+        """Get the cells opened and closed since the previous call, set_trace must be enabled.
+
+        Returns
+        -------
+        tuple
+            two lists of (row, col) tuples: the cells opened and the cells closed
+        """
+        cellFromIndex = self.pf.map.cell_from_index
+
+        opened = [cellFromIndex(idx) for idx in self.traceOpened]
+        closed = [cellFromIndex(idx) for idx in self.traceClosed]
+
+        self.traceOpened.clear()
+        self.traceClosed.clear()
+
+        return (opened, closed)
+
+    def finish(self, path):
+        """Mark the search as finished.
+
+        Parameters
+        ----------
+        path : list
+            the path to the goal, empty if no path exists
+        """
+        self.done = True
+        self.complete = len(path) > 0
+        self.path = path
+        self.openList.clear()
+        self.g = self.parent = self.closed = None
+
+    def path_to(self, idx):
+        """Generate the path from the start cell to a reached cell.
+
+        Parameters
+        ----------
+        idx : int
+            unique index of the cell
+
+        Returns
+        -------
+        list
+            all the (row, col) tuples making the path
+        """
+        stride = self.pf.mapStride
+        parent = self.parent
+        path = []
+
+        while(idx != -1):
+            r, c = divmod(idx - 1, stride)
+            path.append((r - 1, c))
+            idx = parent[idx]
+
+        path.reverse()
+
+        return path
+
+    def resume(self, maxExpansions = 0, deadline = None):
+        """Continue the search until it finishes or the budget runs out.
+
+        Parameters
+        ----------
+        maxExpansions : int
+            maximum number of cells expanded by this call, 0 means no limit
+        deadline : float
+            value of time.perf_counter() at which the search stops, None means no limit
+
+        Returns
+        -------
+        BudgetedSearch
+            the search itself
+        """
+        if self.done:
+            return self
+
+        pf = self.pf
+
+        # map changed -> the data of the search is not valid anymore
+        if(self.version != pf.map.version):
+            self.restart()
+
+            if self.done:
+                return self
+
+        cells = pf.map.cells
+        stride = pf.mapStride
+        adjs = pf.adj_offsets()
+        goal = self.goal
+        goalIdx = self.goalIdx
+        openList = self.openList
+        g = self.g
+        parent = self.parent
+        closed = self.closed
+
+        traceOpened = self.traceOpened
+        traceClosed = self.traceClosed
+
+        bestIdx = self.bestIdx
+        bestH = self.bestH
+        expanded = 0
+
+        while(len(openList) > 0):
+            # budget over
+            if(maxExpansions > 0 and expanded >= maxExpansions):
+                break
+
+            if(deadline != None and expanded % self.DEADLINE_CHECK == 0 and time.perf_counter() >= deadline):
+                break
+
+            currIdx = openList.pop()
+            closed.add(currIdx)
+            expanded += 1
+
+            if traceClosed != None:
+                traceClosed.append(currIdx)
+
+            # goal found -> generate path and return
+            if(currIdx == goalIdx):
+                self.expansions += expanded
+                path = self.path_to(currIdx)
+
+                if pf.cache != None:
+                    pf.cache.put(self.start, goal, self.version, path)
+
+                self.finish(path)
+                return self
+
+            currG = g[currIdx]
+            currCell = cells[currIdx]
+
+            # process neighbor cells
+            for offset, cost in adjs:
+                adjIdx = currIdx + offset
+                adjCell = cells[adjIdx]
+
+                # not walkable or in closed list
+                if(adjCell == 0 or adjIdx in closed):
+                    continue
+
+                adjG = currG + cost * (currCell + adjCell) // 2
+
+                # in open list
+                if(adjIdx in g):
+                    # new path has a better cost
+                    if(g[adjIdx] > adjG):
+                        g[adjIdx] = adjG
+                        parent[adjIdx] = currIdx
+
+                        r, c = divmod(adjIdx - 1, stride)
+                        openList.decrease_key(adjIdx, adjG + pf.cost_estimate((r - 1, c), goal))
+
+                # new cell
+                else:
+                    g[adjIdx] = adjG
+                    parent[adjIdx] = currIdx
+
+                    r, c = divmod(adjIdx - 1, stride)
+                    h = pf.cost_estimate((r - 1, c), goal)
+                    openList.push(adjIdx, adjG + h)
+
+                    if traceOpened != None:
+                        traceOpened.append(adjIdx)
+
+                    if(h < bestH):
+                        bestH = h
+                        bestIdx = adjIdx
+
+        self.expansions += expanded
+
+        # open list empty -> no path
+        if(len(openList) == 0):
+            self.finish([])
+            return self
+
+        self.bestIdx = bestIdx
+        self.bestH = bestH
+        self.path = self.path_to(bestIdx)
+
+        return self
 
 class OutOfBoundsError(Exception):
     """Exception raised when start or goal are outside the map."""
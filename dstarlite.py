@@ -0,0 +1,324 @@
+import astar
+import heapq
+import math
+
+class DStarLite:
+    """Incremental planner that implements the D* Lite search in a map.
+
+    The search runs backward from the goal, so the tree of costs to the goal survives when the
+    start moves along the path. When cells change only the costs affected by the change are
+    repaired by the next replan, instead of searching again from scratch.
+    """
+
+    def __init__(self, map):
+        """
+        Parameters
+        ----------
+        map : astar.Grid or list
+            the map, or a list containing sub-lists reprenting the rows of the map.
+            A Grid is shared and modified by update_cells.
+        """
+        if not isinstance(map, astar.Grid):
+            map = astar.Grid.from_list(map)
+
+        self.map = map
+        self.costHor = 10
+        self.costDia = 14
+
+        self.start = None
+        self.goal = None
+
+    def plan(self, start, goal):
+        """Search a path from scratch, discarding the data of any previous search.
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the start cell
+        goal : tuple
+            row,col of the destination cell
+
+        Returns
+        -------
+        list
+            all the (row, col) tuples making the path. First tuple is start and last one is goal.
+        """
+        for cell in (start, goal):
+            # out of bounds
+            if not self.map.is_inside(cell[0], cell[1]):
+                raise astar.OutOfBoundsError(cell)
+
+            # unwalkable
+            if not self.map.is_walkable(cell[0], cell[1]):
+                raise astar.UnwalkableError(cell)
+
+        # start == goal
+        if(start == goal):
+            raise astar.SameStartGoalError(start)
+
+        stride = self.map.stride
+        self.adjs = []
+
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                if dr != 0 or dc != 0:
+                    self.adjs.append((dr * stride + dc, self.costDia if dr != 0 and dc != 0 else self.costHor))
+
+        self.start = start
+        self.goal = goal
+        self.startIdx = self.map.cell_index(start[0], start[1])
+        self.goalIdx = self.map.cell_index(goal[0], goal[1])
+
+        # key modifier, it grows when the start moves
+        self.km = 0
+
+        self.g = dict()
+        self.rhs = { self.goalIdx : 0 }
+
+        # priority queue with lazy deletion and the current key of every queued cell
+        self.queue = []
+        self.queued = dict()
+        self.push(self.goalIdx)
+
+        return self.replan()
+
+    def cost_to_start(self, idx):
+        """Compute the approximated cost of moving from a cell to the start cell using the octile distance.
+
+        Parameters
+        ----------
+        idx : int
+            unique index of the cell
+
+        Returns
+        -------
+        int
+            approximated cost of movement to the start cell
+        """
+        return astar.octile(self.map.cell_from_index(idx), self.start, self.costHor, self.costDia)
+
+    def calculate_key(self, idx):
+        """Compute the priority of a cell in the queue.
+
+        Parameters
+        ----------
+        idx : int
+            unique index of the cell
+
+        Returns
+        -------
+        tuple
+            the key of the cell, keys are compared lexicographically
+        """
+        m = min(self.g.get(idx, math.inf), self.rhs.get(idx, math.inf))
+        return (m + self.cost_to_start(idx) + self.km, m)
+
+    def push(self, idx):
+        """Add a cell to the queue, or update its key.
+
+        Parameters
+        ----------
+        idx : int
+            unique index of the cell
+        """
+        key = self.calculate_key(idx)
+        self.queued[idx] = key
+        heapq.heappush(self.queue, (key, idx))
+
+    def top_key(self):
+        """Get the lowest key in the queue, removing stale entries.
+
+        Returns
+        -------
+        tuple
+            the lowest key, or infinite keys if the queue is empty
+        """
+        queue = self.queue
+
+        while(len(queue) > 0 and self.queued.get(queue[0][1]) != queue[0][0]):
+            heapq.heappop(queue)
+
+        if(len(queue) == 0):
+            return (math.inf, math.inf)
+
+        return queue[0][0]
+
+    def update_vertex(self, idx):
+        """Recompute the rhs value of a cell and update its position in the queue.
+
+        Parameters
+        ----------
+        idx : int
+            unique index of the cell
+        """
+        cells = self.map.cells
+
+        if(idx != self.goalIdx):
+            rhs = math.inf
+
+            # unwalkable cells can't be part of a path
+            if(cells[idx] != 0):
+                g = self.g
+                cell = cells[idx]
+
+                for offset, cost in self.adjs:
+                    adjIdx = idx + offset
+
+                    # moves cost the base cost multiplied by the average terrain cost of the two cells
+                    if(cells[adjIdx] != 0):
+                        rhs = min(rhs, cost * (cell + cells[adjIdx]) // 2 + g.get(adjIdx, math.inf))
+
+            self.rhs[idx] = rhs
+
+        self.queued.pop(idx, None)
+
+        if(self.g.get(idx, math.inf) != self.rhs.get(idx, math.inf)):
+            self.push(idx)
+
+    def update_neighbors(self, idx):
+        """Update all the walkable neighbors of a cell.
+
+        Parameters
+        ----------
+        idx : int
+            unique index of the cell
+        """
+        cells = self.map.cells
+
+        for offset, cost in self.adjs:
+            if(cells[idx + offset] != 0):
+                self.update_vertex(idx + offset)
+
+    def compute_shortest_path(self):
+        """Process the queue until the cost of the start cell is correct."""
+        g = self.g
+        rhs = self.rhs
+        startIdx = self.startIdx
+
+        while(self.top_key() < self.calculate_key(startIdx) or
+              rhs.get(startIdx, math.inf) != g.get(startIdx, math.inf)):
+            oldKey, idx = heapq.heappop(self.queue)
+            del self.queued[idx]
+
+            newKey = self.calculate_key(idx)
+
+            # key is outdated because the start moved
+            if(oldKey < newKey):
+                self.queued[idx] = newKey
+                heapq.heappush(self.queue, (newKey, idx))
+
+            # overconsistent -> the cost becomes final
+            elif(g.get(idx, math.inf) > rhs.get(idx, math.inf)):
+                g[idx] = rhs[idx]
+                self.update_neighbors(idx)
+
+            # underconsistent -> the cost is reset and propagated
+            else:
+                g[idx] = math.inf
+                self.update_vertex(idx)
+                self.update_neighbors(idx)
+
+    def update_cells(self, changes):
+        """Change walkable and unwalkable cells of the map.
+
+        Parameters
+        ----------
+        changes : list
+            (row, col, walkable) tuples, one for every changed cell. walkable can also be
+            an int, which is the new terrain cost of the cell (0 = unwalkable)
+
+        Raises
+        ------
+        OutOfBoundsError
+            if a cell is outside the map, the changes before it are applied
+        """
+        for r, c, walkable in changes:
+            # out of bounds, the index could be the one of another cell
+            if not self.map.is_inside(r, c):
+                raise astar.OutOfBoundsError((r, c))
+
+            idx = self.map.cell_index(r, c)
+
+            if isinstance(walkable, bool):
+                cost = 1 if walkable else 0
+
+                if((self.map.cells[idx] != 0) == walkable):
+                    continue
+            else:
+                cost = walkable
+
+                if(self.map.cells[idx] == cost):
+                    continue
+
+            self.map.set_cost(r, c, cost)
+
+            if self.goal == None:
+                continue
+
+            # the costs of all the moves from and to the cell changed
+            self.update_vertex(idx)
+            self.update_neighbors(idx)
+
+    def move_start(self, start):
+        """Move the start cell, for example when a unit moved along the path.
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the new start cell
+        """
+        if not self.map.is_inside(start[0], start[1]):
+            raise astar.OutOfBoundsError(start)
+
+        self.km += astar.octile(self.start, start, self.costHor, self.costDia)
+        self.start = start
+        self.startIdx = self.map.cell_index(start[0], start[1])
+
+    def replan(self):
+        """Repair the search after update_cells or move_start and get the new path.
+
+        Returns
+        -------
+        list
+            all the (row, col) tuples making the path. First tuple is start and last one is goal.
+            The list is empty if no path exists.
+        """
+        cells = self.map.cells
+
+        if(cells[self.startIdx] == 0 or cells[self.goalIdx] == 0):
+            return []
+
+        self.compute_shortest_path()
+
+        g = self.g
+
+        if(g.get(self.startIdx, math.inf) == math.inf):
+            return []
+
+        # follow the cheapest neighbors from start to goal
+        path = [self.start]
+        idx = self.startIdx
+
+        while(idx != self.goalIdx):
+            bestIdx = -1
+            bestCost = math.inf
+
+            for offset, cost in self.adjs:
+                adjIdx = idx + offset
+
+                if(cells[adjIdx] == 0):
+                    continue
+
+                adjCost = cost * (cells[idx] + cells[adjIdx]) // 2 + g.get(adjIdx, math.inf)
+
+                if(adjCost < bestCost):
+                    bestCost = adjCost
+                    bestIdx = adjIdx
+
+            if(bestIdx == -1 or len(path) > len(cells)):
+                return []
+
+            idx = bestIdx
+            path.append(self.map.cell_from_index(idx))
+
+        return path
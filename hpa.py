@@ -0,0 +1,434 @@
+import astar
+import heapq
+
+class HierarchicalPathfinder:
+    """Pathfinder that implements the HPA* (Hierarchical Pathfinding A*) search in a map.
+
+    The map is split in square clusters. Entrances are pairs of adjacent walkable cells on the
+    two sides of the border between clusters and they are the nodes of an abstract graph, together
+    with the distances between the entrances of the same cluster computed with astar.Pathfinder.
+    A query searches the small abstract graph first, then it refines only the clusters crossed by
+    the abstract path, one at a time.
+    """
+
+    def __init__(self, map, clusterSize = 16):
+        """
+        Parameters
+        ----------
+        map : astar.Grid or list
+            the map, or a list containing sub-lists reprenting the rows of the map
+        clusterSize : int
+            size in cells of the side of a cluster
+        """
+        self.clusterSize = clusterSize
+
+        # flat pathfinder, used to validate queries and for its connected components
+        self.pf = astar.Pathfinder(map)
+        self.map = self.pf.map
+
+        self.build()
+
+    def build(self):
+        """Split the map in clusters and compute the abstract graph."""
+        self.version = self.map.version
+
+        # one Pathfinder for every cluster, indexed by (row, col) of the cluster
+        self.clusters = dict()
+
+        size = self.clusterSize
+
+        for cr in range((self.map.rows + size - 1) // size):
+            for cc in range((self.map.cols + size - 1) // size):
+                r0, c0, rows, cols = self.cluster_area((cr, cc))
+                self.clusters[(cr, cc)] = astar.Pathfinder(self.map.sub_grid(r0, c0, rows, cols))
+
+        # abstract graph: unique index of an entrance -> list of (index of entrance, cost)
+        self.graph = dict()
+        # unique indices of the entrances of every cluster
+        self.entrances = { cluster : set() for cluster in self.clusters }
+
+        self.find_entrances()
+
+        for cluster in self.clusters:
+            self.connect_entrances(cluster)
+
+    def cluster_of(self, cell):
+        """Get the cluster containing a cell.
+
+        Parameters
+        ----------
+        cell : tuple
+            row,col of the cell
+
+        Returns
+        -------
+        tuple
+            row,col of the cluster
+        """
+        return (cell[0] // self.clusterSize, cell[1] // self.clusterSize)
+
+    def cluster_area(self, cluster):
+        """Get the area of the map covered by a cluster.
+
+        Parameters
+        ----------
+        cluster : tuple
+            row,col of the cluster
+
+        Returns
+        -------
+        tuple
+            first row, first col, number of rows and number of cols of the cluster
+        """
+        r0 = cluster[0] * self.clusterSize
+        c0 = cluster[1] * self.clusterSize
+        rows = min(self.clusterSize, self.map.rows - r0)
+        cols = min(self.clusterSize, self.map.cols - c0)
+
+        return (r0, c0, rows, cols)
+
+    def add_transition(self, cell0, cell1):
+        """Add a pair of entrances connected by a move between two adjacent cells of different clusters.
+
+        Parameters
+        ----------
+        cell0 : tuple
+            row,col of the first cell
+        cell1 : tuple
+            row,col of the second cell
+        """
+        idx0 = self.map.cell_index(cell0[0], cell0[1])
+        idx1 = self.map.cell_index(cell1[0], cell1[1])
+        cost = self.pf.path_cost([cell0, cell1])
+
+        self.graph.setdefault(idx0, []).append((idx1, cost))
+        self.graph.setdefault(idx1, []).append((idx0, cost))
+
+        self.entrances[self.cluster_of(cell0)].add(idx0)
+        self.entrances[self.cluster_of(cell1)].add(idx1)
+
+    def find_entrances(self):
+        """Find the entrances on all the borders between clusters.
+
+        A segment of straight transitions along a border gets one pair of entrances in the middle,
+        or two at its ends when it's 6 cells or longer. Diagonal transitions which are not next to
+        a straight one, including the ones across the corners of clusters, get a pair of entrances too.
+        """
+        walkable = self.map.is_walkable
+        size = self.clusterSize
+
+        # borders between clusters of the same row of clusters, and of the same col of clusters
+        # as (first cell of the border, direction along the border, direction across the border)
+        borders = []
+
+        for c in range(size - 1, self.map.cols - 1, size):
+            for r in range(0, self.map.rows, size):
+                borders.append(((r, c), (1, 0), (0, 1), min(size, self.map.rows - r)))
+
+        for r in range(size - 1, self.map.rows - 1, size):
+            for c in range(0, self.map.cols, size):
+                borders.append(((r, c), (0, 1), (1, 0), min(size, self.map.cols - c)))
+
+        for (r, c), (ar, ac), (xr, xc), length in borders:
+            # straight transitions
+            straight = [walkable(r + i * ar, c + i * ac) and walkable(r + i * ar + xr, c + i * ac + xc)
+                        for i in range(length)]
+
+            i = 0
+
+            while(i < length):
+                if(not straight[i]):
+                    i += 1
+                    continue
+
+                first = i
+
+                while(i < length and straight[i]):
+                    i += 1
+
+                last = i - 1
+
+                if(last - first + 1 < 6):
+                    ends = [(first + last) // 2]
+                else:
+                    ends = [first, last]
+
+                for e in ends:
+                    self.add_transition((r + e * ar, c + e * ac), (r + e * ar + xr, c + e * ac + xc))
+
+            # diagonal transitions inside the border, only where no straight one is next to them
+            for i in range(length - 1):
+                for a, b in ((i, i + 1), (i + 1, i)):
+                    cell0 = (r + a * ar, c + a * ac)
+                    cell1 = (r + b * ar + xr, c + b * ac + xc)
+
+                    if(walkable(cell0[0], cell0[1]) and walkable(cell1[0], cell1[1]) and
+                       not straight[a] and not straight[b]):
+                        self.add_transition(cell0, cell1)
+
+        # diagonal transitions across the corners where 4 clusters meet
+        for r in range(size - 1, self.map.rows - 1, size):
+            for c in range(size - 1, self.map.cols - 1, size):
+                if(walkable(r, c) and walkable(r + 1, c + 1) and
+                   not walkable(r, c + 1) and not walkable(r + 1, c)):
+                    self.add_transition((r, c), (r + 1, c + 1))
+
+                if(walkable(r, c + 1) and walkable(r + 1, c) and
+                   not walkable(r, c) and not walkable(r + 1, c + 1)):
+                    self.add_transition((r, c + 1), (r + 1, c))
+
+    def local_costs(self, cluster, cell, targets):
+        """Compute the costs of the paths inside a cluster from a cell to other cells.
+
+        Parameters
+        ----------
+        cluster : tuple
+            row,col of the cluster
+        cell : tuple
+            row,col of the start cell, in map coordinates
+        targets : list
+            row,col of the destination cells, in map coordinates
+
+        Returns
+        -------
+        list
+            one cost for every target, None when the target can't be reached inside the cluster
+        """
+        r0, c0, rows, cols = self.cluster_area(cluster)
+        pf = self.clusters[cluster]
+
+        paths = pf.make_paths((cell[0] - r0, cell[1] - c0), [(r - r0, c - c0) for r, c in targets])
+
+        return [pf.path_cost(path) if len(path) > 0 else None for path in paths]
+
+    def connect_entrances(self, cluster):
+        """Add to the abstract graph the edges between the entrances of a cluster.
+
+        Parameters
+        ----------
+        cluster : tuple
+            row,col of the cluster
+        """
+        entrances = list(self.entrances[cluster])
+        cells = [self.map.cell_from_index(idx) for idx in entrances]
+
+        for i in range(len(entrances) - 1):
+            costs = self.local_costs(cluster, cells[i], cells[i + 1:])
+
+            for j, cost in enumerate(costs, i + 1):
+                if cost != None:
+                    self.graph[entrances[i]].append((entrances[j], cost))
+                    self.graph[entrances[j]].append((entrances[i], cost))
+
+    def abstract_path(self, start, goal):
+        """Search the abstract graph for a path between two cells.
+
+        Start and goal are connected to the entrances of their cluster only for this search.
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the start cell
+        goal : tuple
+            row,col of the destination cell
+
+        Returns
+        -------
+        list
+            unique indices of the cells of the abstract path, or None if no path is found
+        """
+        startIdx = self.map.cell_index(start[0], start[1])
+        goalIdx = self.map.cell_index(goal[0], goal[1])
+
+        startCluster = self.cluster_of(start)
+        goalCluster = self.cluster_of(goal)
+
+        # edges from start to the entrances of its cluster
+        entrances = list(self.entrances[startCluster])
+        costs = self.local_costs(startCluster, start, [self.map.cell_from_index(idx) for idx in entrances])
+        startEdges = [(idx, cost) for idx, cost in zip(entrances, costs) if cost != None]
+
+        # edges from the entrances of the goal cluster to goal, costs are symmetric
+        entrances = list(self.entrances[goalCluster])
+        targets = [self.map.cell_from_index(idx) for idx in entrances]
+
+        if startCluster == goalCluster:
+            entrances.append(startIdx)
+            targets.append(start)
+
+        costs = self.local_costs(goalCluster, goal, targets)
+        goalEdges = { idx : cost for idx, cost in zip(entrances, costs) if cost != None }
+
+        # A* search on the abstract graph
+        openList = [(self.pf.cost_estimate(start, goal), startIdx)]
+        g = { startIdx : 0 }
+        parent = { startIdx : -1 }
+        closed = set()
+
+        while(len(openList) > 0):
+            f, currIdx = heapq.heappop(openList)
+
+            # stale entry
+            if currIdx in closed:
+                continue
+
+            closed.add(currIdx)
+
+            # goal found -> generate path and return
+            if(currIdx == goalIdx):
+                path = []
+
+                while(currIdx != -1):
+                    path.append(currIdx)
+                    currIdx = parent[currIdx]
+
+                path.reverse()
+
+                return path
+
+            edges = self.graph.get(currIdx, [])
+
+            if(currIdx == startIdx):
+                edges = edges + startEdges
+
+            if(currIdx in goalEdges):
+                edges = edges + [(goalIdx, goalEdges[currIdx])]
+
+            for adjIdx, cost in edges:
+                adjG = g[currIdx] + cost
+
+                if(adjIdx not in closed and adjG < g.get(adjIdx, adjG + 1)):
+                    g[adjIdx] = adjG
+                    parent[adjIdx] = currIdx
+                    h = self.pf.cost_estimate(self.map.cell_from_index(adjIdx), goal)
+                    heapq.heappush(openList, (adjG + h, adjIdx))
+
+        return None
+
+    def refine(self, idx0, idx1):
+        """Compute the cells moving between two consecutive nodes of an abstract path.
+
+        Parameters
+        ----------
+        idx0 : int
+            unique index of the first cell
+        idx1 : int
+            unique index of the second cell
+
+        Returns
+        -------
+        list
+            the (row, col) tuples of the cells after the first one, up to the second one included
+        """
+        cell0 = self.map.cell_from_index(idx0)
+        cell1 = self.map.cell_from_index(idx1)
+
+        cluster = self.cluster_of(cell0)
+
+        # transition between clusters -> adjacent cells
+        if(cluster != self.cluster_of(cell1)):
+            return [cell1]
+
+        r0, c0, rows, cols = self.cluster_area(cluster)
+        path = self.clusters[cluster].make_path((cell0[0] - r0, cell0[1] - c0), (cell1[0] - r0, cell1[1] - c0))
+
+        return [(r + r0, c + c0) for r, c in path[1:]]
+
+    def iter_path(self, start, goal):
+        """Find a path between two cells, refining it lazily one abstract edge at a time.
+
+        Start and goal are validated when iter_path is called, like in make_path.
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the start cell
+        goal : tuple
+            row,col of the destination cell
+
+        Returns
+        -------
+        generator
+            lists of (row, col) tuples which make the path when concatenated.
+            The first list starts with start and the last one ends with goal.
+            Nothing is generated when there's no path.
+        """
+        self.pf.check_cell(start)
+        self.pf.check_cell(goal)
+
+        # start == goal
+        if(start == goal):
+            raise astar.SameStartGoalError(start)
+
+        return self.path_segments(start, goal)
+
+    def path_segments(self, start, goal):
+        """Generator used by iter_path.
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the start cell, already validated
+        goal : tuple
+            row,col of the destination cell, already validated
+
+        Yields
+        ------
+        list
+            the (row, col) tuples of a part of the path, as described in iter_path
+        """
+        # map changed with Grid.set_walkable or Grid.set_cost
+        if(self.version != self.map.version):
+            self.build()
+
+        # start and goal in different components -> no path
+        if(not self.pf.connected(self.map.cell_index(start[0], start[1]), self.map.cell_index(goal[0], goal[1]))):
+            return
+
+        startCluster = self.cluster_of(start)
+        goalCluster = self.cluster_of(goal)
+
+        # close cells -> the flat search is cheap and it avoids detours through the entrances
+        if(abs(startCluster[0] - goalCluster[0]) <= 1 and abs(startCluster[1] - goalCluster[1]) <= 1):
+            yield self.pf.make_path(start, goal)
+            return
+
+        abstract = self.abstract_path(start, goal)
+
+        # the abstract graph should always connect cells of the same component,
+        # the flat search is used if it doesn't
+        if abstract == None:
+            yield self.pf.make_path(start, goal)
+            return
+
+        first = [start]
+
+        for i in range(1, len(abstract)):
+            segment = self.refine(abstract[i - 1], abstract[i])
+
+            if i == 1:
+                segment = first + segment
+
+            yield segment
+
+    def make_path(self, start, goal):
+        """Implementation of the HPA* search.
+
+        Parameters
+        ----------
+        start : tuple
+            row,col of the start cell
+        goal : tuple
+            row,col of the destination cell
+
+        Returns
+        -------
+        list
+            all the (row, col) tuples making the path. First tuple is start and last one is goal.
+        """
+        path = []
+
+        for segment in self.iter_path(start, goal):
+            path.extend(segment)
+
+        return path
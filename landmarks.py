@@ -0,0 +1,246 @@
+from array import array
+import astar
+import copy
+import heapq
+
+class Landmarks:
+    """ALT heuristic: lower bounds of the cost to the goal computed with landmarks and the triangle inequality.
+
+    The exact cost from every landmark to every cell is computed with a Dijkstra search and stored
+    in one array per landmark. For any landmark L the cost from a cell to the goal is at least
+    |cost(L, goal) - cost(L, cell)|, which is much tighter than a geometric distance on maps with
+    many walls. The result is never lower than the octile distance.
+
+    A Landmarks object is a heuristic which can be passed to astar.Pathfinder.set_heuristic.
+    The tables are computed again when the cells of the map are changed with Grid.set_walkable
+    or Grid.set_cost.
+    """
+
+    # estimates are always integers, so the Pathfinder can use a BucketOpenList
+    integer = True
+
+    def __init__(self, map, count = 8, costHor = 10, costDia = 14):
+        """
+        Parameters
+        ----------
+        map : astar.Grid or list
+            the map, or a list containing sub-lists reprenting the rows of the map
+        count : int
+            number of landmarks
+        costHor : int
+            cost of a horizontal or vertical move, it must match the one of the Pathfinder
+        costDia : int
+            cost of a diagonal move, it must match the one of the Pathfinder
+        """
+        if not isinstance(map, astar.Grid):
+            map = astar.Grid.from_list(map)
+
+        self.map = map
+        self.count = count
+        self.costHor = costHor
+        self.costDia = costDia
+
+        self.build()
+
+    def build(self):
+        """Choose the landmarks and compute their tables of costs."""
+        self.version = self.map.version
+
+        # (row, col) of the landmarks and their tables of costs, -1 for unreachable cells
+        self.cells = []
+        self.tables = []
+
+        # cached goal, version of the map and (table, cost of the goal) of the landmarks reaching the goal.
+        # A single tuple is replaced at once, so threads searching different goals never mix them.
+        self.goalData = (None, -1, [])
+
+        cells = self.map.cells
+        size = len(cells)
+        first = next((idx for idx in range(size) if cells[idx] != 0), -1)
+
+        if first == -1:
+            return
+
+        # farthest point selection: every landmark is the cell farthest from the previous ones.
+        # Cells not reached by any landmark come first, ordered by cost from the first walkable cell,
+        # so every connected component gets a landmark.
+        seedCosts = self.costs_from(first)
+
+        # lowest cost from the landmarks of every cell, indexed like the cells, -1 when not reached
+        minCost = array('i', [-1]) * size
+        landmark = max(range(size), key = lambda idx: seedCosts[idx])
+
+        for i in range(self.count):
+            table = self.costs_from(landmark)
+            self.cells.append(self.map.cell_from_index(landmark))
+            self.tables.append(table)
+
+            # update the lowest costs and find the next landmark in the same pass
+            unreached = -1
+            farthest = -1
+
+            for idx in range(size):
+                if(cells[idx] == 0):
+                    continue
+
+                cost = table[idx]
+                lowest = minCost[idx]
+
+                if(cost != -1 and (lowest == -1 or cost < lowest)):
+                    lowest = cost
+                    minCost[idx] = cost
+
+                if(lowest == -1):
+                    if(unreached == -1 or seedCosts[idx] > seedCosts[unreached]):
+                        unreached = idx
+                elif(farthest == -1 or lowest > minCost[farthest]):
+                    farthest = idx
+
+            landmark = unreached if unreached != -1 else farthest
+
+            # all the cells are landmarks already
+            if(minCost[landmark] == 0):
+                break
+
+    def detach(self):
+        """Get a copy of the landmarks without the map, to send them to another process without pickling the map.
+
+        The copy shares the tables and works only after use_map is called with the same cells.
+
+        Returns
+        -------
+        Landmarks
+            the copy without the map
+        """
+        if(self.version != self.map.version):
+            self.build()
+
+        landmarks = copy.copy(self)
+        landmarks.map = None
+        landmarks.goalData = (None, -1, [])
+
+        return landmarks
+
+    def use_map(self, map):
+        """Use the tables on another Grid with the same cells, like a copy in shared memory.
+
+        Parameters
+        ----------
+        map : astar.Grid
+            the map with the cells the tables were computed for
+        """
+        self.map = map
+        self.version = map.version
+        self.goalData = (None, -1, [])
+
+    def costs_from(self, sourceIdx):
+        """Compute the cost from a cell to all the cells of the map with a Dijkstra search.
+
+        A move costs like in astar.Pathfinder, the cost of the direction times the average cost of the 2 cells.
+
+        Parameters
+        ----------
+        sourceIdx : int
+            unique index of the source cell
+
+        Returns
+        -------
+        array
+            cost of every cell indexed by unique index, -1 for unreachable cells
+        """
+        cells = self.map.cells
+        stride = self.map.stride
+
+        adjs = []
+
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                if dr != 0 or dc != 0:
+                    adjs.append((dr * stride + dc, self.costDia if dr != 0 and dc != 0 else self.costHor))
+
+        costs = array('i', [-1]) * len(cells)
+        costs[sourceIdx] = 0
+        queue = [(0, sourceIdx)]
+
+        while(len(queue) > 0):
+            cost, idx = heapq.heappop(queue)
+
+            # stale entry
+            if(cost > costs[idx]):
+                continue
+
+            for offset, adjCost in adjs:
+                adjIdx = idx + offset
+
+                if(cells[adjIdx] == 0):
+                    continue
+
+                # same cost of a move of the search engines
+                newCost = cost + adjCost * (cells[idx] + cells[adjIdx]) // 2
+
+                if(costs[adjIdx] == -1 or newCost < costs[adjIdx]):
+                    costs[adjIdx] = newCost
+                    heapq.heappush(queue, (newCost, adjIdx))
+
+        return costs
+
+    def set_goal(self, goal):
+        """Cache the costs of the goal from the landmarks, rebuilding the tables if the map changed.
+
+        Parameters
+        ----------
+        goal : tuple
+            row,col of the destination cell
+
+        Returns
+        -------
+        tuple
+            the new cached data of the goal
+        """
+        if(self.version != self.map.version):
+            self.build()
+
+        goalIdx = self.map.cell_index(goal[0], goal[1])
+        goalCosts = [(table, table[goalIdx]) for table in self.tables if table[goalIdx] != -1]
+
+        self.goalData = (goal, self.version, goalCosts)
+
+        return self.goalData
+
+    def __call__(self, src, goal, costHor, costDia):
+        """Compute the lower bound of the cost from src to goal.
+
+        Parameters
+        ----------
+        src : tuple
+            row,col of the current cell
+        goal : tuple
+            row,col of the destination cell
+        costHor : int
+            cost of a horizontal or vertical move
+        costDia : int
+            cost of a diagonal move
+
+        Returns
+        -------
+        int
+            lower bound of the cost of moving from src to goal
+        """
+        goalData = self.goalData
+
+        if(goalData[0] != goal or goalData[1] != self.map.version):
+            goalData = self.set_goal(goal)
+
+        best = astar.octile(src, goal, costHor, costDia)
+        idx = (src[0] + 1) * self.map.stride + src[1] + 1
+
+        for table, goalCost in goalData[2]:
+            h = goalCost - table[idx]
+
+            if(h < 0):
+                h = -h
+
+            if(h > best):
+                best = h
+
+        return best
@@ -0,0 +1,394 @@
+import astar
+import mmap
+import struct
+import zlib
+
+# translation table from the characters of a map file to the values of the cells of a Grid
+# '#' = unwalkable cell, '\n' and '\r' = border, '1'-'9' = walkable cell with that terrain cost,
+# anything else = walkable cell with terrain cost 1
+MAP_TABLE = bytearray(b'\x01' * 256)
+MAP_TABLE[0] = 0
+MAP_TABLE[ord('#')] = 0
+MAP_TABLE[ord('\n')] = 0
+MAP_TABLE[ord('\r')] = 0
+
+for cost in range(1, 10):
+    MAP_TABLE[ord(str(cost))] = cost
+
+MAP_TABLE = bytes(MAP_TABLE)
+
+# translation table from the values of the cells of a Grid to the characters of a map file,
+# costs higher than 9 can't be represented and they are written as 9
+STR_TABLE = bytes([ord('#'), ord(' ')] + [ord(str(cost)) for cost in range(2, 10)] + [ord('9')] * 246)
+
+# binary map file: a header followed by the cells of the map
+BINARY_MAGIC = b'PFMP'
+BINARY_VERSION = 1
+
+# little endian header: magic, version, encoding, reserved, rows, cols, CRC-32 of the cells
+BINARY_HEADER = struct.Struct('<4sBBHIII')
+
+# encodings of the cells of a binary map, the index is the value stored in the header.
+# "grid" = one byte per cell with the same layout of the buffer of a Grid, border included,
+# so the file is used by the Grid without copies.
+# "bits" = one bit per cell without border, 1 for walkable cells, only for maps without terrain costs.
+BINARY_ENCODINGS = ("grid", "bits")
+
+# translation table from the characters of a MovingAI map file to the values of the cells of a Grid,
+# '.' and 'G' = ground, 'S' = swamp, all the other terrains are unwalkable
+MOVINGAI_TABLE = bytearray(256)
+MOVINGAI_TABLE[ord('.')] = 1
+MOVINGAI_TABLE[ord('G')] = 1
+MOVINGAI_TABLE[ord('S')] = 1
+MOVINGAI_TABLE = bytes(MOVINGAI_TABLE)
+
+# translation tables extracting one bit of every byte, from the most significant one
+BIT_TABLES = [bytes((value >> (7 - bit)) & 1 for value in range(256)) for bit in range(8)]
+
+# translation tables moving the value of a walkable cell (1) to one bit of a byte
+PACK_TABLES = [bytes([0] + [1 << (7 - bit)] * 255) for bit in range(8)]
+
+def load_map(fileName):
+    """Load a text or binary map file into a Grid.
+
+    A text file is memory-mapped and copied into the buffer of the Grid with a single copy,
+    then all the characters are converted to cell values with a single translation.
+    Binary files are detected from their header and loaded with load_binary_map,
+    tile store files with tilestore.load_tile_store and MovingAI maps with load_movingai_map.
+
+    Parameters
+    ----------
+    fileName : str
+        path of the map file
+
+    Returns
+    -------
+    astar.Grid
+        the map loaded from the file
+    """
+    with open(fileName, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        # mmap can't map empty files
+        except ValueError:
+            raise MapFileError(fileName, "empty map")
+
+    if data[:len(BINARY_MAGIC)] == BINARY_MAGIC:
+        data.close()
+        return load_binary_map(fileName)
+
+    if data[:len(b'type ')] == b'type ':
+        data.close()
+        return load_movingai_map(fileName)
+
+    # imported here because tilestore uses this module
+    import tilestore
+
+    if data[:len(tilestore.TILES_MAGIC)] == tilestore.TILES_MAGIC:
+        data.close()
+        return tilestore.load_tile_store(fileName)
+
+    with data:
+        # the line endings at the end of the file are not empty rows
+        end = len(data)
+
+        while(end > 0 and data[end - 1] in b'\r\n'):
+            end -= 1
+
+        cols = data.find(b'\n', 0, end)
+
+        # single line
+        if cols == -1:
+            cols = end
+
+        if cols == 0:
+            raise MapFileError(fileName, "empty map")
+
+        # every line is cols characters + '\n' -> same layout of the Grid, single copy
+        rows = (end + 1) // (cols + 1)
+        newlines = data[cols:end:cols + 1]
+
+        if(rows * (cols + 1) == end + 1 and newlines.count(b'\n') == len(newlines)
+           and data.rfind(b'\r', 0, cols) == -1):
+            grid = astar.Grid(rows, cols, bytearray(astar.Grid.buffer_size(rows, cols)))
+            start = grid.cell_index(0, 0)
+            grid.cells[start:start + end] = data[:end]
+
+        # lines of different length or "\r\n" line endings -> copy one row at a time
+        else:
+            lines = data[:end].splitlines()
+            rows = len(lines)
+            cols = len(lines[0])
+
+            grid = astar.Grid(rows, cols, bytearray(astar.Grid.buffer_size(rows, cols)))
+
+            for r in range(rows):
+                line = lines[r][:cols]
+                start = grid.cell_index(r, 0)
+                grid.cells[start:start + len(line)] = line
+
+    grid.cells = grid.cells.translate(MAP_TABLE)
+
+    return grid
+
+def map_to_str(grid):
+    """Convert a Grid to the text of a map file.
+
+    Parameters
+    ----------
+    grid : astar.Grid
+        the map to convert
+
+    Returns
+    -------
+    str
+        one line per row of the map, ' ' is a walkable cell, '#' is an unwalkable cell
+        and a digit from '2' to '9' is a walkable cell with that terrain cost
+    """
+    start = grid.cell_index(0, 0)
+    data = bytearray(grid.cells[start:start + grid.rows * grid.stride])
+
+    # every border cell before a row becomes the '\n' of the previous row
+    data = data.translate(STR_TABLE)
+    data[grid.cols::grid.stride] = b'\n' * grid.rows
+
+    return data.decode('ascii')
+
+def load_movingai_map(fileName):
+    """Load a map file in the format of the MovingAI benchmarks into a Grid.
+
+    The file is a header made of the lines "type octile", "height H", "width W" and "map",
+    followed by H lines of W characters.
+
+    Parameters
+    ----------
+    fileName : str
+        path of the map file
+
+    Returns
+    -------
+    astar.Grid
+        the map loaded from the file
+    """
+    with open(fileName, 'rb') as f:
+        lines = f.read().splitlines()
+
+    header = dict()
+    rows = 0
+
+    # header lines until "map"
+    for line in lines:
+        rows += 1
+        words = line.split()
+
+        if words == [b'map']:
+            break
+
+        if len(words) == 2:
+            header[words[0]] = words[1]
+    else:
+        raise MapFileError(fileName, "missing map section")
+
+    try:
+        height = int(header[b'height'])
+        width = int(header[b'width'])
+    except (KeyError, ValueError):
+        raise MapFileError(fileName, "missing or wrong size of the map")
+
+    lines = lines[rows:rows + height]
+
+    if height <= 0 or width <= 0 or len(lines) != height:
+        raise MapFileError(fileName, "wrong size of the map")
+
+    grid = astar.Grid(height, width, bytearray(astar.Grid.buffer_size(height, width)))
+
+    for r in range(height):
+        line = lines[r][:width]
+        start = grid.cell_index(r, 0)
+        grid.cells[start:start + len(line)] = line.translate(MOVINGAI_TABLE)
+
+    return grid
+
+def save_map(grid, fileName, fileFormat = "text"):
+    """Save a Grid to a map file.
+
+    Parameters
+    ----------
+    grid : astar.Grid
+        the map to save
+    fileName : str
+        path of the map file
+    fileFormat : str
+        "text", one of BINARY_ENCODINGS for a binary map or "tiles" for a tile store
+    """
+    if fileFormat == "text":
+        with open(fileName, 'w') as f:
+            f.write(map_to_str(grid))
+
+    elif fileFormat == "tiles":
+        # imported here because tilestore uses this module
+        import tilestore
+
+        tilestore.save_tile_store(fileName, grid.rows, grid.cols, tilestore.grid_rows(grid))
+
+    else:
+        save_binary_map(grid, fileName, fileFormat)
+
+def save_binary_map(grid, fileName, encoding = "grid"):
+    """Save a Grid to a binary map file.
+
+    Parameters
+    ----------
+    grid : astar.Grid
+        the map to save
+    fileName : str
+        path of the map file
+    encoding : str
+        encoding of the cells, one of BINARY_ENCODINGS.
+        "bits" is 8 times smaller than "grid", but it can't be loaded without copies
+        and it can't store terrain costs.
+    """
+    if encoding not in BINARY_ENCODINGS:
+        raise ValueError("unknown encoding: {}".format(encoding))
+
+    if encoding == "grid":
+        payload = grid.cells
+    else:
+        if not grid.is_uniform():
+            raise ValueError("the encoding bits can't store terrain costs")
+
+        # cells of the map without border, padded to a whole number of bytes
+        start = grid.cell_index(0, 0)
+        data = bytearray(grid.cells[start:start + grid.rows * grid.stride])
+        del data[grid.cols::grid.stride]
+        data.extend(bytes(-len(data) % 8))
+
+        # every bit of a byte comes from a different slice of cells, all the bits are disjoint
+        packed = 0
+
+        for bit in range(8):
+            packed |= int.from_bytes(data[bit::8].translate(PACK_TABLES[bit]), 'big')
+
+        payload = packed.to_bytes(len(data) // 8, 'big')
+
+    header = BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, BINARY_ENCODINGS.index(encoding), 0,
+                                grid.rows, grid.cols, zlib.crc32(payload))
+
+    with open(fileName, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+
+def load_binary_map(fileName, verify = True):
+    """Load a binary map file into a Grid.
+
+    The file is memory-mapped copy-on-write. With the encoding "grid" the Grid uses the mapped
+    file as buffer, so no cell is copied and only the pages changed with Grid.set_walkable
+    or Grid.set_cost take memory.
+
+    Parameters
+    ----------
+    fileName : str
+        path of the map file
+    verify : bool
+        when True the checksum of the cells is verified
+
+    Returns
+    -------
+    astar.Grid
+        the map loaded from the file
+    """
+    with open(fileName, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_COPY)
+        # mmap can't map empty files
+        except ValueError:
+            raise MapFileError(fileName, "empty map")
+
+    payload = None
+
+    # the mapped file is released when the map is not valid
+    try:
+        if len(data) < BINARY_HEADER.size:
+            raise MapFileError(fileName, "truncated header")
+
+        magic, version, encoding, reserved, rows, cols, checksum = BINARY_HEADER.unpack_from(data)
+
+        if magic != BINARY_MAGIC:
+            raise MapFileError(fileName, "not a binary map")
+
+        if version != BINARY_VERSION:
+            raise MapFileError(fileName, "unsupported version {}".format(version))
+
+        if encoding >= len(BINARY_ENCODINGS):
+            raise MapFileError(fileName, "unknown encoding {}".format(encoding))
+
+        if rows == 0 or cols == 0:
+            raise MapFileError(fileName, "empty map")
+
+        payload = memoryview(data)[BINARY_HEADER.size:]
+
+        if verify and zlib.crc32(payload) != checksum:
+            raise MapFileError(fileName, "wrong checksum")
+
+        if BINARY_ENCODINGS[encoding] == "grid":
+            size = astar.Grid.buffer_size(rows, cols)
+
+            if len(payload) != size:
+                raise MapFileError(fileName, "wrong size of the cells")
+
+            grid = astar.Grid(rows, cols, payload)
+
+            # searches don't check bounds, so the border must be made of unwalkable cells
+            stride = grid.stride
+            border = bytes(payload[:stride + 1]) + bytes(payload[stride::stride]) + bytes(payload[-stride - 1:])
+
+            if border.count(0) != len(border):
+                raise MapFileError(fileName, "walkable cells in the border")
+
+            return grid
+
+        if len(payload) != (rows * cols + 7) // 8:
+            raise MapFileError(fileName, "wrong size of the cells")
+
+    except MapFileError:
+        if payload != None:
+            payload.release()
+
+        data.close()
+        raise
+
+    packed = payload.tobytes()
+    payload.release()
+    data.close()
+
+    # one slice of cells for every bit of the bytes
+    data = bytearray(len(packed) * 8)
+
+    for bit in range(8):
+        data[bit::8] = packed.translate(BIT_TABLES[bit])
+
+    grid = astar.Grid(rows, cols, bytearray(astar.Grid.buffer_size(rows, cols)))
+
+    for r in range(rows):
+        start = grid.cell_index(r, 0)
+        grid.cells[start:start + cols] = data[r * cols:(r + 1) * cols]
+
+    return grid
+
+class MapFileError(Exception):
+    """Exception raised when a map file can't be loaded."""
+
+    def __init__(self, fileName, reason):
+        """
+        Parameters
+        ----------
+        fileName : str
+            path of the map file
+        reason : str
+            description of the error
+        """
+        self.fileName = fileName
+        self.reason = reason
+
+    def __str__(self):
+        return "Can't load map {}: {}".format(self.fileName, self.reason)
@@ -0,0 +1,291 @@
+import astar
+import random
+
+# kinds of map created by generate
+MAP_TYPES = ("maze", "random", "rooms", "open")
+
+# translation table from a random byte to a random bit
+HALF_TABLE = bytes([0] * 128 + [1] * 128)
+
+def walls_grid(rows, cols):
+    """Create a Grid made only of unwalkable cells.
+
+    Parameters
+    ----------
+    rows : int
+        number of rows of the map
+    cols : int
+        number of cols of the map
+
+    Returns
+    -------
+    astar.Grid
+        the new map
+    """
+    return astar.Grid(rows, cols, bytearray(astar.Grid.buffer_size(rows, cols)))
+
+def random_map(rows, cols, density = 0.3, seed = 0):
+    """Create a map with unwalkable cells placed at random.
+
+    Parameters
+    ----------
+    rows : int
+        number of rows of the map
+    cols : int
+        number of cols of the map
+    density : float
+        probability of a cell to be unwalkable, from 0 to 1
+    seed : int
+        seed of the random generator, the same seed always creates the same map
+
+    Returns
+    -------
+    astar.Grid
+        the new map
+    """
+    rng = random.Random(seed)
+    grid = walls_grid(rows, cols)
+
+    # a random byte lower than the threshold is a wall
+    threshold = min(256, max(0, round(density * 256)))
+    table = bytes([0] * threshold + [1] * (256 - threshold))
+
+    # all the rows at once, the border cell after every row is set back to 0
+    data = bytearray(rng.randbytes(rows * grid.stride).translate(table))
+    data[cols::grid.stride] = bytes(rows)
+
+    start = grid.cell_index(0, 0)
+    grid.cells[start:start + len(data)] = data
+
+    return grid
+
+def open_map(rows, cols, density = 0.05, maxSize = 16, seed = 0):
+    """Create an open field with a few rectangular obstacles.
+
+    Parameters
+    ----------
+    rows : int
+        number of rows of the map
+    cols : int
+        number of cols of the map
+    density : float
+        fraction of the map covered by obstacles, ignoring their overlaps
+    maxSize : int
+        maximum number of rows and cols of an obstacle
+    seed : int
+        seed of the random generator, the same seed always creates the same map
+
+    Returns
+    -------
+    astar.Grid
+        the new map
+    """
+    rng = random.Random(seed)
+    grid = astar.Grid(rows, cols)
+
+    covered = 0
+    target = density * rows * cols
+
+    while(covered < target):
+        h = rng.randint(1, min(maxSize, rows))
+        w = rng.randint(1, min(maxSize, cols))
+        r0 = rng.randrange(rows - h + 1)
+        c0 = rng.randrange(cols - w + 1)
+
+        for r in range(r0, r0 + h):
+            start = grid.cell_index(r, c0)
+            grid.cells[start:start + w] = bytes(w)
+
+        covered += h * w
+
+    return grid
+
+def maze_map(rows, cols, corridor = 1, seed = 0):
+    """Create a perfect maze, with one path only between any two cells, using the sidewinder algorithm.
+
+    The maze is made of corridors and walls of the same width. Rows and cols which can't
+    contain a whole corridor are unwalkable.
+
+    Parameters
+    ----------
+    rows : int
+        number of rows of the map
+    cols : int
+        number of cols of the map
+    corridor : int
+        width of corridors and walls
+    seed : int
+        seed of the random generator, the same seed always creates the same map
+
+    Returns
+    -------
+    astar.Grid
+        the new map
+    """
+    rng = random.Random(seed)
+
+    # cells of the maze, every one surrounded by walls
+    h = (rows // corridor - 1) // 2
+    w = (cols // corridor - 1) // 2
+
+    if h < 1 or w < 1:
+        raise ValueError("map too small for a maze with corridors of {} cells".format(corridor))
+
+    # maze with corridors and walls of 1 cell, scaled at the end
+    unitRows = 2 * h + 1
+    unitCols = 2 * w + 1
+    unit = bytearray(unitRows * unitCols)
+
+    for i in range(h):
+        rowStart = (2 * i + 1) * unitCols
+        unit[rowStart + 1:rowStart + unitCols:2] = b'\x01' * w
+
+        # passages to the east, always open in the first row
+        if i == 0:
+            east = b'\x01' * (w - 1)
+        else:
+            east = rng.randbytes(w - 1).translate(HALF_TABLE)
+
+        unit[rowStart + 2:rowStart + unitCols - 1:2] = east
+
+        if i == 0:
+            continue
+
+        # every run of cells joined to the east gets one passage to the north
+        northStart = 2 * i * unitCols
+        first = 0
+
+        for run in east.split(b'\x00'):
+            size = len(run) + 1
+            unit[northStart + 2 * (first + rng.randrange(size)) + 1] = 1
+            first += size
+
+    grid = walls_grid(rows, cols)
+    scaled = bytearray(unitCols * corridor)
+
+    for r in range(unitRows):
+        for i in range(corridor):
+            scaled[i::corridor] = unit[r * unitCols:(r + 1) * unitCols]
+
+        for i in range(corridor):
+            start = grid.cell_index(r * corridor + i, 0)
+            grid.cells[start:start + len(scaled)] = scaled
+
+    return grid
+
+def rooms_map(rows, cols, minRoom = 4, maxRoom = 16, loops = 0.25, seed = 0):
+    """Create a map of rooms connected by corridors.
+
+    The map is split in square sectors with one room each. Every room is connected to the room
+    on its right and the rooms of the first col to the room below, so all the rooms are connected.
+    The other rooms are connected to the room below with probability loops, which creates alternative paths.
+
+    Parameters
+    ----------
+    rows : int
+        number of rows of the map
+    cols : int
+        number of cols of the map
+    minRoom : int
+        minimum number of rows and cols of a room
+    maxRoom : int
+        maximum number of rows and cols of a room
+    loops : float
+        probability of the extra connections, from 0 to 1
+    seed : int
+        seed of the random generator, the same seed always creates the same map
+
+    Returns
+    -------
+    astar.Grid
+        the new map
+    """
+    rng = random.Random(seed)
+    grid = walls_grid(rows, cols)
+    stride = grid.stride
+
+    # sectors with a border of walls around the biggest room
+    sector = maxRoom + 2
+    sectorRows = max(1, rows // sector)
+    sectorCols = max(1, cols // sector)
+
+    # center of the room of every sector
+    centers = []
+
+    for sr in range(sectorRows):
+        for sc in range(sectorCols):
+            h = min(rng.randint(minRoom, maxRoom), rows)
+            w = min(rng.randint(minRoom, maxRoom), cols)
+            r0 = min(sr * sector + rng.randint(1, sector - h - 1), rows - h)
+            c0 = min(sc * sector + rng.randint(1, sector - w - 1), cols - w)
+
+            for r in range(r0, r0 + h):
+                start = grid.cell_index(r, c0)
+                grid.cells[start:start + w] = b'\x01' * w
+
+            centers.append((r0 + h // 2, c0 + w // 2))
+
+    def corridor(src, dst):
+        # L-shaped corridor, horizontal or vertical part first at random
+        (r0, c0), (r1, c1) = src, dst
+        corner = (r0, c1) if rng.random() < 0.5 else (r1, c0)
+
+        for (ra, ca), (rb, cb) in ((src, corner), (corner, dst)):
+            if ra == rb:
+                start = grid.cell_index(ra, min(ca, cb))
+                grid.cells[start:start + abs(cb - ca) + 1] = b'\x01' * (abs(cb - ca) + 1)
+            else:
+                start = grid.cell_index(min(ra, rb), ca)
+                grid.cells[start:start + abs(rb - ra) * stride + 1:stride] = b'\x01' * (abs(rb - ra) + 1)
+
+    for sr in range(sectorRows):
+        for sc in range(sectorCols):
+            i = sr * sectorCols + sc
+
+            if sc + 1 < sectorCols:
+                corridor(centers[i], centers[i + 1])
+
+            if sr + 1 < sectorRows and (sc == 0 or rng.random() < loops):
+                corridor(centers[i], centers[i + sectorCols])
+
+    return grid
+
+def generate(mapType, rows, cols, seed = 0, density = None, corridor = 1):
+    """Create a map of one of the types of MAP_TYPES.
+
+    Parameters
+    ----------
+    mapType : str
+        one of MAP_TYPES: "maze", "random", "rooms" or "open"
+    rows : int
+        number of rows of the map
+    cols : int
+        number of cols of the map
+    seed : int
+        seed of the random generator, the same seed always creates the same map
+    density : float
+        density of the obstacles of "random" and "open" maps, None for the default one
+    corridor : int
+        width of the corridors of a "maze" map
+
+    Returns
+    -------
+    astar.Grid
+        the new map
+    """
+    if rows <= 0 or cols <= 0:
+        raise ValueError("wrong size of the map: {}x{}".format(rows, cols))
+
+    if mapType == "maze":
+        return maze_map(rows, cols, corridor, seed)
+
+    if mapType == "random":
+        return random_map(rows, cols, 0.3 if density == None else density, seed)
+
+    if mapType == "rooms":
+        return rooms_map(rows, cols, seed = seed)
+
+    if mapType == "open":
+        return open_map(rows, cols, 0.05 if density == None else density, seed = seed)
+
+    raise ValueError("Unknown map type: {}".format(mapType))
@@ -0,0 +1,201 @@
+from array import array
+from multiprocessing import shared_memory
+import astar
+import landmarks
+import multiprocessing
+
+# Pathfinder of a worker process, created by init_worker
+workerPf = None
+# shared memory of a worker process, kept open while the Pathfinder uses it
+workerShm = None
+
+def init_worker(shmName, rows, cols, engine, heuristic, weight, memoryLimit, openList = "auto"):
+    """Initialize a worker process, creating a Pathfinder on the Grid in shared memory.
+
+    Parameters
+    ----------
+    shmName : str
+        name of the shared memory containing the cells of the Grid
+    rows : int
+        number of rows of the map
+    cols : int
+        number of cols of the map
+    engine : str
+        search engine of the Pathfinder
+    heuristic : str or callable
+        heuristic of the Pathfinder, a callable must be picklable.
+        landmarks.Landmarks are received without their map and use the Grid in shared memory.
+    weight : float
+        weight of the heuristic
+    memoryLimit : int
+        maximum number of cells kept in memory by the "sma" engine
+    openList : str
+        implementation of the open list, one of the keys of astar.OPEN_LISTS or "auto"
+    """
+    global workerPf, workerShm
+
+    workerShm = shared_memory.SharedMemory(name = shmName)
+    cells = workerShm.buf[:astar.Grid.buffer_size(rows, cols)]
+
+    workerPf = astar.Pathfinder(astar.Grid(rows, cols, cells))
+
+    if isinstance(heuristic, landmarks.Landmarks):
+        heuristic.use_map(workerPf.map)
+
+    workerPf.set_engine(engine)
+    workerPf.set_heuristic(heuristic, weight)
+    workerPf.set_memory_limit(memoryLimit)
+    workerPf.set_open_list(openList)
+
+def solve_chunk(queries):
+    """Find the paths of a list of queries in a worker process.
+
+    Parameters
+    ----------
+    queries : list
+        (start, goal) tuples
+
+    Returns
+    -------
+    tuple
+        two arrays: the offsets of the paths and the cells of all the paths as in BatchResult.
+        Queries with an invalid start or goal get an empty path like the ones without a path.
+    """
+    cols = workerPf.mapCols
+
+    offsets = array('l', [0])
+    cells = array('l')
+
+    for start, goal in queries:
+        try:
+            path = workerPf.make_path(start, goal)
+        except (astar.OutOfBoundsError, astar.UnwalkableError, astar.SameStartGoalError):
+            path = []
+
+        for r, c in path:
+            cells.append(r * cols + c)
+
+        offsets.append(len(cells))
+
+    return (offsets, cells)
+
+class BatchResult:
+    """Paths found by solve_batch, stored in two compact arrays.
+
+    The cells of path i are cells[offsets[i]:offsets[i + 1]], every cell stored as row * cols + col.
+    """
+
+    def __init__(self, cols, offsets, cells):
+        """
+        Parameters
+        ----------
+        cols : int
+            number of cols of the map
+        offsets : array
+            position of the first cell of every path in cells, plus the total number of cells
+        cells : array
+            the cells of all the paths
+        """
+        self.cols = cols
+        self.offsets = offsets
+        self.cells = cells
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def path(self, i):
+        """Get a path in the same format returned by astar.Pathfinder.make_path.
+
+        Parameters
+        ----------
+        i : int
+            index of the query
+
+        Returns
+        -------
+        list
+            all the (row, col) tuples making the path, empty if no path was found
+        """
+        return [divmod(cell, self.cols) for cell in self.cells[self.offsets[i]:self.offsets[i + 1]]]
+
+    def paths(self):
+        """Get all the paths.
+
+        Returns
+        -------
+        list
+            one path for every query, in the same order of the queries
+        """
+        return [self.path(i) for i in range(len(self))]
+
+def solve_batch(map, queries, processes = None, engine = "astar", heuristic = "octile", weight = 1, chunkSize = 256,
+                memoryLimit = astar.DEFAULT_MEMORY_LIMIT, openList = "auto"):
+    """Find the paths of a list of queries with a pool of processes.
+
+    The cells of the map are copied once in shared memory and every worker process creates
+    its own Pathfinder on them, so the map is never pickled. A landmarks.Landmarks heuristic
+    is sent without its map, so only its tables are copied in every worker.
+    A lazy map like tilestore.TiledGrid is not supported, because copying it would load all the cells.
+
+    Parameters
+    ----------
+    map : astar.Grid or list
+        the map, or a list containing sub-lists reprenting the rows of the map
+    queries : list
+        (start, goal) tuples
+    processes : int
+        number of worker processes, None to use all the CPUs
+    engine : str
+        search engine of the Pathfinder
+    heuristic : str or callable
+        heuristic of the Pathfinder, a callable must be picklable
+    weight : float
+        weight of the heuristic
+    chunkSize : int
+        number of queries sent to a worker in a single task
+    memoryLimit : int
+        maximum number of cells kept in memory by the "sma" engine of every worker
+    openList : str
+        implementation of the open list, one of the keys of astar.OPEN_LISTS or "auto"
+
+    Returns
+    -------
+    BatchResult
+        the paths of the queries, in the same order, empty for the queries with an invalid start or goal
+
+    Raises
+    ------
+    ValueError
+        if the map is lazy
+    """
+    if not isinstance(map, astar.Grid):
+        map = astar.Grid.from_list(map)
+
+    if map.lazy:
+        raise ValueError("A map loaded on demand can't be shared with the worker processes")
+
+    if isinstance(heuristic, landmarks.Landmarks):
+        heuristic = heuristic.detach()
+
+    shm = shared_memory.SharedMemory(create = True, size = len(map.cells))
+
+    try:
+        shm.buf[:len(map.cells)] = map.cells
+
+        chunks = [queries[i:i + chunkSize] for i in range(0, len(queries), chunkSize)]
+        initArgs = (shm.name, map.rows, map.cols, engine, heuristic, weight, memoryLimit, openList)
+
+        offsets = array('l', [0])
+        cells = array('l')
+
+        with multiprocessing.Pool(processes, init_worker, initArgs) as pool:
+            for chunkOffsets, chunkCells in pool.imap(solve_chunk, chunks):
+                base = len(cells)
+                offsets.extend(base + offset for offset in chunkOffsets[1:])
+                cells.extend(chunkCells)
+
+        return BatchResult(map.cols, offsets, cells)
+
+    finally:
+        shm.close()
+        shm.unlink()
@@ -1,4 +1,7 @@
+import argparse
 import astar
+import dstarlite
+import mapfile
 import pygame
 import sys
 
@@ -13,8 +16,8 @@ class VisualTilemap:
             size of a cell of the map
         win : pygame.Surface
             target surface for rendering
-        map : list
-            map made of 0 and 1 representing walkable and unwalkable cells
+        map : astar.Grid
+            map made of walkable and unwalkable cells
         """
         self.SIZE_CELL = cellSize
         self.SIZE_BORDER = 1
@@ -24,8 +27,8 @@ class VisualTilemap:
         self.winW, self.winH = win.get_size()
 
         self.map = map
-        self.mapRows = len(map)
-        self.mapCols = len(map[0])
+        self.mapRows = map.rows
+        self.mapCols = map.cols
 
         self.mapW = self.mapCols * self.SIZE_CELL
         self.mapH = self.mapRows * self.SIZE_CELL
@@ -48,7 +51,7 @@ class VisualTilemap:
             True if the cell is walkable, False otherwise
         """
         r, c = cell
-        return map[r][c] == 1
+        return self.map.is_walkable(r, c)
 
     def is_point_inside(self, point):
         """Check if a point is inside the map.
@@ -102,9 +105,9 @@ class VisualTilemap:
             for c in range(self.mapCols):
                 cellX = self.mapX0 + (c * self.SIZE_CELL) + self.SIZE_BORDER
 
-                if(map[r][c] == 1):
+                if(self.map.is_walkable(r, c)):
                     win.fill(colorWalk, (cellX, cellY, self.SIZE_INCELL, self.SIZE_INCELL))
-                elif(map[r][c] == 0):
+                else:
                     win.fill(colorUnwalk, (cellX, cellY, self.SIZE_INCELL, self.SIZE_INCELL))
 
     def draw_cell(self, cell, color):
@@ -123,38 +126,19 @@ class VisualTilemap:
         self.win.fill(color, (cellX, cellY, self.SIZE_INCELL, self.SIZE_INCELL))
 
 if __name__ == "__main__":
-    argc = len(sys.argv)
-
-    if argc != 2 and argc != 3:
-        print("USAGE: python {0} file.map [CELL_SIZE]".format(sys.argv[0]))
-        sys.exit(1)
-
-    # read map file
-    with open(sys.argv[1], 'r') as f:
-        fdata = f.readlines()
-
-    # convert map file to usable format
-    # 1 = walkable cell
-    # 0 = unwalkable cell
-    fRows = len(fdata)
-
-    if(fRows == 0):
-        print("ERROR empty map")
+    parser = argparse.ArgumentParser(description = "Find paths in a map using pygame.")
+    parser.add_argument("map", help = "map file")
+    parser.add_argument("cellSize", nargs = "?", type = int, default = 30, help = "size of a cell in pixels")
+    parser.add_argument("-e", "--engine", choices = astar.ENGINES, default = "astar", help = "search engine")
+    args = parser.parse_args()
+
+    # load map file
+    try:
+        map = mapfile.load_map(args.map)
+    except mapfile.MapFileError as err:
+        print("ERROR - {}".format(err))
         sys.exit(1)
 
-    # skip last column of '\n'
-    fCols = len(fdata[0]) - 1
-
-    map = []
-
-    for r in range(fRows):
-        map.append([1] * fCols)
-
-    for r in range(fRows):
-        for c in range(fCols):
-            if(fdata[r][c] == '#'):
-                map[r][c] = 0
-
     # set up pygame
     pygame.init()
 
@@ -169,9 +153,7 @@ if __name__ == "__main__":
     print("Window size: {0}x{1}".format(winSize[0], winSize[1]))
 
     # render map
-    sizeCell = 30
-    if argc == 3:
-        sizeCell = int(sys.argv[2])
+    sizeCell = args.cellSize
     print("Cell size: {0}x{1}".format(sizeCell, sizeCell))
 
     COLOR_BG = (33, 33, 33)
@@ -181,6 +163,8 @@ if __name__ == "__main__":
     COLOR_GOAL = (0, 230, 118)
     COLOR_PATH = (255, 245, 157)
     COLOR_NOPATH = (239, 83, 80)
+    COLOR_OPEN = (200, 230, 201)
+    COLOR_CLOSED = (178, 223, 219)
 
     vmap = VisualTilemap(sizeCell, win, map)
 
@@ -189,14 +173,24 @@ if __name__ == "__main__":
 
     # init scene
     pf = astar.Pathfinder(map)
+    pf.set_engine(args.engine)
+
+    # incremental planner used to repair the path when walls are edited
+    planner = dstarlite.DStarLite(map)
 
     start = None
     goal = None
+    path = []
     pathIdx = -1
     animating = False
     animCounter = 0
     FRAMES_TO_SKIP = 4
 
+    # search drawn while it runs, only with the A* engine
+    search = None
+    searchedCells = []
+    EXPANSIONS_PER_FRAME = 8
+
     # -- GAME LOOP --
     running = True
 
@@ -205,8 +199,8 @@ if __name__ == "__main__":
         for event in pygame.event.get():
             # mouse click
             if event.type == pygame.MOUSEBUTTONUP:
-                # do not process more input during animation
-                if animating:
+                # do not process more input during search and animation
+                if animating or search != None:
                     continue
 
                 # left click
@@ -232,16 +226,20 @@ if __name__ == "__main__":
                             vmap.draw_cell(goal, COLOR_GOAL)
 
                             try:
-                                path = pf.make_path(start, goal)
-
-                                # path found -> start animation
-                                if len(path) > 0:
-                                    pathIdx = 1
-                                    animating = True
-                                # no path found
+                                # search advanced every frame
+                                if pf.engine == "astar":
+                                    search = pf.iter_search(start, goal, EXPANSIONS_PER_FRAME)
                                 else:
-                                    vmap.draw_cell(start, COLOR_NOPATH)
-                                    vmap.draw_cell(goal, COLOR_NOPATH)
+                                    path = pf.make_path(start, goal)
+
+                                    # path found -> start animation
+                                    if len(path) > 0:
+                                        pathIdx = 1
+                                        animating = True
+                                    # no path found
+                                    else:
+                                        vmap.draw_cell(start, COLOR_NOPATH)
+                                        vmap.draw_cell(goal, COLOR_NOPATH)
 
                             except:
                                 print("ERROR")
@@ -252,6 +250,11 @@ if __name__ == "__main__":
 
                     # clear everything
                     else:
+                        for cell in searchedCells:
+                            vmap.draw_cell(cell, COLOR_WALK)
+
+                        searchedCells = []
+
                         if len(path) > 0:
                             for cell in path:
                                 vmap.draw_cell(cell, COLOR_WALK)
@@ -266,6 +269,55 @@ if __name__ == "__main__":
                         pathIdx = -1
                         animCounter = 0
 
+                # right click -> add or remove a wall
+                elif event.button == 3:
+                    if not vmap.is_point_inside(event.pos):
+                        continue
+
+                    cell = vmap.get_cell_from_point(event.pos)
+
+                    if cell == start or cell == goal:
+                        continue
+
+                    walkable = not vmap.is_cell_walkable(cell)
+
+                    # no path shown -> only change the map
+                    if goal == None:
+                        planner.update_cells([(cell[0], cell[1], walkable)])
+                        vmap.draw_cell(cell, COLOR_WALK if walkable else COLOR_UNWALK)
+                        pygame.display.flip()
+                        continue
+
+                    # repair the search of the current path or plan a new one
+                    if planner.start == start and planner.goal == goal:
+                        planner.update_cells([(cell[0], cell[1], walkable)])
+                        newPath = planner.replan()
+                    else:
+                        planner.update_cells([(cell[0], cell[1], walkable)])
+                        newPath = planner.plan(start, goal)
+
+                    # redraw the path
+                    for c in searchedCells + path:
+                        vmap.draw_cell(c, COLOR_WALK)
+
+                    searchedCells = []
+
+                    vmap.draw_cell(cell, COLOR_WALK if walkable else COLOR_UNWALK)
+
+                    path = newPath
+
+                    if len(path) > 0:
+                        for c in path[1:-1]:
+                            vmap.draw_cell(c, COLOR_PATH)
+
+                        vmap.draw_cell(start, COLOR_START)
+                        vmap.draw_cell(goal, COLOR_GOAL)
+                    else:
+                        vmap.draw_cell(start, COLOR_NOPATH)
+                        vmap.draw_cell(goal, COLOR_NOPATH)
+
+                    pygame.display.flip()
+
             # window closed
             elif event.type == pygame.QUIT:
                 running = False
@@ -275,8 +327,38 @@ if __name__ == "__main__":
                 if event.key == pygame.K_ESCAPE:
                     running = False
 
+        # advance the search and draw the cells it explored
+        if search != None:
+            opened, closed, result = next(search)
+
+            for cell in opened:
+                if cell != goal:
+                    vmap.draw_cell(cell, COLOR_OPEN)
+
+            for cell in closed:
+                if cell != start and cell != goal:
+                    vmap.draw_cell(cell, COLOR_CLOSED)
+
+            searchedCells.extend(opened)
+
+            # search finished
+            if result != None:
+                search = None
+                path = result
+
+                # path found -> start animation
+                if len(path) > 0:
+                    pathIdx = 1
+                    animating = True
+                # no path found
+                else:
+                    vmap.draw_cell(start, COLOR_NOPATH)
+                    vmap.draw_cell(goal, COLOR_NOPATH)
+
+            pygame.display.flip()
+
         # render
-        if animating:
+        elif animating:
             if pathIdx > 0 and pathIdx < (len(path) - 1):
                 # poor man's animation skipping frames for fixed delay
                 if animCounter == FRAMES_TO_SKIP:
@@ -0,0 +1,94 @@
+import contextlib
+import cProfile
+import io
+import pstats
+import tracemalloc
+
+class Profiler:
+    """Query hook which profiles the queries of a Pathfinder with cProfile.
+
+    All the queries are added to the same profile. Only the thread calling make_path is profiled.
+
+    Example: pf.set_query_hook(Profiler())
+    """
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.queries = 0
+
+    @contextlib.contextmanager
+    def __call__(self, start, goal):
+        self.queries += 1
+        self.profile.enable()
+
+        try:
+            yield
+        finally:
+            self.profile.disable()
+
+    def report(self, sortBy = "cumulative", limit = 20):
+        """Get the statistics of the profile.
+
+        Parameters
+        ----------
+        sortBy : str
+            sort key of pstats.Stats.sort_stats
+        limit : int
+            number of functions reported
+
+        Returns
+        -------
+        str
+            the table printed by pstats
+        """
+        if self.queries == 0:
+            return "no queries profiled"
+
+        stream = io.StringIO()
+        pstats.Stats(self.profile, stream = stream).sort_stats(sortBy).print_stats(limit)
+        return stream.getvalue()
+
+class MemoryTracer:
+    """Query hook which measures with tracemalloc the peak of memory allocated by every query of a Pathfinder.
+
+    tracemalloc slows down all the allocations, so it runs only during the queries
+    unless it was already started.
+
+    Example: pf.set_query_hook(MemoryTracer())
+    """
+
+    def __init__(self):
+        # bytes allocated at the peak of every query
+        self.peaks = []
+
+    @contextlib.contextmanager
+    def __call__(self, start, goal):
+        started = not tracemalloc.is_tracing()
+
+        if started:
+            tracemalloc.start()
+
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+
+        try:
+            yield
+        finally:
+            self.peaks.append(tracemalloc.get_traced_memory()[1] - base)
+
+            if started:
+                tracemalloc.stop()
+
+    def report(self):
+        """Get the peak of memory of the queries.
+
+        Returns
+        -------
+        str
+            highest and average peak of memory of the queries in KiB
+        """
+        if len(self.peaks) == 0:
+            return "no queries traced"
+
+        return "peak memory per query: max {:.1f} KiB - mean {:.1f} KiB".format(
+               max(self.peaks) / 1024, sum(self.peaks) / len(self.peaks) / 1024)
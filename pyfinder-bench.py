@@ -1,81 +1,327 @@
+import argparse
 import astar
+import landmarks
+import mapfile
+import os
+import parallel
+import profiling
+import scenarios
 import sys
 import time
 
+def map_queries(map, numCells = 224):
+    """Make the queries of a map without scenario: all the paths between the first walkable cells.
+
+    Parameters
+    ----------
+    map : astar.Grid
+        the map
+    numCells : int
+        number of walkable cells used
+
+    Returns
+    -------
+    list
+        (start, goal) tuples
+    """
+    walkCells = []
+
+    for r in range(map.rows):
+        for c in range(map.cols):
+            if(map.is_walkable(r, c)):
+                walkCells.append((r, c))
+
+                if len(walkCells) == numCells:
+                    break
+
+        if len(walkCells) == numCells:
+            break
+
+    return [(start, goal) for start in walkCells for goal in walkCells if start != goal]
+
+def load_map(fileName, maps):
+    """Load a map file once, exiting on errors.
+
+    Parameters
+    ----------
+    fileName : str
+        path of the map file
+    maps : dict
+        maps already loaded, indexed by path
+
+    Returns
+    -------
+    astar.Grid
+        the map
+    """
+    if fileName not in maps:
+        try:
+            maps[fileName] = mapfile.load_map(fileName)
+        except (OSError, mapfile.MapFileError) as err:
+            print("ERROR - {}".format(err))
+            sys.exit(1)
+
+    return maps[fileName]
+
+def run_batch(pf, queries):
+    """Find the paths of the queries with one search for every start cell.
+
+    Parameters
+    ----------
+    pf : astar.Pathfinder
+        the pathfinder of the map of the queries
+    queries : list
+        (start, goal) tuples
+
+    Returns
+    -------
+    dict
+        the same values of scenarios.run_queries, without latencies
+    """
+    goals = dict()
+
+    for start, goal in queries:
+        goals.setdefault(start, []).append(goal)
+
+    total = 0
+    expansions = 0
+    cost = 0
+    noPath = 0
+
+    for start in goals:
+        t0 = time.perf_counter()
+        paths = pf.make_paths(start, goals[start])
+        total += time.perf_counter() - t0
+        expansions += pf.last_expansions()
+
+        for path in paths:
+            if len(path) > 0:
+                cost += pf.path_cost(path)
+            else:
+                noPath += 1
+
+    return { "queries" : len(queries),
+             "noPath" : noPath,
+             "time" : total,
+             "pathsPerSec" : len(queries) / total if total > 0 else 0,
+             "expansions" : expansions,
+             "expansionsPerQuery" : expansions / len(queries) if len(queries) > 0 else 0,
+             "cost" : cost }
+
+def run_parallel(pf, queries, processes, heuristic):
+    """Find the paths of the queries with a pool of processes.
+
+    Parameters
+    ----------
+    pf : astar.Pathfinder
+        the pathfinder of the map of the queries, used for its settings
+    queries : list
+        (start, goal) tuples
+    processes : int
+        number of worker processes
+    heuristic : str or callable
+        heuristic of the workers
+
+    Returns
+    -------
+    dict
+        the same values of scenarios.run_queries, without latencies and cells expanded
+    """
+    # workers run in other processes, so wall clock time is measured
+    t0 = time.perf_counter()
+    paths = parallel.solve_batch(pf.map, queries, processes, pf.engine, heuristic, pf.weight,
+                                 memoryLimit = pf.memoryLimit, openList = pf.openListType)
+    total = time.perf_counter() - t0
+
+    costs = [pf.path_cost(path) for path in paths.paths() if len(path) > 0]
+
+    return { "queries" : len(queries),
+             "noPath" : len(queries) - len(costs),
+             "time" : total,
+             "pathsPerSec" : len(queries) / total if total > 0 else 0,
+             "cost" : sum(costs) }
+
 if __name__ == "__main__":
-    if(len(sys.argv) != 2):
-        print("USAGE: python {0} file.map".format(sys.argv[0]))
+    parser = argparse.ArgumentParser(description = "Benchmark the pathfinder on maps and scenarios.")
+    parser.add_argument("files", nargs = "+",
+                        help = "map files, or MovingAI scenario files (.scen) whose queries are used")
+    parser.add_argument("-e", "--engine", nargs = "+", choices = astar.ENGINES, default = ["astar"],
+                        help = "search engines, every one is benchmarked")
+    parser.add_argument("-H", "--heuristic", choices = list(astar.HEURISTICS), default = "octile",
+                        help = "heuristic used to estimate the cost to the goal")
+    parser.add_argument("-w", "--weight", type = float, default = 1, help = "weight of the heuristic")
+    parser.add_argument("-L", "--landmarks", type = int, default = 0,
+                        help = "use the ALT heuristic with this number of landmarks instead of --heuristic")
+    parser.add_argument("-M", "--memory-limit", type = int, default = astar.DEFAULT_MEMORY_LIMIT,
+                        help = "maximum number of cells kept in memory by the sma engine")
+    parser.add_argument("-b", "--batch", action = "store_true",
+                        help = "find all the paths from a start cell with one search (engine and heuristic are ignored)")
+    parser.add_argument("-o", "--open-list", choices = ["auto"] + list(astar.OPEN_LISTS), default = "auto",
+                        help = "implementation of the open list")
+    parser.add_argument("-j", "--processes", type = int, default = 0,
+                        help = "find the paths with a pool of processes (0 = single process)")
+    parser.add_argument("-m", "--maps-dir", default = "", help = "directory of the maps of the scenario files")
+    parser.add_argument("-n", "--max-queries", type = int, default = 0,
+                        help = "maximum number of queries of every map (0 = all)")
+    parser.add_argument("-W", "--warmup", type = int, default = 10,
+                        help = "number of queries run before measuring every benchmark")
+    parser.add_argument("--json", default = "", help = "write the results to this JSON file")
+    parser.add_argument("--baseline", default = "",
+                        help = "compare the results with a JSON file written with --json, exit with status 1 on regressions")
+    parser.add_argument("-t", "--tolerance", type = float, default = 0.1,
+                        help = "relative change of latency and speed allowed by --baseline")
+    parser.add_argument("-s", "--stats", action = "store_true",
+                        help = "count the work of the searches, slower (not with --processes)")
+    profilers = parser.add_mutually_exclusive_group()
+    profilers.add_argument("--profile", action = "store_true",
+                        help = "profile the queries with cProfile and print the slowest functions (not with --batch and --processes)")
+    profilers.add_argument("--trace-memory", action = "store_true",
+                        help = "measure the peak of memory of the queries with tracemalloc (not with --batch and --processes)")
+    args = parser.parse_args()
+
+    if args.memory_limit < 2:
+        print("ERROR - Memory limit too low: {}".format(args.memory_limit))
         sys.exit(1)
 
-    with open(sys.argv[1], 'r') as f:
-        fdata = f.readlines()
+    # benchmarks as (name, map, queries)
+    benchmarks = []
+    maps = dict()
 
-    # print map
-    for line in fdata:
-        print(line, end='')
-    print()
+    for fileName in args.files:
+        baseName = os.path.basename(fileName)
 
-    # convert map file to usable format
-    # 1 = walkable cell
-    # 0 = unwalkable cell
-    fRows = len(fdata)
+        if not fileName.endswith(".scen"):
+            map = load_map(fileName, maps)
+            benchmarks.append((baseName, map, map_queries(map)))
+            continue
 
-    if(fRows == 0):
-        print("ERROR empty map")
-        sys.exit(1)
+        try:
+            scens = scenarios.load_scenarios(fileName)
+        except (OSError, scenarios.ScenarioFileError) as err:
+            print("ERROR - {}".format(err))
+            sys.exit(1)
 
-    # skip last column of '\n'
-    fCols = len(fdata[0]) - 1
+        # queries of every map of the scenario
+        mapQueries = dict()
 
-    map = []
+        for scen in scens:
+            mapQueries.setdefault(scen.mapName, []).append((scen.start, scen.goal))
 
-    for r in range(fRows):
-        map.append([1] * fCols)
+        for mapName in mapQueries:
+            map = load_map(scenarios.find_map(mapName, fileName, args.maps_dir), maps)
 
-    for r in range(fRows):
-        for c in range(fCols):
-            if(fdata[r][c] == '#'):
-                map[r][c] = 0
+            # queries not valid with the rules of this pathfinder
+            queries = [(start, goal) for start, goal in mapQueries[mapName]
+                       if start != goal and map.is_walkable(start[0], start[1]) and map.is_walkable(goal[0], goal[1])]
 
-    # get size of map
-    mapRows = len(map)
-    mapCols = len(map[0])
+            if len(queries) < len(mapQueries[mapName]):
+                print("{}: skipped {} queries with unwalkable cells".format(baseName, len(mapQueries[mapName]) - len(queries)))
 
-    # find walkable cells
-    walkCells = []
-    cellsNeeded = 224
+            name = baseName if len(mapQueries) == 1 else "{}:{}".format(baseName, os.path.basename(mapName))
+            benchmarks.append((name, map, queries))
 
-    for r in range(mapRows):
-        for c in range(mapCols):
-            if(map[r][c] == 1):
-                walkCells.append((r, c))
-                cellsNeeded = cellsNeeded - 1
+    if args.max_queries > 0:
+        benchmarks = [(name, map, queries[:args.max_queries]) for name, map, queries in benchmarks]
 
-                if cellsNeeded == 0:
-                    break
+    # the worker processes need all the cells in shared memory
+    if args.processes > 0:
+        for name, map, queries in benchmarks:
+            if map.lazy:
+                print("ERROR - {} is loaded on demand and can't be used with --processes".format(name))
+                sys.exit(1)
 
-        if cellsNeeded == 0:
-            break
+    numPaths = sum(len(queries) for name, map, queries in benchmarks)
+    print("Going to benchmark {} paths with {} engines...\n".format(numPaths, len(args.engine)))
+
+    # landmarks computed once for every map
+    heuristics = dict()
+    results = []
+
+    for name, map, queries in benchmarks:
+        if args.landmarks > 0:
+            if id(map) not in heuristics:
+                heuristics[id(map)] = landmarks.Landmarks(map, args.landmarks)
+
+            heuristic = heuristics[id(map)]
+        else:
+            heuristic = args.heuristic
+
+        for engine in args.engine:
+            pf = astar.Pathfinder(map)
+            pf.set_engine(engine)
+            pf.set_heuristic(heuristic, args.weight)
+            pf.set_open_list(args.open_list)
+            pf.set_memory_limit(args.memory_limit)
+            pf.set_stats(args.stats)
 
-    numPaths = len(walkCells) * (len(walkCells) - 1)
+            hook = None
 
-    print("Going to benchmark {} paths...\n".format(numPaths))
+            if args.profile:
+                hook = profiling.Profiler()
+            elif args.trace_memory:
+                hook = profiling.MemoryTracer()
+
+            pf.set_query_hook(hook)
+
+            if args.processes > 0:
+                result = run_parallel(pf, queries, args.processes, heuristic)
+            elif args.batch:
+                result = run_batch(pf, queries)
+            else:
+                result = scenarios.run_queries(pf, queries, args.warmup)
+
+            result["name"] = name
+            result["engine"] = engine
+            result["openList"] = pf.open_list_class().__name__
+            results.append(result)
+
+            print("{} - {} - {}: {} paths in {:.3f} sec. - {:.1f} paths/sec.".format(
+                  name, engine, result["openList"], result["queries"], result["time"], result["pathsPerSec"]))
+
+            if "latencyP50" in result:
+                print("    latency ms: mean {:.4f} - p50 {:.4f} - p95 {:.4f} - p99 {:.4f}".format(
+                      result["latencyMean"], result["latencyP50"], result["latencyP95"], result["latencyP99"]))
+
+            if "expansions" in result:
+                print("    expanded cells per path: {:.1f}".format(result["expansionsPerQuery"]))
+
+            if result.get("pruned", 0) > 0:
+                print("    memory limit reached: {} cells forgotten and searched again".format(result["pruned"]))
+
+            if args.stats and args.processes == 0:
+                result["stats"] = pf.stats().as_dict()
+                print("    " + str(pf.stats()).replace("\n", "\n    "))
+
+            if args.trace_memory and len(hook.peaks) > 0:
+                result["memoryPeakMax"] = max(hook.peaks)
+                print("    " + hook.report())
+
+            if args.profile:
+                print(hook.report(limit = 15))
+
+    print()
 
-    # benchmark map
-    pf = astar.Pathfinder(map)
+    if args.json:
+        settings = vars(args).copy()
+        del settings["json"], settings["baseline"]
+        scenarios.save_results(args.json, results, settings)
+        print("Results written to {}".format(args.json))
 
-    t0 = time.clock_gettime(time.CLOCK_THREAD_CPUTIME_ID)
+    if args.baseline:
+        try:
+            baseline = scenarios.load_results(args.baseline)
+        except (OSError, ValueError, KeyError) as err:
+            print("ERROR - Can't load baseline {}: {}".format(args.baseline, err))
+            sys.exit(1)
 
-    for start in walkCells:
-        for goal in walkCells:
-            if(start != goal):
-                path = pf.make_path(start, goal)
+        regressions = scenarios.compare_results(results, baseline, args.tolerance)
 
-    t1 = time.clock_gettime(time.CLOCK_THREAD_CPUTIME_ID)
+        if len(regressions) > 0:
+            print("Regressions compared to {}:".format(args.baseline))
 
-    benchTime = t1 - t0
-    avgPathTime = benchTime * 1000 / numPaths
+            for regression in regressions:
+                print("    " + regression)
 
+            sys.exit(1)
 
-    print("{:3.3} sec. to find {} paths".format(benchTime, numPaths))
-    print("Average time per path: {:3.3} ms.\n".format(avgPathTime))
+        print("No regressions compared to {}".format(args.baseline))
@@ -0,0 +1,49 @@
+import argparse
+import mapfile
+import os
+import sys
+import tilestore
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Convert map files between the text and the binary format.")
+    parser.add_argument("maps", nargs = "+", help = "map files, text or binary")
+    parser.add_argument("-f", "--format", choices = list(mapfile.BINARY_ENCODINGS) + ["tiles", "text"], default = "grid",
+                        help = "format of the converted maps: a binary encoding, a tile store or text")
+    parser.add_argument("-s", "--tile-size", type = int, default = tilestore.DEFAULT_TILE_SIZE,
+                        help = "number of rows and cols of a tile of a tile store")
+    parser.add_argument("-d", "--output-dir", default = "",
+                        help = "directory of the converted maps, the same of every map when not set")
+    args = parser.parse_args()
+
+    exts = { "text" : ".map", "tiles" : ".pft" }
+    ext = exts.get(args.format, ".pfm")
+
+    for fileName in args.maps:
+        # tile stores are converted without loading the whole map
+        if args.format != "tiles":
+            try:
+                map = mapfile.load_map(fileName)
+            except mapfile.MapFileError as err:
+                print("ERROR - {}".format(err))
+                sys.exit(1)
+
+        base = os.path.splitext(os.path.basename(fileName))[0] + ext
+        outName = os.path.join(args.output_dir or os.path.dirname(fileName), base)
+
+        if os.path.abspath(outName) == os.path.abspath(fileName):
+            print("ERROR - {} would be overwritten".format(fileName))
+            sys.exit(1)
+
+        try:
+            if args.format == "tiles":
+                tilestore.convert_map(fileName, outName, args.tile_size)
+            else:
+                mapfile.save_map(map, outName, args.format)
+        except mapfile.MapFileError as err:
+            print("ERROR - {}".format(err))
+            sys.exit(1)
+        except (OSError, ValueError) as err:
+            print("ERROR - {}: {}".format(fileName, err))
+            sys.exit(1)
+
+        print("{} -> {} ({} bytes)".format(fileName, outName, os.path.getsize(outName)))
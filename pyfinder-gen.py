@@ -0,0 +1,41 @@
+import argparse
+import mapfile
+import mapgen
+import sys
+import time
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Generate a map for benchmarks.")
+    parser.add_argument("type", choices = mapgen.MAP_TYPES, help = "kind of map")
+    parser.add_argument("rows", type = int, help = "number of rows of the map")
+    parser.add_argument("cols", nargs = "?", type = int, default = 0, help = "number of cols of the map, same of rows when not set")
+    parser.add_argument("-s", "--seed", type = int, default = 0, help = "seed of the random generator")
+    parser.add_argument("-d", "--density", type = float, default = None,
+                        help = "density of the obstacles of random (default 0.3) and open (default 0.05) maps")
+    parser.add_argument("-c", "--corridor", type = int, default = 1, help = "width of the corridors of a maze")
+    parser.add_argument("-f", "--format", choices = ["text"] + list(mapfile.BINARY_ENCODINGS) + ["tiles"], default = "text",
+                        help = "format of the map file")
+    parser.add_argument("-o", "--output", default = "",
+                        help = "path of the map file, by default TYPE_ROWSxCOLS_SEED with the extension of the format")
+    args = parser.parse_args()
+
+    cols = args.cols if args.cols > 0 else args.rows
+
+    try:
+        t0 = time.perf_counter()
+        map = mapgen.generate(args.type, args.rows, cols, args.seed, args.density, args.corridor)
+        t1 = time.perf_counter()
+    except ValueError as err:
+        print("ERROR - {}".format(err))
+        sys.exit(1)
+
+    exts = { "text" : ".map", "tiles" : ".pft" }
+    fileName = args.output or "{}_{}x{}_{}{}".format(args.type, args.rows, cols, args.seed, exts.get(args.format, ".pfm"))
+
+    try:
+        mapfile.save_map(map, fileName, args.format)
+    except (OSError, ValueError) as err:
+        print("ERROR - {}".format(err))
+        sys.exit(1)
+
+    print("{}x{} {} map generated in {:.2f} sec. and written to {}".format(args.rows, cols, args.type, t1 - t0, fileName))
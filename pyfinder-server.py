@@ -0,0 +1,296 @@
+import argparse
+import astar
+import asyncio
+import collections
+import concurrent.futures
+import json
+import mapfile
+import os
+import sys
+import time
+
+def parse_cell(value, name):
+    """Convert a cell of a query to a tuple.
+
+    Parameters
+    ----------
+    value : any
+        the JSON value of the cell
+    name : str
+        name of the field of the query, used in the error message
+
+    Returns
+    -------
+    tuple
+        row,col of the cell
+
+    Raises
+    ------
+    ValueError
+        if the value is not a list of 2 integers
+    """
+    if(not isinstance(value, list) or len(value) != 2 or
+       any(not isinstance(v, int) or isinstance(v, bool) for v in value)):
+        raise ValueError("{} is not a [row, col] list of integers: {}".format(name, json.dumps(value)))
+
+    return (value[0], value[1])
+
+class PathServer:
+    """Server answering path queries made of newline-delimited JSON objects.
+
+    A query is an object like {"id": 1, "map": "map_01", "start": [0, 0], "goal": [5, 7]}
+    and its answer is {"id": 1, "path": [[0, 0], ...]} or {"id": 1, "error": "..."}.
+    The object {"id": 2, "stats": true} returns the statistics of the server.
+
+    Searches run on a pool of threads sharing one Pathfinder per map. Identical queries
+    received while the first one is still running wait for its result instead of searching again.
+    Answers on a connection are sent as soon as they are ready, so they can be out of order.
+    """
+
+    def __init__(self, pathfinders, threads = 4, maxLatencies = 10000):
+        """
+        Parameters
+        ----------
+        pathfinders : dict
+            astar.Pathfinder of every map, indexed by the name used in the queries
+        threads : int
+            number of threads running the searches
+        maxLatencies : int
+            number of latest latencies used to compute the percentiles
+        """
+        self.pathfinders = pathfinders
+        self.executor = concurrent.futures.ThreadPoolExecutor(threads)
+
+        # futures of the searches running, indexed by (map, start, goal)
+        self.inFlight = dict()
+
+        self.startTime = time.monotonic()
+        self.queries = 0
+        self.searches = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.latencies = collections.deque(maxlen = maxLatencies)
+
+    async def handle_client(self, reader, writer):
+        """Read the queries of a connection and send their answers.
+
+        A query longer than the limit of the stream gets an error and the connection is closed
+        after the answers of the previous queries.
+
+        Parameters
+        ----------
+        reader : asyncio.StreamReader
+            stream receiving the queries
+        writer : asyncio.StreamWriter
+            stream sending the answers
+        """
+        tasks = set()
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    # line longer than the limit of the stream -> the next queries can't be found
+                    self.errors += 1
+                    writer.write(json.dumps({ "error" : "query too long" }, separators = (",", ":")).encode() + b"\n")
+                    await writer.drain()
+                    break
+
+                if not line:
+                    break
+
+                if line.strip():
+                    task = asyncio.ensure_future(self.answer(line, writer))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+
+            # wait for the pending answers before closing
+            if tasks:
+                await asyncio.gather(*tasks)
+
+        except ConnectionError:
+            pass
+
+        finally:
+            writer.close()
+
+    async def answer(self, line, writer):
+        """Process a query and send its answer.
+
+        Parameters
+        ----------
+        line : bytes
+            the JSON object of the query
+        writer : asyncio.StreamWriter
+            stream sending the answers
+        """
+        t0 = time.perf_counter()
+        reply = dict()
+
+        try:
+            query = json.loads(line)
+
+            if not isinstance(query, dict):
+                raise ValueError("query is not an object")
+
+            if "id" in query:
+                reply["id"] = query["id"]
+
+            if query.get("stats"):
+                reply["stats"] = self.stats()
+            else:
+                self.queries += 1
+                path = await self.find_path(query.get("map"), query.get("start"), query.get("goal"))
+                reply["path"] = path
+                self.latencies.append(time.perf_counter() - t0)
+
+        except (ValueError, TypeError, IndexError,
+                astar.OutOfBoundsError, astar.UnwalkableError, astar.SameStartGoalError) as err:
+            self.errors += 1
+            reply["error"] = str(err)
+
+        writer.write(json.dumps(reply, separators = (",", ":")).encode() + b"\n")
+        await writer.drain()
+
+    async def find_path(self, mapName, start, goal):
+        """Find a path on the executor, sharing the search with identical queries in flight.
+
+        Parameters
+        ----------
+        mapName : str
+            name of the map
+        start : list
+            row,col of the start cell
+        goal : list
+            row,col of the destination cell
+
+        Returns
+        -------
+        list
+            all the [row, col] lists making the path, empty if no path was found
+
+        Raises
+        ------
+        ValueError
+            if the map is unknown or a cell is not a list of 2 integers
+        """
+        if mapName not in self.pathfinders:
+            raise ValueError("unknown map: {}".format(mapName))
+
+        start = parse_cell(start, "start")
+        goal = parse_cell(goal, "goal")
+
+        key = (mapName, start, goal)
+        future = self.inFlight.get(key)
+
+        # same query already running
+        if future != None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.executor, self.pathfinders[mapName].make_path, start, goal)
+        self.inFlight[key] = future
+        self.searches += 1
+
+        try:
+            return await asyncio.shield(future)
+        finally:
+            del self.inFlight[key]
+
+    def stats(self):
+        """Get the statistics of the server.
+
+        Returns
+        -------
+        dict
+            number of queries, searches, coalesced queries and errors, queries per second
+            since the start and latency percentiles in ms of the latest queries
+        """
+        uptime = time.monotonic() - self.startTime
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if len(latencies) == 0:
+                return 0
+
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] * 1000
+
+        return { "uptime" : uptime,
+                 "queries" : self.queries,
+                 "searches" : self.searches,
+                 "coalesced" : self.coalesced,
+                 "errors" : self.errors,
+                 "inFlight" : len(self.inFlight),
+                 "queriesPerSec" : self.queries / uptime if uptime > 0 else 0,
+                 "latencyP50" : percentile(50),
+                 "latencyP95" : percentile(95),
+                 "latencyP99" : percentile(99) }
+
+async def serve(server, host, port, unixPath):
+    """Run the server until it's interrupted.
+
+    Parameters
+    ----------
+    server : PathServer
+        the server handling the connections
+    host : str
+        address of the TCP socket
+    port : int
+        port of the TCP socket
+    unixPath : str
+        path of the Unix socket, when not empty it's used instead of TCP
+    """
+    if unixPath:
+        listener = await asyncio.start_unix_server(server.handle_client, unixPath)
+        print("Listening on {}".format(unixPath))
+    else:
+        listener = await asyncio.start_server(server.handle_client, host, port)
+        print("Listening on {}:{}".format(host, port))
+
+    async with listener:
+        await listener.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Answer path queries sent as newline-delimited JSON.")
+    parser.add_argument("maps", nargs = "+", help = "map files, a map is named after its file without extension")
+    parser.add_argument("--host", default = "127.0.0.1", help = "address of the TCP socket")
+    parser.add_argument("-p", "--port", type = int, default = 8765, help = "port of the TCP socket")
+    parser.add_argument("-u", "--unix", default = "", help = "path of a Unix socket to use instead of TCP")
+    parser.add_argument("-t", "--threads", type = int, default = 4, help = "number of threads running the searches")
+    parser.add_argument("-e", "--engine", choices = astar.ENGINES, default = "astar", help = "search engine")
+    parser.add_argument("-H", "--heuristic", choices = list(astar.HEURISTICS), default = "octile",
+                        help = "heuristic used to estimate the cost to the goal")
+    parser.add_argument("-w", "--weight", type = float, default = 1, help = "weight of the heuristic")
+    parser.add_argument("-M", "--memory-limit", type = int, default = astar.DEFAULT_MEMORY_LIMIT,
+                        help = "maximum number of cells kept in memory by the sma engine of every thread")
+    args = parser.parse_args()
+
+    if args.memory_limit < 2:
+        print("ERROR - Memory limit too low: {}".format(args.memory_limit))
+        sys.exit(1)
+
+    # load map files
+    pathfinders = dict()
+
+    for fileName in args.maps:
+        try:
+            map = mapfile.load_map(fileName)
+        except mapfile.MapFileError as err:
+            print("ERROR - {}".format(err))
+            sys.exit(1)
+
+        pf = astar.Pathfinder(map)
+        pf.set_engine(args.engine)
+        pf.set_heuristic(args.heuristic, args.weight)
+        pf.set_memory_limit(args.memory_limit)
+
+        pathfinders[os.path.splitext(os.path.basename(fileName))[0]] = pf
+
+    server = PathServer(pathfinders, args.threads)
+
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        print()
@@ -1,44 +1,48 @@
+import argparse
 import astar
+import landmarks
+import mapfile
+import profiling
 import sys
 
 if __name__ == "__main__":
-    if(len(sys.argv) != 2):
-        print("USAGE: python {0} file.map".format(sys.argv[0]))
+    parser = argparse.ArgumentParser(description = "Find a path in a map.")
+    parser.add_argument("map", help = "map file")
+    parser.add_argument("-e", "--engine", choices = astar.ENGINES, default = "astar", help = "search engine")
+    parser.add_argument("-H", "--heuristic", choices = list(astar.HEURISTICS), default = "octile",
+                        help = "heuristic used to estimate the cost to the goal")
+    parser.add_argument("-w", "--weight", type = float, default = 1, help = "weight of the heuristic")
+    parser.add_argument("-L", "--landmarks", type = int, default = 0,
+                        help = "use the ALT heuristic with this number of landmarks instead of --heuristic")
+    parser.add_argument("-M", "--memory-limit", type = int, default = astar.DEFAULT_MEMORY_LIMIT,
+                        help = "maximum number of cells kept in memory by the sma engine")
+    parser.add_argument("-s", "--stats", action = "store_true", help = "print the statistics of the search")
+    profilers = parser.add_mutually_exclusive_group()
+    profilers.add_argument("--profile", action = "store_true", help = "profile the search with cProfile")
+    profilers.add_argument("--trace-memory", action = "store_true",
+                        help = "measure the peak of memory of the search with tracemalloc")
+    args = parser.parse_args()
+
+    if args.memory_limit < 2:
+        print("ERROR - Memory limit too low: {}".format(args.memory_limit))
         sys.exit(1)
 
-    with open(sys.argv[1], 'r') as f:
-        fdata = f.readlines()
-
-    # print map
-    for line in fdata:
-        print(line, end='')
-    print()
-
-    # convert map file to usable format
-    # 1 = walkable cell
-    # 0 = unwalkable cell
-    fRows = len(fdata)
-
-    if(fRows == 0):
-        print("ERROR empty map")
+    # load map file
+    try:
+        map = mapfile.load_map(args.map)
+    except mapfile.MapFileError as err:
+        print("ERROR - {}".format(err))
         sys.exit(1)
 
-    # skip last column of '\n'
-    fCols = len(fdata[0]) - 1
-
-    map = []
-
-    for r in range(fRows):
-        map.append([1] * fCols)
-
-    for r in range(fRows):
-        for c in range(fCols):
-            if(fdata[r][c] == '#'):
-                map[r][c] = 0
+    # print map, a lazy map would be loaded whole
+    if map.lazy:
+        print("Map of {}x{} cells loaded on demand, only the area of the path is printed\n".format(map.rows, map.cols))
+    else:
+        print(mapfile.map_to_str(map))
 
     # get size of map
-    mapRows = len(map)
-    mapCols = len(map[0])
+    mapRows = map.rows
+    mapCols = map.cols
 
     # ask user for START
     r0 , c0 = (int(v) for v in tuple(input("START (a,b): ").split(',')))
@@ -53,6 +57,22 @@ if __name__ == "__main__":
 
     # find path
     pf = astar.Pathfinder(map)
+    pf.set_engine(args.engine)
+    pf.set_memory_limit(args.memory_limit)
+
+    if args.landmarks > 0:
+        pf.set_heuristic(landmarks.Landmarks(map, args.landmarks), args.weight)
+    else:
+        pf.set_heuristic(args.heuristic, args.weight)
+
+    pf.set_stats(args.stats)
+
+    if args.profile:
+        hook = profiling.Profiler()
+        pf.set_query_hook(hook)
+    elif args.trace_memory:
+        hook = profiling.MemoryTracer()
+        pf.set_query_hook(hook)
 
     try:
         path = pf.make_path(start, goal)
@@ -67,17 +87,37 @@ if __name__ == "__main__":
         print("ERROR - {}".format(err))
         exit(1)
 
+    if pf.last_pruned() > 0:
+        print("Memory limit reached: {} cells forgotten and searched again\n".format(pf.last_pruned()))
+
+    if pf.last_exhausted():
+        print("Expansion limit reached: search stopped after {} cells expanded\n".format(pf.last_expansions()))
+
+    if args.stats:
+        print("{}\n".format(pf.stats()))
+
+    if args.profile or args.trace_memory:
+        print("{}\n".format(hook.report()))
+
     if len(path) == 0:
         print("NO PATH FOUND")
         exit(0)
 
-    # print map with path
+    # print map with path, only the bounding box of the path for a lazy map
     pathStart = path[0]
     pathGoal = path[len(path) - 1]
     pathSet = set(path)
 
-    for r in range(mapRows):
-        for c in range(mapCols):
+    if map.lazy:
+        rows = range(min(r for r, c in path), max(r for r, c in path) + 1)
+        cols = range(min(c for r, c in path), max(c for r, c in path) + 1)
+        print("Rows {}-{}, cols {}-{}".format(rows[0], rows[-1], cols[0], cols[-1]))
+    else:
+        rows = range(mapRows)
+        cols = range(mapCols)
+
+    for r in rows:
+        for c in cols:
             if((r, c) in pathSet):
                 if((r, c) == pathStart):
                     print('S', end='')
@@ -86,10 +126,7 @@ if __name__ == "__main__":
                 else:
                     print('.', end='')
             else:
-                if map[r][c] == 1:
-                    print(' ', end='')
-                else:
-                    print('#', end='')
+                print(chr(mapfile.STR_TABLE[map.get_cost(r, c)]), end='')
         print('\n', end='')
 
     print()
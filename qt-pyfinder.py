@@ -1,4 +1,6 @@
 import astar
+import dstarlite
+import mapfile
 
 from PySide2.QtCore import *
 from PySide2.QtGui import *
@@ -12,12 +14,14 @@ class Colors(IntEnum):
     """List of colors used to render the map."""
     BG_MAP = 1
     BG_SURF = 2
-    CELL_GOAL = 3
-    CELL_NOPATH = 4
-    CELL_PATH = 5
-    CELL_START = 6
-    CELL_UNWALK = 7
-    CELL_WALK = 8
+    CELL_CLOSED = 3
+    CELL_GOAL = 4
+    CELL_NOPATH = 5
+    CELL_OPEN = 6
+    CELL_PATH = 7
+    CELL_START = 8
+    CELL_UNWALK = 9
+    CELL_WALK = 10
 
 class QTilemap(QWidget):
     """A 2D map made of tiles using Qt for rendering and input handling."""
@@ -42,6 +46,7 @@ class QTilemap(QWidget):
         self.mapY1 = 0
 
         self.pf = astar.Pathfinder()
+        self.planner = None
         self.clear_path()
 
         self.sizeCell = 30
@@ -50,8 +55,10 @@ class QTilemap(QWidget):
 
         self.colors = { Colors.BG_MAP : QColor(33, 33, 33), \
                         Colors.BG_SURF : QColor(0, 0, 0), \
+                        Colors.CELL_CLOSED : QColor(178, 223, 219), \
                         Colors.CELL_GOAL : QColor(0, 230, 118), \
                         Colors.CELL_NOPATH : QColor(239, 83, 80), \
+                        Colors.CELL_OPEN : QColor(200, 230, 201), \
                         Colors.CELL_PATH : QColor(255, 245, 157), \
                         Colors.CELL_START : QColor(41, 182, 246), \
                         Colors.CELL_UNWALK : QColor(99, 99, 99), \
@@ -70,6 +77,14 @@ class QTilemap(QWidget):
         self.animTimer = QTimer(self)
         self.animTimer.timeout.connect(self.next_anim_frame)
 
+        # search drawn while it runs, only with the A* engine
+        self.search = None
+        self.searchedCells = []
+        self.searchStep = 8
+        self.searchFrameTime = 16
+        self.searchTimer = QTimer(self)
+        self.searchTimer.timeout.connect(self.next_search_step)
+
         self.painter = QPainter()
 
     def clear_surface(self):
@@ -136,6 +151,47 @@ class QTilemap(QWidget):
                 self.animTimer.stop()
                 self.animPathIdx = 0
 
+    def next_search_step(self):
+        """Advances the search and draws the cells it explored."""
+        if self.search == None:
+            self.searchTimer.stop()
+            return
+
+        opened, closed, result = next(self.search)
+
+        for cell in opened:
+            if cell != self.goal:
+                self.draw_cell(cell, self.colors[Colors.CELL_OPEN])
+
+        for cell in closed:
+            if cell != self.start and cell != self.goal:
+                self.draw_cell(cell, self.colors[Colors.CELL_CLOSED])
+
+        self.searchedCells.extend(opened)
+
+        # search finished
+        if result != None:
+            self.search = None
+            self.searchTimer.stop()
+
+            self.path = result
+            self.show_new_path()
+
+        self.repaint()
+
+    def show_new_path(self):
+        """Starts the animation of a new path or marks start and goal when no path was found."""
+        # path found -> start animation
+        if len(self.path) > 0:
+            self.animating = True
+            self.animPathIdx = 1
+            self.animTimer.start(self.animFrameTime)
+        # no path found
+        else:
+            self.draw_cell(self.start, self.colors[Colors.CELL_NOPATH])
+            self.draw_cell(self.goal, self.colors[Colors.CELL_NOPATH])
+            self.repaint()
+
     def set_anim_speed(self, speed):
         """Sets the speed of the path rendering animation.
 
@@ -157,6 +213,26 @@ class QTilemap(QWidget):
         """
         return 500 / self.animFrameTime
 
+    def set_engine(self, engine):
+        """Sets the search engine used by the pathfinder.
+
+        Parameters
+        ----------
+        engine : str
+            One of astar.ENGINES.
+        """
+        self.pf.set_engine(engine)
+
+    def get_engine(self):
+        """Gets the search engine used by the pathfinder.
+
+        Returns
+        -------
+        str
+            One of astar.ENGINES.
+        """
+        return self.pf.engine
+
     def clear_path(self):
         """Clears data used for handling the path."""
         self.path = []
@@ -168,15 +244,23 @@ class QTilemap(QWidget):
 
         Parameters
         ----------
-        map : list
-            Map made of 0 and 1 representing walkable and unwalkable cells.
+        map : astar.Grid
+            Map made of walkable and unwalkable cells.
         """
         self.map = map
 
+        # stop a search running on the previous map
+        self.search = None
+        self.searchedCells = []
+        self.searchTimer.stop()
+
         self.pf.set_map(map)
 
-        self.mapRows = len(map)
-        self.mapCols = len(map[0])
+        # incremental planner used to repair the path when walls are edited
+        self.planner = dstarlite.DStarLite(map)
+
+        self.mapRows = map.rows
+        self.mapCols = map.cols
 
         self.clear_path()
 
@@ -200,7 +284,7 @@ class QTilemap(QWidget):
             return False
 
         r, c = cell
-        return self.map[r][c] == 1
+        return self.map.is_walkable(r, c)
 
     def draw_map(self):
         """"Draws the map in the widget, including the background."""
@@ -221,12 +305,10 @@ class QTilemap(QWidget):
             for c in range(self.mapCols):
                 cellX = self.mapX0 + (c * self.sizeCell) + self.sizeBorder
 
-                if(self.map[r][c] == 1):
+                if(self.map.is_walkable(r, c)):
                     self.painter.setBrush(self.colors[Colors.CELL_WALK])
-                elif(self.map[r][c] == 0):
-                    self.painter.setBrush(self.colors[Colors.CELL_UNWALK])
                 else:
-                    self.painter.setBrush(self.colors[Colors.BG_MAP])
+                    self.painter.setBrush(self.colors[Colors.CELL_UNWALK])
 
                 self.painter.drawRect(cellX, cellY, self.sizeIncell, self.sizeIncell)
 
@@ -333,13 +415,17 @@ class QTilemap(QWidget):
         event : QEvent
             Event data.
         """
-        if (event.button() != Qt.LeftButton):
+        if (event.button() != Qt.LeftButton and event.button() != Qt.RightButton):
             return
 
         if not self.is_point_inside(event.pos()):
             return
 
-        if self.animating:
+        if self.animating or self.search != None:
+            return
+
+        if (event.button() == Qt.RightButton):
+            self.toggle_wall(self.get_cell_from_point(event.pos()))
             return
 
         # set start
@@ -360,18 +446,13 @@ class QTilemap(QWidget):
                 self.draw_cell(self.goal, self.colors[Colors.CELL_GOAL])
 
                 try:
-                    self.path = self.pf.make_path(self.start, self.goal)
-
-                    # path found -> start animation
-                    if len(self.path) > 0:
-                        self.animating = True
-                        self.animPathIdx = 1
-                        self.animTimer.start(self.animFrameTime)
-                    # no path found
+                    # search advanced by a timer, so the UI is not blocked
+                    if self.pf.engine == "astar":
+                        self.search = self.pf.iter_search(self.start, self.goal, self.searchStep)
+                        self.searchTimer.start(self.searchFrameTime)
                     else:
-                        self.draw_cell(self.start, self.colors[Colors.CELL_NOPATH])
-                        self.draw_cell(self.goal, self.colors[Colors.CELL_NOPATH])
-                        self.repaint()
+                        self.path = self.pf.make_path(self.start, self.goal)
+                        self.show_new_path()
 
                 except Exception as ex:
                     print("ERROR {}".format(ex))
@@ -382,6 +463,11 @@ class QTilemap(QWidget):
 
         # clear everything
         else:
+            for cell in self.searchedCells:
+                self.draw_cell(cell, self.colors[Colors.CELL_WALK])
+
+            self.searchedCells = []
+
             if len(self.path) > 0:
                 for cell in self.path:
                     self.draw_cell(cell, self.colors[Colors.CELL_WALK])
@@ -395,6 +481,56 @@ class QTilemap(QWidget):
 
             self.repaint()
 
+    def toggle_wall(self, cell):
+        """Switches a cell between walkable and unwalkable, repairing the current path if any.
+
+        Parameters
+        ----------
+        cell : tuple
+            row, col that define a cell of the map.
+        """
+        if cell == self.start or cell == self.goal:
+            return
+
+        walkable = not self.is_cell_walkable(cell)
+
+        # no path shown -> only change the map
+        if self.goal == None:
+            self.planner.update_cells([(cell[0], cell[1], walkable)])
+            self.draw_cell(cell, self.colors[Colors.CELL_WALK if walkable else Colors.CELL_UNWALK])
+            self.repaint()
+            return
+
+        # repair the search of the current path or plan a new one
+        self.planner.update_cells([(cell[0], cell[1], walkable)])
+
+        if self.planner.start == self.start and self.planner.goal == self.goal:
+            newPath = self.planner.replan()
+        else:
+            newPath = self.planner.plan(self.start, self.goal)
+
+        # redraw the path
+        for c in self.searchedCells + self.path:
+            self.draw_cell(c, self.colors[Colors.CELL_WALK])
+
+        self.searchedCells = []
+
+        self.draw_cell(cell, self.colors[Colors.CELL_WALK if walkable else Colors.CELL_UNWALK])
+
+        self.path = newPath
+
+        if len(self.path) > 0:
+            for c in self.path[1:-1]:
+                self.draw_cell(c, self.colors[Colors.CELL_PATH])
+
+            self.draw_cell(self.start, self.colors[Colors.CELL_START])
+            self.draw_cell(self.goal, self.colors[Colors.CELL_GOAL])
+        else:
+            self.draw_cell(self.start, self.colors[Colors.CELL_NOPATH])
+            self.draw_cell(self.goal, self.colors[Colors.CELL_NOPATH])
+
+        self.repaint()
+
 class DialogOptions(QDialog):
     """Dialog that allows to set several options like cell size, animation speed and colors."""
 
@@ -466,6 +602,14 @@ class DialogOptions(QDialog):
         self.animSpeed.setMaximum(10)
         layout.addWidget(self.animSpeed, 1, 1)
 
+        # SEARCH ENGINE
+        label = QLabel("Search engine:")
+        layout.addWidget(label, 2, 0)
+
+        self.inputEngine = QComboBox()
+        self.inputEngine.addItems(astar.ENGINES)
+        layout.addWidget(self.inputEngine, 2, 1)
+
         return group
 
     def create_group_colors(self):
@@ -476,8 +620,8 @@ class DialogOptions(QDialog):
         layout.setColumnMinimumWidth(0, 200)
         group.setLayout(layout)
 
-        strings = [ "MAP background:", "WINDOW background:", "GOAL cell:", "NO PATH cell:",\
-                    "PATH cell:", "START cell:", "UNWALKABLE cell:", "WALKABLE cell:" ]
+        strings = [ "MAP background:", "WINDOW background:", "CLOSED cell:", "GOAL cell:", "NO PATH cell:",\
+                    "OPEN cell:", "PATH cell:", "START cell:", "UNWALKABLE cell:", "WALKABLE cell:" ]
         ids = list(Colors)
 
         for row in range(len(Colors)):
@@ -569,6 +713,26 @@ class DialogOptions(QDialog):
         """
         self.animSpeed.setValue(speed)
 
+    def get_engine(self):
+        """Gets the search engine used by the pathfinder.
+
+        Returns
+        -------
+        str
+            One of astar.ENGINES.
+        """
+        return self.inputEngine.currentText()
+
+    def set_engine(self, engine):
+        """Sets the search engine used by the pathfinder.
+
+        Parameters
+        ----------
+        engine : str
+            One of astar.ENGINES.
+        """
+        self.inputEngine.setCurrentText(engine)
+
 class ButtonColor(QPushButton):
     """A button that can be used to show and set a color."""
 
@@ -658,35 +822,16 @@ class MainWindow(QMainWindow):
 
     def open_dialog_load(self):
         """Creates and opens the file dialog to chose a map to load."""
-        fileName, fil = QFileDialog.getOpenFileName(self, "Open Map", "data/maps/", "Map files (*.map)")
+        fileName, fil = QFileDialog.getOpenFileName(self, "Open Map", "data/maps/", "Map files (*.map *.pfm *.pft)")
 
         # have a file to load
         if len(fileName) > 0:
-            with open(fileName, 'r') as f:
-                fdata = f.readlines()
-
-            # convert map file to usable format
-            # 1 = walkable cell
-            # 0 = unwalkable cell
-            fRows = len(fdata)
-
-            if fRows == 0:
-                print("ERROR empty map")
+            try:
+                map = mapfile.load_map(fileName)
+            except mapfile.MapFileError as err:
+                print("ERROR {}".format(err))
                 return
 
-            # skip last column of '\n'
-            fCols = len(fdata[0]) - 1
-
-            map = []
-
-            for r in range(fRows):
-                map.append([1] * fCols)
-
-            for r in range(fRows):
-                for c in range(fCols):
-                    if fdata[r][c] == '#':
-                        map[r][c] = 0
-
             self.widget.set_map(map)
             self.widget.draw_map()
             self.widget.repaint()
@@ -697,6 +842,7 @@ class MainWindow(QMainWindow):
 
         self.dialogOpt.set_cell_size(self.widget.get_cell_size())
         self.dialogOpt.set_anim_speed(self.widget.get_anim_speed())
+        self.dialogOpt.set_engine(self.widget.get_engine())
 
         for colorId in Colors:
             self.dialogOpt.set_color(colorId, self.widget.get_color(colorId))
@@ -732,6 +878,9 @@ class MainWindow(QMainWindow):
         if animSpeed != self.widget.get_anim_speed():
             self.widget.set_anim_speed(animSpeed)
 
+        # search engine
+        self.widget.set_engine(self.dialogOpt.get_engine())
+
         # colors
         for colorId in Colors:
             newColor = self.dialogOpt.get_color(colorId)
@@ -0,0 +1,295 @@
+import json
+import os
+import platform
+import time
+
+class Scenario:
+    """A path query of a scenario file in the format of the MovingAI benchmarks."""
+
+    def __init__(self, bucket, mapName, start, goal, optimal):
+        """
+        Parameters
+        ----------
+        bucket : int
+            group of queries with similar length
+        mapName : str
+            path of the map file, as written in the scenario file
+        start : tuple
+            row,col of the start cell
+        goal : tuple
+            row,col of the destination cell
+        optimal : float
+            length of the optimal path computed by the authors of the scenario
+        """
+        self.bucket = bucket
+        self.mapName = mapName
+        self.start = start
+        self.goal = goal
+        self.optimal = optimal
+
+def load_scenarios(fileName):
+    """Load a scenario file in the format of the MovingAI benchmarks.
+
+    The first line is "version 1", then every line is a query made of tab separated fields:
+    bucket, map, width and height of the map, start x and y, goal x and y and optimal length.
+    x is the col of a cell and y is its row.
+
+    Parameters
+    ----------
+    fileName : str
+        path of the scenario file
+
+    Returns
+    -------
+    list
+        the Scenario objects of the queries, in the same order of the file
+    """
+    scenarios = []
+
+    with open(fileName) as f:
+        lines = f.read().splitlines()
+
+    if len(lines) == 0 or not lines[0].startswith("version"):
+        raise ScenarioFileError(fileName, "missing version")
+
+    for num in range(1, len(lines)):
+        fields = lines[num].split('\t')
+
+        # empty line
+        if len(fields) == 1 and fields[0].strip() == "":
+            continue
+
+        if len(fields) != 9:
+            raise ScenarioFileError(fileName, "wrong number of fields at line {}".format(num + 1))
+
+        try:
+            bucket = int(fields[0])
+            x0, y0, x1, y1 = (int(field) for field in fields[4:8])
+            optimal = float(fields[8])
+        except ValueError:
+            raise ScenarioFileError(fileName, "wrong value at line {}".format(num + 1))
+
+        scenarios.append(Scenario(bucket, fields[1], (y0, x0), (y1, x1), optimal))
+
+    return scenarios
+
+def find_map(mapName, scenarioFileName, mapsDir = ""):
+    """Find the map file of a scenario.
+
+    Scenario files usually refer to maps with paths relative to a directory of the benchmark,
+    so the map is searched in mapsDir and next to the scenario file, with and without its directories.
+
+    Parameters
+    ----------
+    mapName : str
+        path of the map file, as written in the scenario file
+    scenarioFileName : str
+        path of the scenario file
+    mapsDir : str
+        directory searched before the one of the scenario file, not used when empty
+
+    Returns
+    -------
+    str
+        path of the map file, or mapName if it can't be found
+    """
+    dirs = [mapsDir] if mapsDir else []
+    dirs.append(os.path.dirname(scenarioFileName))
+
+    for d in dirs:
+        for name in (mapName, os.path.basename(mapName)):
+            path = os.path.join(d, name)
+
+            if os.path.isfile(path):
+                return path
+
+    return mapName
+
+def percentile(values, p):
+    """Get a percentile of a list of values with the nearest rank method.
+
+    Parameters
+    ----------
+    values : list
+        values sorted in ascending order
+    p : float
+        the percentile, from 0 to 100
+
+    Returns
+    -------
+    float
+        the value at the percentile, 0 for an empty list
+    """
+    if len(values) == 0:
+        return 0
+
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+def run_queries(pf, queries, warmup = 0):
+    """Find the paths of a list of queries measuring the time and the work of every query.
+
+    Parameters
+    ----------
+    pf : astar.Pathfinder
+        the pathfinder of the map of the queries
+    queries : list
+        (start, goal) tuples
+    warmup : int
+        number of queries run before the measured ones, the first queries of the list are used.
+        They are not passed to the query hook and they are not counted in the statistics of the Pathfinder.
+
+    Returns
+    -------
+    dict
+        number of queries, paths not found, total time in seconds, paths per second,
+        latency percentiles and mean in ms, total and average cells expanded, cells forgotten
+        by the memory limit of the "sma" engine and sum of the costs of the paths
+    """
+    hook = pf.queryHook
+    pf.set_query_hook(None)
+
+    for start, goal in queries[:warmup]:
+        pf.make_path(start, goal)
+
+    pf.set_query_hook(hook)
+
+    if pf.stats() != None:
+        pf.stats().reset()
+
+    latencies = []
+    expansions = 0
+    pruned = 0
+    cost = 0
+    noPath = 0
+
+    for start, goal in queries:
+        t0 = time.perf_counter()
+        path = pf.make_path(start, goal)
+        t1 = time.perf_counter()
+
+        latencies.append(t1 - t0)
+        expansions += pf.last_expansions()
+        pruned += pf.last_pruned()
+
+        if len(path) > 0:
+            cost += pf.path_cost(path)
+        else:
+            noPath += 1
+
+    total = sum(latencies)
+    latencies.sort()
+    count = len(latencies)
+
+    return { "queries" : count,
+             "noPath" : noPath,
+             "time" : total,
+             "pathsPerSec" : count / total if total > 0 else 0,
+             "latencyMean" : total * 1000 / count if count > 0 else 0,
+             "latencyP50" : percentile(latencies, 50) * 1000,
+             "latencyP95" : percentile(latencies, 95) * 1000,
+             "latencyP99" : percentile(latencies, 99) * 1000,
+             "expansions" : expansions,
+             "expansionsPerQuery" : expansions / count if count > 0 else 0,
+             "pruned" : pruned,
+             "cost" : cost }
+
+def save_results(fileName, results, settings):
+    """Write the results of a benchmark to a JSON file.
+
+    Parameters
+    ----------
+    fileName : str
+        path of the JSON file
+    results : list
+        one dict for every benchmark, with the name of the benchmark, the engine and the values returned by run_queries
+    settings : dict
+        settings of the benchmark, stored as they are
+    """
+    data = { "python" : platform.python_version(),
+             "platform" : platform.platform(),
+             "date" : time.strftime("%Y-%m-%d %H:%M:%S"),
+             "settings" : settings,
+             "results" : results }
+
+    with open(fileName, 'w') as f:
+        json.dump(data, f, indent = 2)
+
+def load_results(fileName):
+    """Read the results of a benchmark from a JSON file written by save_results.
+
+    Parameters
+    ----------
+    fileName : str
+        path of the JSON file
+
+    Returns
+    -------
+    list
+        the results of the benchmark
+    """
+    with open(fileName) as f:
+        return json.load(f)["results"]
+
+def compare_results(results, baseline, tolerance = 0.1):
+    """Compare the results of a benchmark with the ones of a baseline.
+
+    Benchmarks are matched by name and engine. The latency and the speed are regressions when they are
+    worse than the baseline by more than tolerance, while any change of the cells expanded
+    or of the cost of the paths is reported, because it means the searches changed.
+
+    Parameters
+    ----------
+    results : list
+        the results of the benchmark
+    baseline : list
+        the results of the baseline
+    tolerance : float
+        relative change allowed for latency and speed, 0.1 = 10%
+
+    Returns
+    -------
+    list
+        description of every regression found, empty when there are none
+    """
+    base = { (result["name"], result["engine"]) : result for result in baseline }
+    regressions = []
+
+    for result in results:
+        old = base.get((result["name"], result["engine"]))
+
+        # new benchmark
+        if old == None:
+            continue
+
+        label = "{} - {}".format(result["name"], result["engine"])
+
+        for key in ("latencyP50", "latencyP95", "latencyP99"):
+            if old.get(key) and result.get(key) and result[key] > old[key] * (1 + tolerance):
+                regressions.append("{}: {} {:.4f} ms -> {:.4f} ms".format(label, key, old[key], result[key]))
+
+        if old.get("pathsPerSec") and result["pathsPerSec"] < old["pathsPerSec"] * (1 - tolerance):
+            regressions.append("{}: pathsPerSec {:.1f} -> {:.1f}".format(label, old["pathsPerSec"], result["pathsPerSec"]))
+
+        for key in ("expansions", "cost", "noPath"):
+            if key in old and key in result and result[key] != old[key]:
+                regressions.append("{}: {} {} -> {}".format(label, key, old[key], result[key]))
+
+    return regressions
+
+class ScenarioFileError(Exception):
+    """Exception raised when a scenario file can't be loaded."""
+
+    def __init__(self, fileName, reason):
+        """
+        Parameters
+        ----------
+        fileName : str
+            path of the scenario file
+        reason : str
+            description of the error
+        """
+        self.fileName = fileName
+        self.reason = reason
+
+    def __str__(self):
+        return "Can't load scenario {}: {}".format(self.fileName, self.reason)
@@ -0,0 +1,63 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import astar
+
+
+class ComponentsTest(unittest.TestCase):
+    """Connected components of a map changed between the queries."""
+
+    def setUp(self):
+        # two rooms split by a wall
+        self.map = [[1, 1, 0, 1, 1],
+                    [1, 1, 0, 1, 1],
+                    [1, 1, 0, 1, 1]]
+        self.pf = astar.Pathfinder(self.map)
+
+    def test_cost_changes_keep_labels(self):
+        components = self.pf.components
+        self.pf.map.set_cost(0, 0, 5)
+        self.pf.map.set_cost(1, 3, 9)
+
+        self.assertEqual(len(self.pf.make_path((0, 0), (2, 1))), 3)
+        self.assertEqual(self.pf.make_path((0, 0), (0, 4)), [])
+        self.assertIs(self.pf.components, components)
+
+    def test_open_wall(self):
+        self.assertEqual(self.pf.make_path((0, 0), (0, 4)), [])
+
+        self.pf.map.set_walkable(1, 2, True)
+
+        self.assertEqual(len(self.pf.make_path((0, 0), (0, 4))), 5)
+        self.assertEqual(self.pf.make_paths((0, 0), [(2, 4)])[0][-1], (2, 4))
+
+    def test_close_wall(self):
+        self.pf.map.set_walkable(1, 2, True)
+        self.assertEqual(len(self.pf.make_path((0, 0), (0, 4))), 5)
+
+        # labels are not updated, the search finds there's no path
+        components = self.pf.components
+        self.pf.map.set_cost(1, 2, 0)
+
+        self.assertEqual(self.pf.make_path((0, 0), (0, 4)), [])
+        self.assertEqual(self.pf.make_path_budget((0, 0), (0, 4)).path, [])
+        self.assertIs(self.pf.components, components)
+
+    def test_wall_version(self):
+        grid = self.pf.map
+        version = grid.wallVersion
+
+        grid.set_walkable(0, 0, True)
+        grid.set_cost(0, 1, 7)
+        self.assertEqual(grid.wallVersion, version)
+
+        grid.set_walkable(0, 0, False)
+        grid.set_cost(0, 2, 3)
+        self.assertEqual(grid.wallVersion, version + 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import astar
+import dstarlite
+
+
+class DStarLiteTest(unittest.TestCase):
+    """Replanning after the cells of the map change."""
+
+    def setUp(self):
+        self.planner = dstarlite.DStarLite([[1] * 6 for r in range(4)])
+        self.planner.plan((0, 0), (3, 5))
+
+    def test_update_cells(self):
+        self.planner.update_cells([(1, 1, False), (2, 2, False), (2, 3, 5)])
+        path = self.planner.replan()
+
+        pf = astar.Pathfinder(self.planner.map)
+        self.assertEqual(pf.path_cost(path), pf.path_cost(pf.make_path((0, 0), (3, 5))))
+
+    def test_out_of_bounds(self):
+        version = self.planner.map.version
+
+        # (0, 6) is the border col, (-1, 0) the border row
+        for cell in ((0, 6), (4, 0), (-1, 0), (0, -1)):
+            for walkable in (True, False, 3):
+                with self.subTest(cell = cell, walkable = walkable):
+                    with self.assertRaises(astar.OutOfBoundsError):
+                        self.planner.update_cells([(cell[0], cell[1], walkable)])
+
+        self.assertEqual(self.planner.map.version, version)
+
+
+if __name__ == "__main__":
+    unittest.main()
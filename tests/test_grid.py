@@ -0,0 +1,33 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import astar
+
+
+class GridTest(unittest.TestCase):
+    """Creation of a Grid from a list of rows."""
+
+    def test_from_list(self):
+        map = [[1, 0, 2],
+               [3, 1, 0]]
+        grid = astar.Grid.from_list(map)
+
+        self.assertEqual(len(grid.cells), astar.Grid.buffer_size(2, 3))
+        self.assertEqual(grid.to_list(), map)
+
+    def test_ragged_rows(self):
+        for map in ([[1, 1, 1], [1, 1, 1, 1], [1, 1, 1]],
+                    [[1, 1, 1], [1, 1], [1, 1, 1]]):
+            with self.subTest(map = map):
+                with self.assertRaises(ValueError):
+                    astar.Grid.from_list(map)
+
+                with self.assertRaises(ValueError):
+                    astar.Pathfinder(map)
+
+
+if __name__ == "__main__":
+    unittest.main()
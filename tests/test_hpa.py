@@ -0,0 +1,45 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import astar
+import hpa
+import mapgen
+
+
+class IterPathTest(unittest.TestCase):
+    """Lazy refinement of the HPA* paths."""
+
+    def setUp(self):
+        self.map = mapgen.open_map(64, 64, seed = 1)
+        self.hpf = hpa.HierarchicalPathfinder(self.map, 8)
+
+    def test_invalid_cells_raise_on_call(self):
+        wall = next((r, c) for r in range(64) for c in range(64) if not self.map.is_walkable(r, c))
+        start = next((r, c) for r in range(64) for c in range(64) if self.map.is_walkable(r, c))
+
+        # errors are raised before the generator is iterated
+        with self.assertRaises(astar.OutOfBoundsError):
+            self.hpf.iter_path(start, (64, 0))
+
+        with self.assertRaises(astar.UnwalkableError):
+            self.hpf.iter_path(start, wall)
+
+        with self.assertRaises(astar.SameStartGoalError):
+            self.hpf.iter_path(start, start)
+
+    def test_segments_make_the_path(self):
+        cells = [(r, c) for r in range(64) for c in range(64) if self.map.is_walkable(r, c)]
+        start, goal = cells[0], cells[-1]
+
+        path = [cell for segment in self.hpf.iter_path(start, goal) for cell in segment]
+
+        self.assertEqual(path, self.hpf.make_path(start, goal))
+        self.assertEqual(path[0], start)
+        self.assertEqual(path[-1], goal)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import astar
+import landmarks
+import mapgen
+
+
+def weighted_map(rows, cols, seed):
+    rng = random.Random(seed)
+    map = mapgen.rooms_map(rows, cols, seed = seed).to_list()
+
+    for row in map:
+        for c, cost in enumerate(row):
+            if(cost):
+                row[c] = rng.choice((1, 1, 2, 3, 5, 9))
+
+    return map
+
+
+class LandmarksTest(unittest.TestCase):
+    """ALT heuristic on weighted maps."""
+
+    def setUp(self):
+        self.map = weighted_map(40, 40, 3)
+        self.walkable = [(r, c) for r, row in enumerate(self.map) for c, cost in enumerate(row) if cost]
+        self.queries = [tuple(random.Random(i).sample(self.walkable, 2)) for i in range(20)]
+
+    def test_tables_match_path_costs(self):
+        alt = landmarks.Landmarks(self.map, 4)
+        pf = astar.Pathfinder(self.map)
+
+        for landmark, table in zip(alt.cells, alt.tables):
+            for cell in self.walkable[::7]:
+                if(cell == landmark):
+                    continue
+
+                path = pf.make_path(landmark, cell)
+
+                if(path):
+                    self.assertEqual(table[alt.map.cell_index(cell[0], cell[1])], pf.path_cost(path))
+
+    def test_components_and_tables(self):
+        # two rooms split by a wall, every room gets a landmark
+        alt = landmarks.Landmarks([[1, 1, 0, 1],
+                                   [1, 1, 0, 1]], 2)
+
+        self.assertEqual(len(alt.cells), 2)
+        self.assertEqual({c < 2 for r, c in alt.cells}, {True, False})
+
+        for table in alt.tables:
+            self.assertEqual(table.typecode, 'i')
+            self.assertEqual(len(table), len(alt.map.cells))
+
+    def test_fewer_expansions_than_octile(self):
+        octile = astar.Pathfinder(self.map)
+        alt = astar.Pathfinder(self.map)
+        alt.set_heuristic(landmarks.Landmarks(alt.map, 8))
+
+        for start, goal in self.queries:
+            with self.subTest(start = start, goal = goal):
+                octilePath = octile.make_path(start, goal)
+                altPath = alt.make_path(start, goal)
+
+                self.assertEqual(alt.path_cost(altPath), octile.path_cost(octilePath))
+                self.assertLessEqual(alt.last_expansions(), octile.last_expansions())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import mmap
+import os
+import sys
+import tempfile
+import unittest
+import zlib
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import astar
+import mapfile
+
+# mmap.mmap is replaced in the tests to record the mapped files
+MMAP = mmap.mmap
+
+
+class BinaryMapTest(unittest.TestCase):
+    """Binary map files, valid and corrupted."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.fileName = os.path.join(self.dir.name, "map.pfm")
+        self.grid = astar.Grid.from_list([[1, 0, 1],
+                                          [1, 1, 0]])
+
+        mapfile.save_binary_map(self.grid, self.fileName)
+
+        with open(self.fileName, 'rb') as f:
+            self.data = f.read()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def load(self, data):
+        with open(self.fileName, 'wb') as f:
+            f.write(data)
+
+        # keep the mapped files to check they are closed
+        mapped = []
+
+        def mmap_file(*args, **kwargs):
+            mapped.append(MMAP(*args, **kwargs))
+            return mapped[-1]
+
+        with mock.patch.object(mapfile.mmap, "mmap", mmap_file):
+            try:
+                return mapfile.load_binary_map(self.fileName)
+            finally:
+                self.mapped = mapped
+
+    def test_valid(self):
+        grid = self.load(self.data)
+        self.assertEqual(grid.to_list(), self.grid.to_list())
+
+    def test_errors_close_the_file(self):
+        size = mapfile.BINARY_HEADER.size
+        header = list(mapfile.BINARY_HEADER.unpack_from(self.data))
+        payload = self.data[size:]
+
+        def with_header(**fields):
+            values = list(header)
+
+            for i, name in enumerate(("magic", "version", "encoding", "reserved", "rows", "cols", "checksum")):
+                values[i] = fields.get(name, values[i])
+
+            return mapfile.BINARY_HEADER.pack(*values) + payload
+
+        border = bytearray(payload)
+        border[0] = 1
+
+        cases = { "truncated header" : self.data[:size - 1],
+                  "not a binary map" : with_header(magic = b'XXXX'),
+                  "unsupported version" : with_header(version = 99),
+                  "unknown encoding" : with_header(encoding = 99),
+                  "empty map" : with_header(rows = 0),
+                  "wrong checksum" : self.data[:-1] + bytes([self.data[-1] ^ 1]),
+                  "wrong size" : with_header(rows = 5, checksum = zlib.crc32(payload)),
+                  "border" : with_header(checksum = zlib.crc32(border))[:size] + bytes(border) }
+
+        for name, data in cases.items():
+            with self.subTest(case = name):
+                with self.assertRaises(mapfile.MapFileError):
+                    self.load(data)
+
+                self.assertEqual(len(self.mapped), 1)
+                self.assertTrue(self.mapped[0].closed)
+
+
+class TextMapTest(unittest.TestCase):
+    """Text map files with different line endings."""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.fileName = os.path.join(self.dir.name, "map.map")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def load(self, data):
+        with open(self.fileName, 'wb') as f:
+            f.write(data)
+
+        return mapfile.load_map(self.fileName)
+
+    def test_trailing_empty_lines(self):
+        expected = self.load(b"  #\n # \n#  ").to_list()
+        self.assertEqual(len(expected), 3)
+
+        for data in (b"  #\n # \n#  \n",
+                     b"  #\n # \n#  \n\n",
+                     b"  #\n # \n#  \n\n\n",
+                     b"  #\r\n # \r\n#  \r\n\r\n",
+                     b"  #\n # \n#\n\n"):
+            with self.subTest(data = data):
+                grid = self.load(data)
+
+                self.assertEqual((grid.rows, grid.cols), (3, 3))
+                self.assertEqual(grid.to_list()[:2], expected[:2])
+
+    def test_empty(self):
+        for data in (b"\n", b"\n\n", b"\r\n"):
+            with self.subTest(data = data):
+                with self.assertRaises(mapfile.MapFileError):
+                    self.load(data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import pickle
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import astar
+import landmarks
+import mapgen
+import parallel
+
+
+class SolveBatchTest(unittest.TestCase):
+    """Paths found by a pool of processes compared with the ones of a single Pathfinder."""
+
+    def setUp(self):
+        self.map = mapgen.random_map(40, 40, seed = 2)
+        self.walkable = [(r, c) for r in range(40) for c in range(40) if self.map.is_walkable(r, c)]
+        self.queries = [(self.walkable[i], self.walkable[-1 - i]) for i in range(0, len(self.walkable) // 2, 9)]
+
+    def check_costs(self, result, heuristic = "octile"):
+        pf = astar.Pathfinder(self.map)
+        pf.set_heuristic(heuristic)
+
+        self.assertEqual(len(result), len(self.queries))
+
+        for i, (start, goal) in enumerate(self.queries):
+            self.assertEqual(pf.path_cost(result.path(i)), pf.path_cost(pf.make_path(start, goal)))
+
+    def test_open_lists(self):
+        for openList in astar.OPEN_LISTS:
+            with self.subTest(openList = openList):
+                result = parallel.solve_batch(self.map, self.queries, 2, chunkSize = 16, openList = openList)
+                self.check_costs(result)
+
+    def test_invalid_queries(self):
+        wall = next((r, c) for r in range(40) for c in range(40) if not self.map.is_walkable(r, c))
+        start = self.walkable[0]
+        queries = [(start, (40, 0)), (start, wall), (start, start), (start, self.walkable[-1])]
+
+        result = parallel.solve_batch(self.map, queries, 2)
+
+        self.assertEqual(result.paths()[:3], [[], [], []])
+        self.assertEqual(result.path(3), astar.Pathfinder(self.map).make_path(start, self.walkable[-1]))
+
+    def test_landmarks(self):
+        alt = landmarks.Landmarks(self.map, 4)
+        detached = alt.detach()
+
+        # the map is in shared memory, only the tables are sent to the workers
+        self.assertIsNone(detached.map)
+        self.assertLess(len(pickle.dumps(detached)), len(pickle.dumps(alt)))
+
+        result = parallel.solve_batch(self.map, self.queries, 2, heuristic = alt, chunkSize = 16)
+        self.check_costs(result, alt)
+
+
+if __name__ == "__main__":
+    unittest.main()
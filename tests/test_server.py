@@ -0,0 +1,112 @@
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import astar
+
+# the script name is not a valid module name
+spec = importlib.util.spec_from_file_location("pyfinder_server", os.path.join(ROOT, "pyfinder-server.py"))
+server_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(server_module)
+
+
+class PathServerTest(unittest.TestCase):
+    """Queries sent to a PathServer on a local TCP socket."""
+
+    def send_queries(self, queries):
+        async def run():
+            server = server_module.PathServer({ "test" : astar.Pathfinder([[1] * 8 for r in range(8)]) }, 2)
+            listener = await asyncio.start_server(server.handle_client, "127.0.0.1", 0)
+            port = listener.sockets[0].getsockname()[1]
+
+            async with listener:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+                for query in queries:
+                    writer.write(query.encode() + b"\n")
+
+                await writer.drain()
+
+                replies = [json.loads(await reader.readline()) for query in queries]
+
+                writer.close()
+                server.executor.shutdown()
+
+                return replies
+
+        replies = asyncio.run(asyncio.wait_for(run(), 30))
+
+        # answers can be out of order
+        return { reply["id"] : reply for reply in replies }
+
+    def test_valid_query(self):
+        replies = self.send_queries(['{"id": 1, "map": "test", "start": [0, 0], "goal": [3, 3]}'])
+        self.assertEqual(replies[1]["path"], [[0, 0], [1, 1], [2, 2], [3, 3]])
+
+    def test_malformed_query(self):
+        queries = ['{"id": 1, "map": "test", "start": {"r": 0, "c": 0}, "goal": [3, 3]}',
+                   '{"id": 2, "map": "test", "start": [0, 0], "goal": {"0": 3, "1": 3}}',
+                   '{"id": 3, "map": "test", "start": [0], "goal": [3, 3]}',
+                   '{"id": 4, "map": "test", "start": [0, 0, 0], "goal": [3, 3]}',
+                   '{"id": 5, "map": "test", "start": ["0", 0], "goal": [3, 3]}',
+                   '{"id": 6, "map": "test", "start": [0, 0]}',
+                   '{"id": 7, "map": "test", "start": [0, 0], "goal": [30, 3]}',
+                   '{"id": 8, "map": "none", "start": [0, 0], "goal": [3, 3]}',
+                   '{"id": 9, "map": "test", "start": [0, 0], "goal": [5, 5]}']
+        replies = self.send_queries(queries)
+
+        for id in range(1, 9):
+            with self.subTest(id = id):
+                self.assertIn("error", replies[id])
+                self.assertNotIn("path", replies[id])
+
+        # the connection still works after the errors
+        self.assertEqual(len(replies[9]["path"]), 6)
+
+    def test_oversized_query(self):
+        async def run():
+            server = server_module.PathServer({ "test" : astar.Pathfinder([[1] * 8 for r in range(8)]) }, 2)
+            listener = await asyncio.start_server(server.handle_client, "127.0.0.1", 0, limit = 1024)
+            port = listener.sockets[0].getsockname()[1]
+
+            async with listener:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+                writer.write(b'{"id": 1, "map": "test", "start": [0, 0], "goal": [3, 3]}\n')
+                writer.write(b'{"id": 2, "padding": "' + b'x' * 4096 + b'"}\n')
+                await writer.drain()
+
+                replies = []
+
+                while True:
+                    line = await reader.readline()
+
+                    if not line:
+                        break
+
+                    replies.append(json.loads(line))
+
+                writer.close()
+                server.executor.shutdown()
+
+                return replies, server.errors
+
+        replies, errors = asyncio.run(asyncio.wait_for(run(), 30))
+
+        # answer of the first query and an error, in any order, then the connection is closed
+        self.assertEqual(len(replies), 2)
+        answers = [reply for reply in replies if reply.get("id") == 1]
+        self.assertEqual(len(answers), 1)
+        self.assertIn("path", answers[0])
+        self.assertIn("error", replies[1 - replies.index(answers[0])])
+        self.assertEqual(errors, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import astar
+import mapgen
+
+
+def parse_map(rows):
+    return [[0 if ch == '#' else 1 for ch in row] for row in rows]
+
+
+class SMAStarTest(unittest.TestCase):
+    """Memory-bounded search with limits around the number of cells of the optimal path."""
+
+    def check_limits(self, map, start, goal):
+        pf = astar.Pathfinder(map)
+        path = pf.make_path(start, goal)
+        cells = len(path)
+        cost = pf.path_cost(path)
+
+        for limit in (cells - 2, cells - 1, cells, cells + 1, cells + 2, 2 * cells):
+            with self.subTest(limit = limit):
+                sma = astar.Pathfinder(map)
+                sma.set_engine("sma")
+                sma.set_memory_limit(limit)
+                smaPath = sma.make_path(start, goal)
+
+                if(limit < cells):
+                    self.assertLessEqual(len(smaPath), limit)
+
+                    if(smaPath):
+                        self.assertGreater(sma.path_cost(smaPath), cost)
+                elif(sma.last_exhausted()):
+                    self.assertEqual(smaPath, [])
+                else:
+                    self.assertEqual(len(smaPath), cells)
+                    self.assertEqual(sma.path_cost(smaPath), cost)
+
+                self.assertLessEqual(sma.last_expansions(), astar.DEFAULT_EXPANSION_FACTOR * limit)
+
+    def test_open_map(self):
+        map = [[1] * 14 for r in range(8)]
+        self.check_limits(map, (0, 9), (7, 1))
+
+    def test_random_map(self):
+        map = mapgen.random_map(8, 14, seed = 5).to_list()
+        self.check_limits(map, (0, 9), (7, 7))
+
+    def test_serpentine_map(self):
+        map = parse_map(["      ",
+                         "##### ",
+                         "      ",
+                         " #####",
+                         "      "])
+        self.check_limits(map, (0, 0), (4, 5))
+
+    def test_serpentine_below_limit(self):
+        map = parse_map(["      ",
+                         "##### ",
+                         "      ",
+                         " #####",
+                         "      "])
+
+        for limit in range(2, 16):
+            with self.subTest(limit = limit):
+                pf = astar.Pathfinder(map)
+                pf.set_engine("sma")
+                pf.set_memory_limit(limit)
+                self.assertEqual(pf.make_path((0, 0), (4, 5)), [])
+
+    def test_maze_map(self):
+        map = mapgen.maze_map(15, 15, seed = 3).to_list()
+        self.check_limits(map, (1, 1), (13, 13))
+
+    def test_weighted_map(self):
+        map = mapgen.random_map(10, 10, seed = 7).to_list()
+
+        for r, row in enumerate(map):
+            for c, cost in enumerate(row):
+                if(cost):
+                    row[c] = 1 + (r * 7 + c * 3) % 5
+
+        map[0][0] = 1
+        map[9][9] = 1
+        self.check_limits(map, (0, 0), (9, 9))
+
+    def test_expansion_limit(self):
+        # the search thrashes with limits just above the 17 cells of the path
+        rng = random.Random(7)
+        map = [[rng.choice((0, 1, 1, 2, 3, 5, 9)) for c in range(25)] for r in range(15)]
+        map[14][20] = 1
+        map[7][7] = 1
+
+        pf = astar.Pathfinder(map)
+        cost = pf.path_cost(pf.make_path((14, 20), (7, 7)))
+
+        for limit in (18, 19, 21, 24):
+            with self.subTest(limit = limit):
+                sma = astar.Pathfinder(map)
+                sma.set_engine("sma")
+                sma.set_memory_limit(limit)
+                path = sma.make_path((14, 20), (7, 7))
+
+                self.assertLessEqual(sma.last_expansions(), astar.DEFAULT_EXPANSION_FACTOR * limit)
+
+                if(sma.last_exhausted()):
+                    self.assertEqual(path, [])
+                    self.assertGreater(sma.last_pruned(), 0)
+                else:
+                    self.assertEqual(sma.path_cost(path), cost)
+
+        # explicit limit
+        sma = astar.Pathfinder(map)
+        sma.set_engine("sma")
+        sma.set_memory_limit(18, 500)
+
+        self.assertEqual(sma.make_path((14, 20), (7, 7)), [])
+        self.assertTrue(sma.last_exhausted())
+        self.assertEqual(sma.last_expansions(), 500)
+
+        with self.assertRaises(ValueError):
+            sma.set_memory_limit(18, -1)
+
+    def test_stats(self):
+        map = mapgen.maze_map(15, 15, seed = 3).to_list()
+        pf = astar.Pathfinder(map)
+        pf.set_engine("sma")
+        pf.set_memory_limit(30)
+        pf.set_stats(True)
+        pf.make_path((1, 1), (13, 13))
+
+        stats = pf.stats()
+        self.assertGreater(stats.pushes, 0)
+        self.assertGreater(stats.maxOpen, 0)
+        self.assertLessEqual(stats.maxOpen, 30)
+        self.assertEqual(stats.pruned, pf.last_pruned())
+
+
+if __name__ == "__main__":
+    unittest.main()
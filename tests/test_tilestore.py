@@ -0,0 +1,51 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mapgen
+import parallel
+import tilestore
+
+
+class TileStoreTest(unittest.TestCase):
+    """Cells of a map read from a tile store."""
+
+    def setUp(self):
+        self.grid = mapgen.random_map(37, 45, seed = 4)
+
+        fd, self.fileName = tempfile.mkstemp(suffix = ".pft")
+        os.close(fd)
+
+        tilestore.save_tile_store(self.fileName, self.grid.rows, self.grid.cols, tilestore.grid_rows(self.grid), 8)
+        self.tiled = tilestore.load_tile_store(self.fileName)
+
+    def tearDown(self):
+        self.tiled.cells.close()
+        os.remove(self.fileName)
+
+    def test_slices(self):
+        size = len(self.grid.cells)
+
+        for start, stop in ((0, size), (0, 60), (47, 47 + 45), (100, 390), (size - 70, size), (500, 400)):
+            with self.subTest(start = start, stop = stop):
+                self.assertEqual(self.tiled.cells[start:stop], bytes(self.grid.cells[start:stop]))
+
+        self.assertEqual(self.tiled.cells[5:900:7], bytes(self.grid.cells[5:900:7]))
+
+    def test_row_loads_its_tiles(self):
+        i = self.tiled.cell_index(20, 0)
+        self.tiled.cells[i:i + self.tiled.cols]
+
+        # 45 cols -> 6 tiles of 8 cells
+        self.assertLessEqual(self.tiled.cells.loads, 6)
+
+    def test_parallel_rejects_lazy_maps(self):
+        with self.assertRaises(ValueError):
+            parallel.solve_batch(self.tiled, [((0, 0), (1, 1))], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,490 @@
+from collections import OrderedDict
+import astar
+import mapfile
+import mmap
+import struct
+import threading
+import zlib
+
+# tile store file: a header, the compressed tiles and an index with one entry per tile
+TILES_MAGIC = b'PFTS'
+TILES_VERSION = 1
+
+# little endian header: magic, version, reserved, size of a tile, rows, cols, position of the index
+TILES_HEADER = struct.Struct('<4sBBHIIQ')
+
+# little endian entry of the index: position and size of the compressed tile, CRC-32 of the compressed tile, kind
+TILES_ENTRY = struct.Struct('<QIIB')
+
+# kinds of tile, the tiles made of walls or of cells with cost 1 are not stored
+TILE_WALLS = 0
+TILE_OPEN = 1
+TILE_UNIFORM = 2
+TILE_TERRAIN = 3
+
+DEFAULT_TILE_SIZE = 64
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+class TileStore:
+    """Cells of a map stored in square tiles, loaded from a tile store file when a search reads them.
+
+    A TileStore works like the buffer of an astar.Grid: it's indexed by the unique index of a cell
+    and it returns 0 for the border. The tiles loaded are kept in a LRU cache, which never holds
+    more than maxBytes of cells. Tiles made only of walls or of cells with cost 1 take no memory.
+    Changed tiles are kept in memory until the store is closed and they are never written to the file.
+    """
+
+    def __init__(self, fileName, maxBytes = DEFAULT_MAX_BYTES, verify = True):
+        """
+        Parameters
+        ----------
+        fileName : str
+            path of the tile store file
+        maxBytes : int
+            maximum size of the tiles kept in the cache, at least one tile is always kept
+        verify : bool
+            when True the checksum of every tile is verified when it's loaded
+        """
+        self.fileName = fileName
+        self.verify = verify
+
+        with open(fileName, 'rb') as f:
+            try:
+                self.data = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+            # mmap can't map empty files
+            except ValueError:
+                raise mapfile.MapFileError(fileName, "empty map")
+
+        if len(self.data) < TILES_HEADER.size:
+            raise mapfile.MapFileError(fileName, "truncated header")
+
+        magic, version, reserved, tileSize, rows, cols, indexPos = TILES_HEADER.unpack_from(self.data)
+
+        if magic != TILES_MAGIC:
+            raise mapfile.MapFileError(fileName, "not a tile store")
+
+        if version != TILES_VERSION:
+            raise mapfile.MapFileError(fileName, "unsupported version {}".format(version))
+
+        if rows == 0 or cols == 0 or tileSize == 0:
+            raise mapfile.MapFileError(fileName, "empty map")
+
+        self.rows = rows
+        self.cols = cols
+        self.stride = cols + 1
+        self.tileSize = tileSize
+        self.tileRows = (rows + tileSize - 1) // tileSize
+        self.tileCols = (cols + tileSize - 1) // tileSize
+
+        numTiles = self.tileRows * self.tileCols
+
+        if indexPos + numTiles * TILES_ENTRY.size != len(self.data):
+            raise mapfile.MapFileError(fileName, "wrong size of the index")
+
+        self.index = [TILES_ENTRY.unpack_from(self.data, indexPos + i * TILES_ENTRY.size) for i in range(numTiles)]
+
+        tileBytes = tileSize * tileSize
+        self.walls = bytes(tileBytes)
+        self.open = b'\x01' * tileBytes
+
+        # tiles never evicted: the ones not stored in the file and the changed ones
+        self.pinned = dict()
+
+        for i in range(numTiles):
+            kind = self.index[i][3]
+
+            if kind == TILE_WALLS:
+                self.pinned[i] = self.walls
+            elif kind == TILE_OPEN:
+                self.pinned[i] = self.open
+
+        # LRU cache of the tiles loaded from the file
+        self.tiles = OrderedDict()
+        self.maxTiles = max(1, maxBytes // tileBytes)
+        self.lock = threading.RLock()
+
+        # (tile, cells) of the last tile read, checked before the cache
+        self.last = (-1, None)
+
+        self.loads = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return astar.Grid.buffer_size(self.rows, self.cols)
+
+    def locate(self, idx):
+        """Get the tile containing a cell and the position of the cell in the tile.
+
+        Parameters
+        ----------
+        idx : int
+            unique index of the cell
+
+        Returns
+        -------
+        tuple
+            index of the tile and position of the cell in the tile, or (-1, -1) for the border
+        """
+        row, col = divmod(idx - 1, self.stride)
+        row -= 1
+
+        if(row < 0 or row >= self.rows or col >= self.cols):
+            return (-1, -1)
+
+        tileRow, r = divmod(row, self.tileSize)
+        tileCol, c = divmod(col, self.tileSize)
+
+        return (tileRow * self.tileCols + tileCol, r * self.tileSize + c)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(len(self))
+
+            if(step == 1):
+                return self.read(start, stop)
+
+            return bytes(self[i] for i in range(start, stop, step))
+
+        tile, pos = self.locate(idx)
+
+        if(tile == -1):
+            return 0
+
+        last = self.last
+
+        if(last[0] == tile):
+            return last[1][pos]
+
+        cells = self.tile(tile)
+        self.last = (tile, cells)
+
+        return cells[pos]
+
+    def read(self, start, stop):
+        """Get a range of cells, copying them a row of a tile at a time.
+
+        Parameters
+        ----------
+        start : int
+            unique index of the first cell
+        stop : int
+            unique index after the last cell
+
+        Returns
+        -------
+        bytes
+            the cells, 0 for the border
+        """
+        data = bytearray(max(0, stop - start))
+        idx = start
+
+        while(idx < stop):
+            row, col = divmod(idx - 1, self.stride)
+            row -= 1
+
+            # border row -> skip to the next row
+            if(row < 0 or row >= self.rows):
+                idx += self.stride - col
+                continue
+
+            # border col
+            if(col >= self.cols):
+                idx += 1
+                continue
+
+            tileRow, r = divmod(row, self.tileSize)
+            tileCol, c = divmod(col, self.tileSize)
+
+            # cells up to the end of the row of the tile
+            n = min(self.tileSize - c, self.cols - col, stop - idx)
+            pos = r * self.tileSize + c
+
+            cells = self.tile(tileRow * self.tileCols + tileCol)
+            data[idx - start:idx - start + n] = cells[pos:pos + n]
+            idx += n
+
+        return bytes(data)
+
+    def __setitem__(self, idx, value):
+        tile, pos = self.locate(idx)
+
+        if(tile == -1):
+            raise IndexError("cell {} is in the border".format(idx))
+
+        with self.lock:
+            cells = self.pinned.get(tile)
+
+            # first change of the tile -> pin a copy
+            if not isinstance(cells, bytearray):
+                cells = bytearray(self.tile(tile))
+                self.tiles.pop(tile, None)
+                self.pinned[tile] = cells
+
+            cells[pos] = value
+            self.last = (tile, cells)
+
+    def tile(self, tile):
+        """Get the cells of a tile, loading it from the file if it's not in memory.
+
+        Parameters
+        ----------
+        tile : int
+            index of the tile, row of the tile * tileCols + col of the tile
+
+        Returns
+        -------
+        bytes
+            tileSize * tileSize cells by rows, the cells outside the map are walls
+        """
+        cells = self.pinned.get(tile)
+
+        if cells != None:
+            return cells
+
+        with self.lock:
+            cells = self.tiles.get(tile)
+
+            if cells != None:
+                self.tiles.move_to_end(tile)
+                return cells
+
+            cells = self.read_tile(tile)
+            self.tiles[tile] = cells
+            self.loads += 1
+
+            # keep the cache within the memory limit
+            while(len(self.tiles) > self.maxTiles):
+                self.tiles.popitem(last = False)
+                self.evictions += 1
+
+            return cells
+
+    def read_tile(self, tile):
+        """Read and decompress a tile from the file.
+
+        Parameters
+        ----------
+        tile : int
+            index of the tile
+
+        Returns
+        -------
+        bytes
+            the cells of the tile
+        """
+        pos, size, checksum, kind = self.index[tile]
+        data = self.data[pos:pos + size]
+
+        if self.verify and zlib.crc32(data) != checksum:
+            raise mapfile.MapFileError(self.fileName, "wrong checksum of tile {}".format(tile))
+
+        cells = zlib.decompress(data)
+
+        if len(cells) != self.tileSize * self.tileSize:
+            raise mapfile.MapFileError(self.fileName, "wrong size of tile {}".format(tile))
+
+        return cells
+
+    def is_uniform(self):
+        """Check if all the walkable cells have terrain cost 1, without loading the tiles.
+
+        Returns
+        -------
+        bool
+            True if the map has no terrain costs, False otherwise
+        """
+        with self.lock:
+            for tile in range(len(self.index)):
+                cells = self.pinned.get(tile)
+
+                if cells != None:
+                    if astar.NOT_UNIFORM_PATTERN.search(cells) != None:
+                        return False
+
+                elif self.index[tile][3] == TILE_TERRAIN:
+                    return False
+
+        return True
+
+    def close(self):
+        """Release the file and all the tiles in memory."""
+        with self.lock:
+            self.tiles.clear()
+            self.pinned.clear()
+            self.last = (-1, None)
+            self.data.close()
+
+class TiledGrid(astar.Grid):
+    """Grid whose cells are in a TileStore, so only the tiles reached by the searches are loaded.
+
+    A Pathfinder searches a TiledGrid like any other Grid. The connected components of the map
+    are not computed, so a search for an unreachable goal explores all the cells reachable from the start.
+    Methods reading the whole map, like to_list, work but load every tile.
+    """
+
+    lazy = True
+
+    def __init__(self, store):
+        """
+        Parameters
+        ----------
+        store : TileStore
+            the cells of the map
+        """
+        super().__init__(store.rows, store.cols, store)
+
+    def is_uniform(self):
+        """Check if all the walkable cells have terrain cost 1.
+
+        Returns
+        -------
+        bool
+            True if the map has no terrain costs, False otherwise
+        """
+        if(self.uniformVersion != self.version):
+            self.uniform = self.cells.is_uniform()
+            self.uniformVersion = self.version
+
+        return self.uniform
+
+def load_tile_store(fileName, maxBytes = DEFAULT_MAX_BYTES):
+    """Open a tile store file as a TiledGrid. No tile is loaded until it's read.
+
+    Parameters
+    ----------
+    fileName : str
+        path of the tile store file
+    maxBytes : int
+        maximum size of the tiles kept in memory
+
+    Returns
+    -------
+    TiledGrid
+        the map stored in the file
+    """
+    return TiledGrid(TileStore(fileName, maxBytes))
+
+def save_tile_store(fileName, rows, cols, rowData, tileSize = DEFAULT_TILE_SIZE):
+    """Write a tile store file from the rows of a map, keeping in memory only one row of tiles.
+
+    Parameters
+    ----------
+    fileName : str
+        path of the tile store file
+    rows : int
+        number of rows of the map
+    cols : int
+        number of cols of the map
+    rowData : iterable
+        the rows of the map, every row made of cols values of the cells as in astar.Grid
+    tileSize : int
+        number of rows and cols of a tile
+    """
+    if tileSize <= 0 or tileSize > 0xFFFF:
+        raise ValueError("wrong tile size: {}".format(tileSize))
+
+    tileBytes = tileSize * tileSize
+    tileCols = (cols + tileSize - 1) // tileSize
+    rowData = iter(rowData)
+    index = []
+
+    with open(fileName, 'wb') as f:
+        # header written again at the end, when the position of the index is known
+        f.write(bytes(TILES_HEADER.size))
+
+        for r0 in range(0, rows, tileSize):
+            # cells of a row of tiles, every row padded to tileCols whole tiles
+            band = bytearray()
+
+            for r in range(r0, min(r0 + tileSize, rows)):
+                row = bytes(next(rowData))[:cols]
+                band += row + bytes(tileCols * tileSize - len(row))
+
+            band += bytes(tileCols * tileSize * tileSize - len(band))
+            bandStride = tileCols * tileSize
+
+            for tc in range(tileCols):
+                cells = bytearray(tileBytes)
+
+                for r in range(tileSize):
+                    start = r * bandStride + tc * tileSize
+                    cells[r * tileSize:(r + 1) * tileSize] = band[start:start + tileSize]
+
+                if cells.count(0) == tileBytes:
+                    index.append((0, 0, 0, TILE_WALLS))
+                    continue
+
+                # cells outside the map are walls, so a tile on the edge is never TILE_OPEN
+                if cells.count(1) == tileBytes:
+                    index.append((0, 0, 0, TILE_OPEN))
+                    continue
+
+                data = zlib.compress(bytes(cells))
+                kind = TILE_UNIFORM if astar.NOT_UNIFORM_PATTERN.search(cells) == None else TILE_TERRAIN
+                index.append((f.tell(), len(data), zlib.crc32(data), kind))
+                f.write(data)
+
+        indexPos = f.tell()
+
+        for entry in index:
+            f.write(TILES_ENTRY.pack(*entry))
+
+        f.seek(0)
+        f.write(TILES_HEADER.pack(TILES_MAGIC, TILES_VERSION, 0, tileSize, rows, cols, indexPos))
+
+def grid_rows(grid):
+    """Get the rows of a Grid in the format used by save_tile_store.
+
+    Parameters
+    ----------
+    grid : astar.Grid
+        the map
+
+    Returns
+    -------
+    generator
+        the values of the cells of every row
+    """
+    for r in range(grid.rows):
+        start = grid.cell_index(r, 0)
+        yield grid.cells[start:start + grid.cols]
+
+def convert_map(mapFileName, fileName, tileSize = DEFAULT_TILE_SIZE):
+    """Convert a map file to a tile store file.
+
+    A text map is read one line at a time, so maps bigger than the memory can be converted.
+
+    Parameters
+    ----------
+    mapFileName : str
+        path of the text or binary map file
+    fileName : str
+        path of the tile store file
+    tileSize : int
+        number of rows and cols of a tile
+    """
+    with open(mapFileName, 'rb') as f:
+        magic = f.read(len(mapfile.BINARY_MAGIC))
+
+    if magic in (mapfile.BINARY_MAGIC, TILES_MAGIC):
+        grid = mapfile.load_map(mapFileName)
+        save_tile_store(fileName, grid.rows, grid.cols, grid_rows(grid), tileSize)
+        return
+
+    # first pass to get the size of the map
+    rows = 0
+    cols = 0
+
+    with open(mapFileName, 'rb') as f:
+        for line in f:
+            if rows == 0:
+                cols = len(line.rstrip(b'\r\n'))
+
+            rows += 1
+
+    if rows == 0 or cols == 0:
+        raise mapfile.MapFileError(mapFileName, "empty map")
+
+    with open(mapFileName, 'rb') as f:
+        lines = (line.rstrip(b'\r\n').translate(mapfile.MAP_TABLE) for line in f)
+        save_tile_store(fileName, rows, cols, lines, tileSize)